@@ -0,0 +1,224 @@
+"""
+Procesamiento por lotes sin Streamlit.
+
+Lee un fichero JSONL o CSV con textos o URLs, los pasa por
+extracción → heurísticas → Azure Language y escribe un resultado
+por línea en JSONL o Parquet.
+
+Cada registro de entrada puede tener:
+  - "text": texto de la noticia, o
+  - "url":  URL de la noticia (se descarga y extrae)
+  - "id":   identificador opcional (por defecto, el número de línea)
+
+Uso:
+    python -m app.batch noticias.jsonl -o resultados.jsonl
+    python -m app.batch noticias.csv -o resultados.parquet --batch-size 200
+    cat noticias.jsonl | python -m app.batch - -o - --input-format jsonl
+
+La entrada se lee en flujo y se procesa en bloques de --batch-size
+registros, así la memoria no crece con el tamaño del fichero.
+"""
+import argparse
+import csv
+import json
+import logging
+import sys
+from itertools import islice
+
+from app.services.heuristics import classify_texts
+from app.services.chunking import analyze_long_texts
+from app.services.dedup import dedup_index
+from app.utils.extractor import FULL_ARTICLE_CHARS
+from app.utils.fetcher import fetch_urls
+from app.utils.metrics import start_metrics_server, write_metrics
+
+# Columnas de salida (también definen el esquema Parquet)
+OUTPUT_FIELDS = [
+    "id", "url", "language", "sentiment", "summary", "sentences",
+    "flags", "classification", "classification_score", "error",
+]
+
+
+# --------------------------------------------------------
+# Lectura de la entrada (JSONL o CSV) en flujo
+# --------------------------------------------------------
+def read_records(stream, fmt):
+    """Devuelve los registros de entrada uno a uno, con un "id" asegurado."""
+    rows = csv.DictReader(stream) if fmt == "csv" else (
+        json.loads(line) for line in stream if line.strip()
+    )
+    for i, row in enumerate(rows):
+        row.setdefault("id", str(i))
+        yield row
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# --------------------------------------------------------
+# process_records()
+# Para cada bloque de registros:
+#   1️⃣ descarga en paralelo las URLs del bloque
+#   2️⃣ puntúa las heurísticas de todo el bloque de una vez
+#      (matriz documento-término, ver heuristics.classify_texts)
+#   3️⃣ analiza todos los textos del bloque con analyze_long_texts()
+#      (los artículos largos se trocean, ver chunking.py)
+# --------------------------------------------------------
+def process_records(records, batch_size=100, **fetch_kwargs):
+    """Procesa los registros por bloques y devuelve un resultado por registro."""
+    for chunk in chunked(records, batch_size):
+        urls = [r["url"] for r in chunk if r.get("url") and not r.get("text")]
+        fetched = {f.url: f for f in fetch_urls(urls, **fetch_kwargs)} if urls else {}
+
+        outputs, texts = [], []
+        for record in chunk:
+            out = {"id": record["id"], "url": record.get("url") or None}
+            text = record.get("text")
+
+            if not text and out["url"] in fetched:
+                text, out["error"] = fetched[out["url"]].text, fetched[out["url"]].error
+            elif not text:
+                out["error"] = "Registro sin 'text' ni 'url'"
+
+            if text:
+                texts.append(text)
+            outputs.append((out, bool(text)))
+
+        heuristics = iter(classify_texts(texts)) if texts else iter(())
+        results = iter(analyze_long_texts(texts)) if texts else iter(())
+
+        for out, analyzed in outputs:
+            if analyzed:
+                out["flags"], out["classification"], out["classification_score"] = next(heuristics)
+                out.update(next(results))
+                for key in ("timings", "scores", "summary_ranked", "chunks"):
+                    out.pop(key, None)
+            yield out
+
+
+# --------------------------------------------------------
+# Escritura de resultados
+# --------------------------------------------------------
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, rows):
+        for row in rows:
+            self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.stream.flush()
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class ParquetWriter:
+    """Escribe Parquet por bloques (requiere pyarrow, dependencia opcional)."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ La salida Parquet requiere pyarrow: pip install pyarrow")
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("id", pa.string()),
+            ("url", pa.string()),
+            ("language", pa.string()),
+            ("sentiment", pa.string()),
+            ("summary", pa.string()),
+            ("sentences", pa.list_(pa.struct([("text", pa.string()), ("sentiment", pa.string())]))),
+            ("flags", pa.list_(pa.string())),
+            ("classification", pa.string()),
+            ("classification_score", pa.float64()),
+            ("error", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = {name: [] for name in OUTPUT_FIELDS}
+        for row in rows:
+            for name in OUTPUT_FIELDS:
+                value = row.get(name)
+                if name == "sentences" and value is not None:
+                    value = [{"text": t, "sentiment": s} for t, s in value]
+                columns[name].append(value)
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _detect_format(path, explicit, choices):
+    if explicit:
+        return explicit
+    for fmt in choices:
+        if path.lower().endswith("." + fmt):
+            return fmt
+    raise SystemExit(f"❌ No se puede deducir el formato de '{path}'; usa una de: {', '.join(choices)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input", help="fichero de entrada (.jsonl o .csv), o '-' para stdin")
+    parser.add_argument("-o", "--output", default="-", help="fichero de salida (.jsonl o .parquet), o '-' para stdout")
+    parser.add_argument("--input-format", choices=["jsonl", "csv"])
+    parser.add_argument("--output-format", choices=["jsonl", "parquet"])
+    parser.add_argument("--batch-size", type=int, default=100, help="registros por bloque")
+    parser.add_argument("--workers", type=int, default=16, help="descargas simultáneas")
+    parser.add_argument("--max-chars", type=int, default=FULL_ARTICLE_CHARS,
+                        help="caracteres máximos extraídos por URL")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    start_metrics_server()
+
+    in_fmt = _detect_format(args.input, args.input_format or ("jsonl" if args.input == "-" else None), ["jsonl", "csv"])
+    out_fmt = _detect_format(args.output, args.output_format or ("jsonl" if args.output == "-" else None), ["jsonl", "parquet"])
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    if out_fmt == "parquet":
+        writer = ParquetWriter(args.output)
+    else:
+        writer = JsonlWriter(sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8"))
+
+    total = errors = 0
+    try:
+        rows = process_records(read_records(source, in_fmt), args.batch_size,
+                               max_workers=args.workers, max_chars=args.max_chars)
+        for block in chunked(rows, args.batch_size):
+            writer.write(block)
+            total += len(block)
+            errors += sum(1 for r in block if r.get("error"))
+            logging.info("%d registros procesados (%d con error)", total, errors)
+    finally:
+        writer.close()
+        if source is not sys.stdin:
+            source.close()
+
+        # Métricas de la ejecución en METRICS_FILE (si está definido)
+        path = write_metrics()
+        if path:
+            logging.info("Métricas guardadas en %s", path)
+
+        # Casi-duplicados (el índice ya está en disco para la próxima ejecución)
+        index = dedup_index()
+        if index is not None:
+            stats = index.stats()
+            logging.info("Casi-duplicados: %d de %d (%.0f%%), %d registros de Azure ahorrados",
+                         stats["duplicates"], stats["queries"], stats["dedup_rate"] * 100,
+                         stats["text_records_saved"])
+
+
+if __name__ == "__main__":
+    main()
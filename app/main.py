@@ -1,13 +1,22 @@
-import sys, os
+import sys, os, re, uuid
 # Añade al PATH la carpeta padre del archivo actual, para permitir imports del proyecto
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# (una sola vez: Streamlit vuelve a ejecutar este script en cada rerun)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
 
 import streamlit as st  # Librería para crear la interfaz web
 
 # Importamos las funciones principales del proyecto
-from app.services.language import analyze_text            # Azure Language API
-from app.services.heuristics import detect_red_flags, classify_article  # Heurísticas (clickbait, sesgo…)
-from app.utils.extractor import extract_text_from_url     # Extracción de texto desde una URL
+from app.services.language import azure_stats, dedup_stats  # Azure Language API
+from app.services.chunking import analyze_long_texts    # Artículos largos por trozos
+from app.services.jobs import STAGES, job_queue          # Análisis en segundo plano
+from app.services import workers                          # Trabajo de CPU en el pool de procesos (opcional)
+from app.services.report import AnalysisResult            # Resultado precalculado para las vistas
+from app.utils.extractor import FULL_ARTICLE_CHARS, MAX_CHARS  # Límites de la extracción de texto
+from app.utils.cache import analysis_cache, page_cache    # Cachés persistentes (análisis y páginas)
+from app.utils.history import history_store               # Historial persistente (SQLite)
+from app.utils import metrics                              # Latencias, cachés y coste de Azure
 
 
 # -----------------------------
@@ -15,11 +24,72 @@ from app.utils.extractor import extract_text_from_url     # Extracción de texto
 # -----------------------------
 st.set_page_config(page_title="📰 Analizador de Noticias", page_icon="🧠")
 
+# Endpoint /metrics de Prometheus (solo si se define METRICS_PORT)
+metrics.start_metrics_server()
+
+
+# -----------------------------
+# FUNCIONES AUXILIARES
+# -----------------------------
+def latency_table(rows, label):
+    """Tabla markdown con n, media y percentiles (en ms) de un histograma."""
+    lines = [f"| {label} | n | media | p50 | p95 | p99 |", "|---|---|---|---|---|---|"]
+    for labels, count, mean, p50, p95, p99 in rows:
+        name = ", ".join(labels.values()) or "-"
+        lines.append(f"| {name} | {count} | " + " | ".join(f"{v * 1000:.1f} ms" for v in (mean, p50, p95, p99)) + " |")
+    return "\n".join(lines)
+
+
+def history_owner():
+    """Dueño estable del historial de esta sesión (ver history.py).
+
+    - Con login de Streamlit (st.user): el usuario, en cualquier navegador.
+    - Sin login: un token aleatorio en la URL (?historial=…). Recargar la
+      página o guardarla en marcadores conserva el historial; quien tenga
+      el enlace lo ve, como cualquier enlace privado.
+    """
+    user = getattr(st, "user", None)
+    if user is not None and user.get("is_logged_in"):
+        return "user:" + (user.get("email") or user.get("sub"))
+
+    token = st.query_params.get("historial", "")
+    if not re.fullmatch(r"[0-9a-f]{32}", token):
+        token = st.session_state.get("history_owner") or uuid.uuid4().hex
+        st.query_params["historial"] = token
+    st.session_state["history_owner"] = token
+    return token
+
+
+# Cada sesión solo ve su propio historial (salvo con HISTORY_SHARED=1)
+owner = history_owner()
+
 # Título principal en pantalla
 st.title("🧠 Analizador / Verificador de Noticias (Azure Language)")
 
-# Creamos las tres pestañas principales (inputs, informe, historial)
-tab1, tab2, tab3 = st.tabs(["📝 URL / Texto", "📊 Informe", "🕓 Historial"])
+# Estadísticas de la caché persistente (compartida entre procesos)
+cache_stats = analysis_cache().stats()
+st.sidebar.markdown("### 💾 Caché de análisis")
+st.sidebar.write(f"Aciertos: {cache_stats['hits']} | Fallos: {cache_stats['misses']}")
+st.sidebar.write(f"Entradas guardadas: {cache_stats['entries']}")
+
+# Protección ante carga de Azure (límite de ritmo, reintentos, circuit breaker)
+client_stats = azure_stats()
+if client_stats:
+    st.sidebar.markdown("### 🛡️ Azure")
+    st.sidebar.write(f"Llamadas: {client_stats['calls']} | Throttles (429): {client_stats['throttled']}")
+    st.sidebar.write(f"Reintentos: {client_stats['retries']} | Espera: {client_stats['wait_seconds']} s")
+    st.sidebar.write(f"Circuito: {client_stats['circuit']} (rechazadas: {client_stats['circuit_rejected']})")
+
+# Estadísticas de casi-duplicados (MinHash/LSH). Solo con el cliente de
+# Azure ya creado: así la primera pantalla no carga numpy ni el índice
+near_stats = dedup_stats() if client_stats else None
+if client_stats and near_stats:
+    st.sidebar.markdown("### 🧬 Casi-duplicados")
+    st.sidebar.write(f"Reutilizados: {near_stats['duplicates']} de {near_stats['queries']} ({near_stats['dedup_rate']:.0%})")
+    st.sidebar.write(f"Registros de Azure ahorrados: {near_stats['text_records_saved']} | Firmas: {near_stats['signatures']}")
+
+# Creamos las pestañas principales (inputs, informe, historial, métricas)
+tab1, tab2, tab3, tab4 = st.tabs(["📝 URL / Texto", "📊 Informe", "🕓 Historial", "🛠️ Admin"])
 
 
 # =====================================================
@@ -28,7 +98,7 @@ tab1, tab2, tab3 = st.tabs(["📝 URL / Texto", "📊 Informe", "🕓 Historial"
 with tab1:
 
     # Selector para elegir si la entrada será texto o URL
-    input_type = st.radio("Tipo de entrada", ["Texto manual", "URL de noticia"])
+    input_type = st.radio("Tipo de entrada", ["Texto manual", "URL de noticia", "Lote de textos / URLs"])
 
     text = ""  # Variable donde almacenaremos el texto final a analizar
 
@@ -38,15 +108,27 @@ with tab1:
     if input_type == "Texto manual":
         text = st.text_area("Escribe o pega la noticia aquí:", height=200)
 
+    # -----------------------------
+    # Entrada tipo: Lote
+    # Una entrada por línea: si empieza por http(s):// se
+    # descarga como URL, si no se analiza como texto.
+    # -----------------------------
+    elif input_type == "Lote de textos / URLs":
+        batch_input = st.text_area("Una noticia o URL por línea:", height=200)
+
     # -----------------------------
     # Entrada tipo: URL
     # -----------------------------
     else:
         url = st.text_input("Introduce la URL:")
 
+        # Artículo completo → sin el límite de 5000 caracteres (se analiza por trozos)
+        full_article = st.checkbox("📜 Extraer el artículo completo")
+        max_chars = FULL_ARTICLE_CHARS if full_article else MAX_CHARS
+
         # Cuando el usuario pulsa "Extraer texto"
         if st.button("Extraer texto") and url.strip():
-            extracted = extract_text_from_url(url)  # Llama a la función que extrae texto de la web
+            extracted = workers.extract_url(url, max_chars)  # Extrae el texto de la web (en el pool, si está activo)
             st.session_state["extracted_text"] = extracted  # Guarda el texto en la sesión
             st.text_area("Texto extraído:", extracted, height=200)
 
@@ -56,70 +138,117 @@ with tab1:
             text = st.session_state["extracted_text"]  # Usamos este texto para análisis
 
     # -----------------------------
-    # Inicialización del historial
+    # Botón para analizar un lote completo
     # -----------------------------
-    if "history" not in st.session_state:
-        st.session_state["history"] = []  # Crea lista vacía si no existe
+    if input_type == "Lote de textos / URLs":
+        entries = [line.strip() for line in batch_input.splitlines() if line.strip()]
+
+        if st.button("Analizar lote") and entries:
+
+            # Descargamos primero todas las URLs en paralelo
+            with st.spinner("🌐 Extrayendo texto de las URLs..."):
+                urls = [e for e in entries if e.startswith(("http://", "https://"))]
+                fetched = {f.url: f for f in workers.fetch_many(urls, MAX_CHARS)}
+
+            # Las descargas fallidas no se analizan: su error va directo a la tabla
+            texts, errors = {}, {}
+            for entry in entries:
+                result = fetched.get(entry)
+                if result is None:
+                    texts[entry] = entry
+                elif result.error or not result.text:
+                    errors[entry] = result.error or "No se encontró texto en la página"
+                else:
+                    texts[entry] = result.text
+
+            # Un único análisis por lotes en Azure para todos los textos
+            analyzed = list(texts.values())
+            with st.spinner(f"🔍 Analizando {len(analyzed)} textos con Azure..."):
+                results = dict(zip(texts, analyze_long_texts(analyzed))) if analyzed else {}
+                heuristics = dict(zip(texts, workers.classify_many(analyzed))) if analyzed else {}
+
+            rows, history = [], []
+            for entry in entries:
+                if entry in errors:
+                    rows.append({"entrada": entry[:80], "error": errors[entry]})
+                    continue
+
+                batch_text, res, heur = texts[entry], results[entry], heuristics[entry]
+                if "error" in res:
+                    rows.append({"entrada": entry[:80], "error": res["error"]})
+                    continue
+
+                report = AnalysisResult.build(batch_text, res, heur)
+                history.append(report.history_entry())
+                rows.append({
+                    "entrada": entry[:80],
+                    "idioma": report.language,
+                    "sentimiento": report.sentiment,
+                    "clasificación": report.classification,
+                    "flags": ", ".join(report.flags),
+                })
+
+            history_store().add_many(history, owner)
+            st.dataframe(rows, use_container_width=True)
+            st.success(f"✅ {len(rows)} entradas procesadas. Revisa el historial.")
 
     # -----------------------------
     # Botón para analizar la noticia
+    # El análisis se encola en segundo plano (jobs.py): el
+    # script no se queda bloqueado esperando a Azure.
     # -----------------------------
-    if st.button("Analizar noticia") and text.strip():
+    elif st.button("Analizar noticia") and text.strip():
+        st.session_state["job_id"] = job_queue().submit(text, owner)
 
-        # Spinner de carga mientras Azure procesa el texto
-        with st.spinner("🔍 Analizando texto con Azure..."):
-            result = analyze_text(text)  # Llamada al servicio de Azure
+    # -----------------------------
+    # Progreso del análisis en segundo plano
+    # Mientras el trabajo no termina, el fragmento se repinta
+    # cada segundo (solo él, no toda la app) y muestra cada
+    # etapa en cuanto Azure la devuelve.
+    # -----------------------------
+    job_id = st.session_state.get("job_id")
+    job = job_queue().get(job_id) if job_id else None
 
-        # Si Azure devuelve un error, lo mostramos
-        if "error" in result:
-            st.error("❌ No se pudo analizar el texto. Revisa tus credenciales o el servicio de Azure.")
+    # Trabajo terminado: su resultado pasa a ser el informe actual
+    if job and job.status == "done" and st.session_state.get("analysis_job") != job_id:
+        st.session_state["analysis"] = job.result
+        st.session_state["analysis_job"] = job_id
 
-        # Si la respuesta es válida, procesamos los datos
-        else:
-            # Aplicamos heurísticas (clickbait, sesgo, clasificación)
-            flags = detect_red_flags(text)
-            classification = classify_article(text)
-
-            # -----------------------------
-            # Procesamos el sentimiento
-            # -----------------------------
-            total_sentences = len(result.get("sentences", []))
-
-            if total_sentences > 0:
-                # Contamos frases por tipo de sentimiento
-                positive_count = sum(1 for _, s in result["sentences"] if s == "positive")
-                neutral_count  = sum(1 for _, s in result["sentences"] if s == "neutral")
-                negative_count = sum(1 for _, s in result["sentences"] if s == "negative")
-
-                # Calculamos porcentajes
-                positive_pct = round((positive_count / total_sentences) * 100, 1)
-                neutral_pct  = round((neutral_count  / total_sentences) * 100, 1)
-                negative_pct = round((negative_count / total_sentences) * 100, 1)
-
-            else:
-                positive_pct = neutral_pct = negative_pct = 0.0
-
-            # -----------------------------
-            # Guardamos datos en session_state
-            # -----------------------------
-            st.session_state["analysis"] = result
-            st.session_state["flags"] = flags
-            st.session_state["classification"] = classification
-
-            # Guardamos un resumen para el historial
-            st.session_state["history"].append({
-                "texto": text[:120] + "...",
-                "idioma": result.get("language", "Desconocido"),
-                "sentimiento": result.get("sentiment", "Desconocido"),
-                "clasificación": classification,
-                "flags": ", ".join(flags),
-                "positive_pct": positive_pct,
-                "neutral_pct": neutral_pct,
-                "negative_pct": negative_pct
-            })
-
-            # Mensaje de éxito
+    STAGE_LABELS = {"language": "🌐 Idioma", "sentiment": "💬 Sentimiento", "summary": "🧩 Resumen"}
+
+    @st.fragment(run_every=None if job is None or job.finished else 1.0)
+    def show_job():
+        job = job_queue().get(job_id) if job_id else None
+        if job is None:
+            return
+
+        if job.finished and st.session_state.get("job_polling"):
+            # Rerun completo: deja de sondear y actualiza el informe
+            st.session_state["job_polling"] = False
+            st.rerun()
+
+        if job.status == "done":
             st.success("✅ Análisis completado. Revisa el informe o el historial.")
+        elif job.status == "error":
+            st.error("❌ No se pudo analizar el texto. Revisa tus credenciales o el servicio de Azure.")
+        else:
+            st.session_state["job_polling"] = True
+            st.info("🔍 Analizando texto con Azure..." if job.status == "running" else "⏳ En cola...")
+
+            # Resultados parciales de cada etapa
+            for stage in STAGES:
+                if stage not in job.stages:
+                    st.write(f"⏳ {STAGE_LABELS[stage]}")
+                    continue
+                value = job.stages[stage]
+                if value is None:
+                    st.write(f"✔️ {STAGE_LABELS[stage]}")
+                elif stage == "sentiment":
+                    st.write(f"✔️ {STAGE_LABELS[stage]}: {value[0]} ({len(value[1])} frases)")
+                else:
+                    st.write(f"✔️ {STAGE_LABELS[stage]}: {value}")
+
+    show_job()
 
 
 # =====================================================
@@ -132,47 +261,51 @@ with tab2:
         st.warning("Primero analiza una noticia en la pestaña anterior.")
 
     else:
-        result = st.session_state["analysis"]  # Recuperamos el análisis guardado
+        report = st.session_state["analysis"]  # Recuperamos el análisis guardado (ya calculado)
 
         st.subheader("📋 Informe de Análisis")
-        st.write(f"**Idioma detectado:** {result['language']}")
-        st.write(f"**Sentimiento global:** {result['sentiment']}")
-        st.write(f"**Clasificación heurística:** {st.session_state['classification']}")
-
-        # Repetimos el cálculo porcentual para mostrarlo en esta pestaña
-        total_sentences = len(result.get("sentences", []))
-
-        if total_sentences > 0:
-            positive_count = sum(1 for _, s in result["sentences"] if s == "positive")
-            neutral_count  = sum(1 for _, s in result["sentences"] if s == "neutral")
-            negative_count = sum(1 for _, s in result["sentences"] if s == "negative")
-
-            positive_pct = round((positive_count / total_sentences) * 100, 1)
-            neutral_pct  = round((neutral_count  / total_sentences) * 100, 1)
-            negative_pct = round((negative_count / total_sentences) * 100, 1)
-
-        else:
-            positive_pct = neutral_pct = negative_pct = 0.0
+        st.write(f"**Idioma detectado:** {report.language}")
+        st.write(f"**Sentimiento global:** {report.sentiment}")
+        st.write(f"**Clasificación heurística:** {report.classification}")
+        if report.classification_probability is not None:
+            st.caption(f"🎯 Confianza de la clasificación: {report.classification_probability:.0%}")
+        if report.backend == "local":
+            st.caption("💻 Analizado con el motor local (sin Azure).")
+        if report.chunks > 1:
+            st.caption(f"📜 Artículo largo analizado en {report.chunks} trozos.")
 
         # Mostramos porcentajes
         st.markdown("### 💯 Distribución de sentimientos en el texto")
-        st.write(f"🟢 **Positivas:** {positive_pct}%")
-        st.write(f"🟡 **Neutras:** {neutral_pct}%")
-        st.write(f"🔴 **Negativas:** {negative_pct}%")
+        st.write(f"🟢 **Positivas:** {report.positive_pct}%")
+        st.write(f"🟡 **Neutras:** {report.neutral_pct}%")
+        st.write(f"🔴 **Negativas:** {report.negative_pct}%")
 
         # Mostramos el resumen generado por Azure
         st.markdown("### 🧩 Resumen")
-        st.info(result["summary"])
+        st.info(report.summary)
 
-        # Mostramos cada frase con su sentimiento correspondiente
+        # Cada frase con su sentimiento correspondiente, en un único bloque
         st.markdown("### 💬 Evidencias de sentimiento")
-        for sentence, sent in result["sentences"]:
-            emoji = "😊" if sent == "positive" else "😐" if sent == "neutral" else "😠"
-            st.write(f"{emoji} *{sent}*: {sentence}")
+        st.markdown(report.evidence)
 
         # Red flags identificadas
         st.markdown("### ⚠️ Red Flags")
-        st.warning(", ".join(st.session_state["flags"]))
+        st.warning(", ".join(report.flags))
+
+        # Tiempos de cada etapa del pipeline de Azure
+        # Sentimiento y resumen se ejecutan en paralelo, por eso el total
+        # debe acercarse a idioma + max(sentimiento, resumen) y no a la suma.
+        if report.timings:
+            timings = report.timings
+            with st.expander("⏱️ Tiempos del análisis"):
+                if timings.get("cache"):
+                    st.write("Resultado reutilizado (caché o noticia casi idéntica): no se ha llamado a Azure.")
+                else:
+                    st.write(f"- Idioma: {timings['language']} s")
+                    st.write(f"- Sentimiento: {timings['sentiment']} s")
+                    st.write(f"- Resumen: {timings['summary']} s")
+                    st.write(f"- **Total:** {timings['total']} s "
+                             f"(secuencial habría sido ~{round(timings['language'] + timings['sentiment'] + timings['summary'], 3)} s)")
 
 
 # =====================================================
@@ -181,9 +314,35 @@ with tab2:
 with tab3:
     st.subheader("🕓 Historial de análisis anteriores")
 
-    # Si hay historial, lo recorremos del más reciente al más antiguo
-    if "history" in st.session_state and st.session_state["history"]:
-        for i, h in enumerate(reversed(st.session_state["history"]), 1):
+    # -----------------------------
+    # Historial paginado y filtrable
+    # Solo se lee de SQLite la página visible. Al ser un
+    # fragmento, cambiar de página o de filtro no vuelve a
+    # ejecutar el resto de la app.
+    # -----------------------------
+    @st.fragment
+    def show_history(page_size=20):
+        store = history_store()
+
+        col1, col2, col3 = st.columns(3)
+        filters = {
+            "idioma": col1.selectbox("Idioma", ["", *store.distinct("idioma", owner)], format_func=lambda v: v or "Todos"),
+            "sentimiento": col2.selectbox("Sentimiento", ["", *store.distinct("sentimiento", owner)], format_func=lambda v: v or "Todos"),
+            "clasificación": col3.selectbox("Clasificación", ["", *store.distinct("clasificación", owner)], format_func=lambda v: v or "Todas"),
+        }
+
+        total = store.count(filters, owner)
+        if not total:
+            st.info("Aún no hay análisis guardados.")
+            return
+
+        pages = (total + page_size - 1) // page_size
+        page = st.number_input(f"Página (de {pages})", min_value=1, max_value=pages, value=1)
+        st.caption(f"{total} análisis guardados")
+
+        # Del más reciente al más antiguo
+        first = (page - 1) * page_size
+        for i, h in enumerate(store.page(page, page_size, filters, owner), first + 1):
             st.markdown(f"**{i}.** 🗞️ *{h['texto']}*")
             st.write(f"- Idioma: {h['idioma']}")
             st.write(f"- Sentimiento global: {h['sentimiento']}")
@@ -192,5 +351,82 @@ with tab3:
             st.write(f"- Red Flags: {h['flags']}")
             st.divider()  # Línea separadora visual entre análisis
 
-    else:
-        st.info("Aún no hay análisis guardados.")
+    show_history()
+
+
+# =====================================================
+# 🛠️ TAB 4 — Métricas internas (admin)
+# Dónde se va el tiempo (descarga, parseo, heurísticas,
+# llamadas a Azure, espera del poller), aciertos de las
+# cachés y registros de texto estimados de Azure.
+# =====================================================
+with tab4:
+    st.subheader("🛠️ Métricas de este proceso")
+
+    stages = metrics.histogram_summary("stage_seconds")
+    if stages:
+        st.markdown("### ⏱️ Etapas")
+        st.markdown(latency_table(stages, "Etapa"))
+
+    azure_calls = metrics.histogram_summary("azure_call_seconds")
+    if azure_calls:
+        st.markdown("### ☁️ Llamadas a Azure")
+        st.markdown(latency_table(azure_calls, "Operación"))
+
+        poller = metrics.histogram_summary("azure_poller_wait_seconds")
+        if poller:
+            st.markdown(latency_table(poller, "Espera del poller (resumen)"))
+
+    records = metrics.counter_values("azure_text_records_total")
+    if records:
+        per_request = {labels["operation"]: mean for labels, _, mean, *_ in metrics.histogram_summary("azure_text_records_per_request")}
+        st.markdown("### 💶 Registros de texto de Azure (estimados)")
+        for labels, value in records:
+            st.write(f"- {labels['operation']}: {value} (media por petición: {per_request.get(labels['operation'], 0):.1f})")
+
+    extractions = metrics.counter_values("extraction_total")
+    if extractions:
+        st.markdown("### 🧾 Extracción de texto")
+        methods = {"profile": "perfil del dominio", "density": "heurística de densidad"}
+        for labels, value in extractions:
+            st.write(f"- {methods.get(labels['method'], labels['method'])}: {value} páginas")
+
+    if workers.pool_size():
+        st.markdown(f"### 🧵 Pool de procesos ({workers.pool_size()} procesos)")
+        tasks = metrics.histogram_summary("worker_task_seconds")
+        if tasks:
+            st.markdown(latency_table(tasks, "Tarea (incluye la cola)"))
+
+    pages = page_cache()
+    page_stats = pages.stats() if pages is not None else None
+    if page_stats and page_stats["requests"]:
+        st.markdown("### 🌐 Caché de páginas (revalidación HTTP)")
+        st.write(f"- Revalidadas con 304: {page_stats['revalidated']} de "
+                 f"{page_stats['revalidated'] + page_stats['modified']} peticiones condicionales "
+                 f"({page_stats['revalidation_rate']:.0%})")
+        st.write(f"- Descargadas: {page_stats['misses'] + page_stats['modified']} | "
+                 f"sin ETag ni Last-Modified: {page_stats['uncacheable']} | "
+                 f"frescas (sin preguntar al servidor): {page_stats['fresh']}")
+        st.write(f"- Bytes ahorrados: {page_stats['bytes_saved'] / 1e6:.1f} MB de "
+                 f"{(page_stats['bytes_saved'] + page_stats['bytes_downloaded']) / 1e6:.1f} MB "
+                 f"| parseos evitados: {page_stats['parses_skipped']}")
+        st.write(f"- En disco: {page_stats['entries']} páginas, {page_stats['stored_bytes'] / 1e6:.1f} MB")
+
+    calls = metrics.counter_values("cache_calls_total")
+    if calls:
+        misses = {tuple(labels.items()): value for labels, value in metrics.counter_values("cache_misses_total")}
+        st.markdown("### 🗃️ Cachés de Streamlit")
+        for labels, value in calls:
+            hits = value - misses.get(tuple(labels.items()), 0)
+            st.write(f"- `{labels['function']}` ({labels['cache']}): {hits}/{value} aciertos ({hits / value:.0%})")
+
+    if not (stages or azure_calls or calls):
+        st.info("Aún no hay métricas: analiza alguna noticia.")
+
+    # Exportación en formato Prometheus
+    prometheus_text = metrics.REGISTRY.render()
+    st.download_button("⬇️ Descargar métricas (Prometheus)", prometheus_text, file_name="metrics.prom", mime="text/plain")
+    if os.getenv("METRICS_FILE") and st.button("💾 Guardar en METRICS_FILE"):
+        st.success(f"Métricas guardadas en {metrics.write_metrics()}")
+    with st.expander("Ver en formato Prometheus"):
+        st.code(prometheus_text, language="text")
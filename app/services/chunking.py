@@ -0,0 +1,155 @@
+import re
+
+from app.services.language import analyze_texts
+
+# --------------------------------------------------------
+# Tamaño máximo de cada trozo.
+# El análisis de sentimiento síncrono de Azure admite hasta
+# 5120 caracteres por documento; dejamos margen.
+# --------------------------------------------------------
+CHUNK_CHARS = 5000
+
+# Número de frases del resumen final (igual que analyze_text)
+SUMMARY_SENTENCES = 3
+
+# Confianza ponderada mínima de positivo Y de negativo para que el
+# artículo completo sea "mixed"
+MIXED_THRESHOLD = 0.3
+
+# Fin de frase: . ! ? … (y comillas/paréntesis de cierre) seguido de espacio,
+# o uno o más saltos de línea.
+_SENTENCE_END = re.compile(r"(?<=[.!?…][\"'»”)])\s+|(?<=[.!?…])\s+|\n+")
+
+
+def split_sentences(text):
+    """Divide un texto en frases (sin perder ningún carácter significativo)."""
+    return [s for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+# --------------------------------------------------------
+# chunk_text()
+# Agrupa frases consecutivas en trozos de como máximo
+# `max_chars` caracteres, sin partir ninguna frase.
+# Si una frase sola ya supera el límite, se corta por
+# espacios (y en último caso, a ciegas).
+# --------------------------------------------------------
+def chunk_text(text, max_chars=CHUNK_CHARS):
+    """Divide un texto largo en trozos que caben en los límites de Azure."""
+    chunks, current = [], ""
+
+    for sentence in split_sentences(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# --------------------------------------------------------
+# merge_results()
+# Combina los resultados de los trozos de un mismo artículo:
+#   - idioma: el de más caracteres
+#   - frases: concatenadas en orden
+#   - sentimiento global: media de las confianzas de cada trozo
+#     ponderada por su longitud (el trozo largo pesa más). Como
+#     en Azure, es "mixed" si hay trozos positivos y negativos
+#     (o alguno ya es mixed), o si las confianzas ponderadas de
+#     positivo y de negativo superan MIXED_THRESHOLD
+#   - resumen: las frases con más relevancia de TODOS los
+#     trozos, presentadas en el orden en que aparecen
+# --------------------------------------------------------
+def merge_results(chunks, results):
+    """Une los resultados de los trozos de un artículo en uno solo."""
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        return {"error": errors[0]}
+
+    if len(results) == 1:
+        return results[0]
+
+    weights = [len(c) for c in chunks]
+    total = sum(weights)
+
+    # Idioma predominante (por número de caracteres)
+    by_language = {}
+    for w, r in zip(weights, results):
+        by_language[r["language"]] = by_language.get(r["language"], 0) + w
+    language = max(by_language, key=by_language.get)
+
+    # Sentimiento global ponderado. Si un resultado no trae confianzas
+    # (por ejemplo, de una caché antigua) se usa su etiqueta con peso 1.
+    scores = {"positive": 0.0, "neutral": 0.0, "negative": 0.0}
+    for w, r in zip(weights, results):
+        chunk_scores = r.get("scores") or {k: float(k == r["sentiment"]) for k in scores}
+        for label in scores:
+            scores[label] += chunk_scores.get(label, 0.0) * w / total
+    labels = {r["sentiment"] for r in results}
+    if "mixed" in labels or {"positive", "negative"} <= labels or \
+            min(scores["positive"], scores["negative"]) >= MIXED_THRESHOLD:
+        sentiment = "mixed"
+    else:
+        sentiment = max(scores, key=scores.get)
+
+    # Resumen: mejores frases entre todos los trozos, en orden de aparición
+    ranked = [
+        (score, i, offset, sentence)
+        for i, r in enumerate(results)
+        for sentence, score, offset in r.get("summary_ranked", [])
+    ]
+    best = sorted(ranked, key=lambda x: -x[0])[:SUMMARY_SENTENCES]
+    summary_sentences = [sentence for _, _, _, sentence in sorted(best, key=lambda x: (x[1], x[2]))]
+
+    timings = [r["timings"] for r in results if r.get("timings")]
+
+    return {
+        "language": language,
+        "sentiment": sentiment,
+        "summary": " ".join(summary_sentences) if summary_sentences else "No se pudo generar resumen.",
+        "sentences": [s for r in results for s in r["sentences"]],
+        "scores": {k: round(v, 4) for k, v in scores.items()},
+        "summary_ranked": [(s, score, offset) for score, _, offset, s in best],
+        # Tiempos de la llamada a Azure, si algún trozo no venía de la caché
+        "timings": next((t for t in timings if not t.get("cache")), timings[0] if timings else None),
+        "chunks": len(chunks),
+    }
+
+
+# --------------------------------------------------------
+# analyze_long_texts()
+# Análisis de artículos de cualquier longitud.
+#
+# Todos los trozos de todos los artículos se envían juntos a
+# analyze_texts(), que los empaqueta en lotes y lanza en
+# paralelo las llamadas de sentimiento y resumen. Así un
+# artículo de 10 trozos tarda casi lo mismo que uno de un
+# solo trozo, en lugar de 10 veces más.
+# --------------------------------------------------------
+def analyze_long_texts(texts, max_chars=CHUNK_CHARS):
+    """Analiza textos largos troceándolos y uniendo los resultados por artículo."""
+    # Los textos que ya caben se envían tal cual, sin trocear
+    pieces = [[t] if len(t) <= max_chars else chunk_text(t, max_chars) for t in texts]
+    flat = [c for chunks in pieces for c in chunks]
+    results = analyze_texts(flat) if flat else []
+
+    merged, pos = [], 0
+    for chunks in pieces:
+        merged.append(merge_results(chunks, results[pos:pos + len(chunks)]))
+        pos += len(chunks)
+    return merged
+
+
+def analyze_long_text(text, max_chars=CHUNK_CHARS):
+    """Versión de un solo texto de analyze_long_texts()."""
+    return analyze_long_texts([text], max_chars)[0]
@@ -0,0 +1,285 @@
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+from app.utils.metrics import azure_text_records
+from app.utils.runtime import cache_resource, get_secret
+
+# --------------------------------------------------------
+# Detección de casi-duplicados (shingles + MinHash + LSH)
+#
+# Una misma noticia de agencia aparece en decenas de medios con
+# pequeños cambios (titular, firma, un párrafo más). La caché
+# exacta no las reconoce y pagamos Azure por cada copia.
+#
+#   1️⃣ Shingles: conjuntos de n palabras consecutivas del texto
+#   2️⃣ MinHash: firma de `num_perm` enteros; la fracción de
+#      posiciones iguales entre dos firmas estima la similitud
+#      de Jaccard entre sus conjuntos de shingles
+#   3️⃣ LSH: la firma se divide en `bands` bandas; dos textos
+#      son candidatos si coinciden en alguna banda completa.
+#      Así no hay que comparar con todos los textos guardados.
+#
+# El índice vive en SQLite (modo WAL), como las demás cachés
+# compartidas: todos los procesos y réplicas leen y escriben el
+# mismo fichero, sin que uno pise las altas de otro.
+#   - signatures: clave de la caché de análisis + firma (uint32,
+#     256 bytes con 64 permutaciones)
+#   - buckets: (banda, hash de la banda) → id de la firma, con
+#     índice para buscar las cubetas de una firma
+#
+# Cada cubeta guarda los `bucket_size` textos más recientes: una
+# noticia nueva desplaza a las antiguas, cuyo resultado en la
+# caché de análisis caduca antes. Las claves que ya no están en
+# la caché se borran al encontrarlas (discard()) y el índice se
+# acota a `max_entries` firmas (se borran las más antiguas).
+# --------------------------------------------------------
+
+# Primo para las funciones hash (a·x + b) mod p. Con x (crc32), a y b
+# menores que 2^32, a·x + b < 2^64: el cálculo en uint64 es exacto.
+_PRIME = (1 << 32) - 5
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text, size=5):
+    """Conjunto de shingles (n-gramas de palabras) de un texto normalizado."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHashIndex:
+    """Índice LSH de firmas MinHash para encontrar textos casi duplicados."""
+
+    # Cada cuántas altas se comprueba si hay que borrar firmas antiguas
+    PRUNE_EVERY = 100
+
+    def __init__(self, num_perm=64, bands=8, threshold=0.8, shingle_size=5,
+                 min_words=20, path=None, max_entries=200_000, bucket_size=4, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.path = path
+        self.max_entries = max_entries
+        self.bucket_size = bucket_size
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        # Multiplicadores para resumir cada banda en un único entero de 64 bits
+        self._band_mult = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.counters = {"queries": 0, "duplicates": 0, "text_records_saved": 0}
+
+        # Sin path: índice en memoria (una conexión compartida, protegida por _lock)
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._memory = None
+        else:
+            self._memory = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+        self._create_tables()
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no permite compartirlas entre hilos)."""
+        if self._memory is not None:
+            return self._memory
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_tables(self):
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL UNIQUE,"
+            " signature BLOB NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " band INTEGER NOT NULL, hash INTEGER NOT NULL, id INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets ON buckets(band, hash, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_id ON buckets(id)")
+
+        # Firmas calculadas con otra configuración u otras funciones hash: se descartan
+        params = np.concatenate([self._a, self._b, self._band_mult]).tobytes()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM meta WHERE name = 'hash_params'").fetchone()
+            if row is None or bytes(row[0]) != params:
+                conn.execute("DELETE FROM signatures")
+                conn.execute("DELETE FROM buckets")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('hash_params', ?)", (params,))
+
+    def empty_like(self):
+        """Índice vacío en memoria con la misma configuración (y las mismas funciones hash)."""
+        return MinHashIndex(self.num_perm, self.bands, self.threshold, self.shingle_size, self.min_words,
+                            bucket_size=self.bucket_size, seed=self.seed)
+
+    # -----------------------------
+    # Firmas
+    # -----------------------------
+    def signature(self, text):
+        """Firma MinHash del texto, o None si es demasiado corto para compararlo."""
+        if len(_WORD_RE.findall(text)) < self.min_words:
+            return None
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles(text, self.shingle_size)),
+            dtype=np.uint64,
+        )
+        # (n_shingles × num_perm) valores hash → mínimo por permutación
+        values = (np.outer(hashes, self._a) + self._b) % np.uint64(_PRIME)
+        return values.min(axis=0).astype(np.uint32)
+
+    def _band_hashes(self, signature):
+        bands = signature.astype(np.uint64).reshape(self.bands, self.rows)
+        # El desbordamiento de uint64 es intencionado; int64 para guardarlo en SQLite
+        return (bands * self._band_mult).sum(axis=1).view(np.int64).tolist()
+
+    # -----------------------------
+    # Búsqueda y altas
+    # -----------------------------
+    def query(self, signature):
+        """[(clave, similitud)] de los textos por encima del umbral, del más parecido al menos.
+
+        A igual similitud va antes el más reciente.
+        """
+        with self._lock:
+            self.counters["queries"] += 1
+            conn = self._conn()
+            candidates = set()
+            for band, h in enumerate(self._band_hashes(signature)):
+                rows = conn.execute(
+                    "SELECT id FROM buckets WHERE band = ? AND hash = ? ORDER BY id DESC LIMIT ?",
+                    (band, h, self.bucket_size),
+                ).fetchall()
+                candidates.update(r[0] for r in rows)
+
+            if not candidates:
+                return []
+
+            rows = conn.execute(
+                f"SELECT id, key, signature FROM signatures WHERE id IN ({','.join('?' * len(candidates))})",
+                list(candidates),
+            ).fetchall()
+
+        matches = []
+        for doc_id, key, blob in rows:
+            similarity = float((np.frombuffer(blob, dtype=np.uint32) == signature).mean())
+            if similarity >= self.threshold:
+                matches.append((similarity, doc_id, key))
+        matches.sort(reverse=True)
+        return [(key, similarity) for similarity, _, key in matches]
+
+    def add(self, signature, key):
+        """Añade (o renueva) la firma asociada a una clave de la caché de análisis."""
+        with self._lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._delete(conn, "key = ?", (key,))
+                doc_id = conn.execute(
+                    "INSERT INTO signatures (key, signature) VALUES (?, ?)",
+                    (key, np.asarray(signature, dtype=np.uint32).tobytes()),
+                ).lastrowid
+                for band, h in enumerate(self._band_hashes(signature)):
+                    conn.execute("INSERT INTO buckets VALUES (?, ?, ?)", (band, h, doc_id))
+                    # Solo los bucket_size textos más recientes de cada cubeta
+                    conn.execute(
+                        "DELETE FROM buckets WHERE band = ? AND hash = ? AND id NOT IN"
+                        " (SELECT id FROM buckets WHERE band = ? AND hash = ? ORDER BY id DESC LIMIT ?)",
+                        (band, h, band, h, self.bucket_size),
+                    )
+
+            self._writes += 1
+            if self._writes >= self.PRUNE_EVERY:
+                self._writes = 0
+                self._prune(conn)
+
+    def discard(self, key):
+        """Borra la firma de una clave cuyo resultado ya no está en la caché de análisis."""
+        with self._lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._delete(conn, "key = ?", (key,))
+
+    @staticmethod
+    def _delete(conn, where, params):
+        conn.execute(f"DELETE FROM buckets WHERE id IN (SELECT id FROM signatures WHERE {where})", params)
+        conn.execute(f"DELETE FROM signatures WHERE {where}", params)
+
+    def _prune(self, conn):
+        """Borra las firmas más antiguas si se supera max_entries."""
+        cutoff = conn.execute(
+            "SELECT id FROM signatures ORDER BY id DESC LIMIT 1 OFFSET ?", (self.max_entries,)
+        ).fetchone()
+        if cutoff:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._delete(conn, "id <= ?", (cutoff[0],))
+
+    def record_reuse(self, text):
+        """Cuenta un texto resuelto por casi-duplicado (registros de Azure ahorrados)."""
+        with self._lock:
+            self.counters["duplicates"] += 1
+            # Azure factura 1 registro por cada 1000 caracteres y por cada
+            # operación (idioma, sentimiento y resumen)
+            self.counters["text_records_saved"] += 3 * azure_text_records([text])
+
+    # -----------------------------
+    # Estadísticas
+    # -----------------------------
+    def __len__(self):
+        with self._lock:
+            return self._conn().execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["signatures"] = len(self)
+        stats["dedup_rate"] = round(stats["duplicates"] / stats["queries"], 4) if stats["queries"] else 0.0
+        return stats
+
+
+# --------------------------------------------------------
+# dedup_index()
+# Índice único por proceso. Configuración:
+#   DEDUP_ENABLED     → "0" para desactivarlo
+#   DEDUP_THRESHOLD   → similitud mínima para reutilizar (0.8)
+#   DEDUP_INDEX_PATH  → fichero SQLite del índice (compartido
+#                       entre procesos, como ANALYSIS_CACHE_PATH)
+#   DEDUP_MAX_ENTRIES → máximo de firmas guardadas
+# --------------------------------------------------------
+@cache_resource(show_spinner=False)
+def dedup_index():
+    if get_secret("DEDUP_ENABLED", "1") == "0":
+        return None
+    return MinHashIndex(
+        threshold=float(get_secret("DEDUP_THRESHOLD", "0.8")),
+        path=get_secret("DEDUP_INDEX_PATH", os.path.join(".cache", "dedup.sqlite3")),
+        max_entries=int(get_secret("DEDUP_MAX_ENTRIES", "200000")),
+    )
@@ -1,4 +1,14 @@
+import json
+import logging
+import math
 import re
+from collections import namedtuple
+from itertools import product
+
+from app.utils.metrics import instrumented
+from app.utils.runtime import get_secret
+
+logger = logging.getLogger("app")
 
 # -----------------------------
 # 1. LISTAS AMPLIADAS DE PATRONES
@@ -40,53 +50,384 @@ SATIRE_CUES = [
 # Indicadores fuertes de falsedad o desinformación
 FAKE_NEWS_CUES = [
     "fake", "engaño", "mentira", "falso", "desinformación", "hoax",
-    "estafa", "conspiración", "bulo", "manipulado", "inventado",
+    "estafa", "conspiración", "bulo", "manipulado", "inventado", "falsa",
     # verbos comunes en bulos
     "difunden", "circula un rumor", "cadena de whatsapp"
 ]
 
 # -----------------------------
-# 2. DETECTOR DE RED FLAGS
+# 2. MATCHER COMPILADO (UNA SOLA PASADA)
 # -----------------------------
+#
+# En lugar de lanzar un re.search por cada patrón de cada lista,
+# todas las listas se compilan UNA vez en una única expresión
+# regular con forma de trie (los prefijos comunes se comparten:
+# "alerta|alucinante|asombroso" → "a(?:l(?:erta|ucinante)|sombroso)").
+# Así el texto se recorre una sola vez y se obtienen a la vez
+# todas las categorías, qué pista ha saltado y en qué posición.
+#
+# Los patrones de clickbait solo usan clases de caracteres tipo
+# [aá], que se expanden a sus variantes literales ("creerás",
+# "creeras"). Cada literal recuerda a qué pista original y a qué
+# categorías pertenece.
+#
+# Todas las pistas son palabras completas: "bulo" no salta en
+# "nebulosa" ni "urgente" en "insurgentes". Solo se admite detrás
+# un plural (PLURAL_SUFFIXES): "bulos", "virales".
 
-def detect_red_flags(text: str):
-    """Detecta señales de clickbait o sesgo emocional usando listas ampliadas."""
+# Categoría → (lista de pistas, ¿es regex?)
+CUE_CATEGORIES = {
+    "clickbait": (CLICKBAIT_PATTERNS, True),
+    "sesgo": (BIAS_WORDS, False),
+    "satira": (SATIRE_CUES, False),
+    "fake_news": (FAKE_NEWS_CUES, False),
+}
+
+PLURAL_SUFFIXES = ("es", "s")
+
+# Coincidencia encontrada: categoría, pista original y posición [start, end)
+CueMatch = namedtuple("CueMatch", ["category", "cue", "start", "end"])
+
+
+def _expand_pattern(pattern):
+    """Expande las clases [xy] de un patrón a todas sus variantes literales."""
+    parts = re.findall(r"\[[^\]]+\]|.", pattern)
+    options = [list(p[1:-1]) if p.startswith("[") else [p] for p in parts]
+    return ["".join(chars) for chars in product(*options)]
+
+
+def _trie_regex(literals):
+    """Construye una regex con forma de trie que reconoce todos los literales."""
+    trie = {}
+    for word in literals:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        is_end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        # "?" es voraz: primero intenta el literal más largo
+        return group + "?" if is_end else group
+
+    return build(trie)
+
+
+def _compile_cues():
+    """Compila todas las listas en un único matcher."""
+    # literal → [(categoría, pista original)]
+    literals = {}
+    for category, (cues, is_regex) in CUE_CATEGORIES.items():
+        for cue in cues:
+            for literal in (_expand_pattern(cue) if is_regex else [cue]):
+                literals.setdefault(literal.lower(), []).append((category, cue))
+
+    # La regex devuelve el literal más largo en cada posición; guardamos
+    # también los literales más cortos que empiezan igual para no perderlos.
+    prefixes = {
+        literal: [other for other in literals if literal.startswith(other)]
+        for literal in literals
+    }
+
+    # (?<!\w): solo se prueba el trie al principio de una palabra
+    pattern = r"(?<!\w)(?:" + _trie_regex(literals) + ")"
+    return literals, prefixes, re.compile(pattern), re.compile(pattern, re.IGNORECASE)
+
+
+_CUE_LITERALS, _CUE_PREFIXES, _CUE_RE, _CUE_RE_IGNORECASE = _compile_cues()
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _token_end(text, end):
+    """Fin del token si la pista termina en límite de palabra (admitiendo plural); si no, None."""
+    if end >= len(text) or not _is_word_char(text[end]):
+        return end
+    for suffix in PLURAL_SUFFIXES:
+        stop = end + len(suffix)
+        if text[end:stop].lower() == suffix and (stop >= len(text) or not _is_word_char(text[stop])):
+            return stop
+    return None
+
+
+def find_cues(text: str):
+    """Devuelve todas las pistas (CueMatch) encontradas en una sola pasada."""
+
+    # Buscar sobre el texto en minúsculas es más rápido que IGNORECASE.
+    # Si lower() cambia la longitud (casos Unicode raros) usamos IGNORECASE
+    # para que las posiciones sigan siendo las del texto original.
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        pattern, haystack = _CUE_RE, lowered
+    else:
+        pattern, haystack = _CUE_RE_IGNORECASE, text
+
+    matches = []
+    pos = 0
+    while True:
+        m = pattern.search(haystack, pos)
+        if m is None:
+            break
+
+        start = m.start()
+        for literal in _CUE_PREFIXES[m.group().lower()]:
+            end = _token_end(text, start + len(literal))
+            if end is None:
+                continue  # La pista es solo el principio de otra palabra
+            for category, cue in _CUE_LITERALS[literal]:
+                matches.append(CueMatch(category, cue, start, end))
+
+        # Avanzamos un solo carácter para detectar también pistas solapadas
+        pos = start + 1
+
+    return matches
+
+
+# -----------------------------
+# 3. DETECTOR DE RED FLAGS
+# -----------------------------
+
+def _flags_from_categories(categories):
     flags = []
 
     # Detectar clickbait usando patrones amplios y robustos
-    for pat in CLICKBAIT_PATTERNS:
-        if re.search(pat, text, re.IGNORECASE):
-            flags.append("Posible clickbait")
-            break
+    if "clickbait" in categories:
+        flags.append("Posible clickbait")
 
     # Detectar lenguaje sesgado
-    for word in BIAS_WORDS:
-        if re.search(rf"\b{word}\b", text, re.IGNORECASE):
-            flags.append("Lenguaje sesgado o emocional")
-            break
+    if "sesgo" in categories:
+        flags.append("Lenguaje sesgado o emocional")
 
     return flags or ["Sin señales de manipulación detectadas"]
 
+
+@instrumented("red_flags")
+def detect_red_flags(text: str):
+    """Detecta señales de clickbait o sesgo emocional usando listas ampliadas."""
+    return _flags_from_categories({m.category for m in find_cues(text)})
+
 # -----------------------------
-# 3. CLASIFICADOR DE FIABILIDAD
+# 4. CLASIFICADOR PUNTUADO
 # -----------------------------
+#
+# Cada texto se resume en un rasgo por categoría de pistas:
+#   log(1 + nº de pistas, cada una con su peso en CUE_WEIGHTS)
+# Cada clase puntúa  z = CLASS_BIAS[clase] + Σ CLASS_WEIGHTS[clase][rasgo] · rasgo
+# y softmax convierte las puntuaciones en probabilidades.
+#
+# Con los pesos por defecto una sola pista fuerte decide la clase
+# y, a igualdad, se mantiene la prioridad de siempre (sátira >
+# bulo > clickbait); pero ahora tres pistas de bulo pesan más que
+# una broma suelta, y la probabilidad sirve para ordenar miles de
+# artículos.
+#
+# Los pesos se pueden cambiar sin tocar el código con un JSON en
+# HEURISTICS_WEIGHTS_PATH:
+#   {"bias": {"fake_news": -2}, "weights": {"fake_news": {"sesgo": 1}}, "cue_weights": {"viral": 0.2}}
+
+CLASSES = ("satira", "fake_news", "clickbait", "informativo")
+
+CLASS_LABELS = {
+    "satira": "Sátira o contenido humorístico",
+    "fake_news": "Posible fake news o desinformación",
+    "clickbait": "Contenido informativo con fuerte clickbait",
+    "informativo": "Informativo o neutral",
+}
+
+FEATURES = tuple(CUE_CATEGORIES)
+
+CLASS_BIAS = {"satira": -1.5, "fake_news": -1.5, "clickbait": -1.2, "informativo": 0.0}
+
+CLASS_WEIGHTS = {
+    "satira": {"satira": 4.0},
+    "fake_news": {"fake_news": 3.5, "sesgo": 0.5},
+    "clickbait": {"clickbait": 2.5, "sesgo": 0.3},
+    "informativo": {},
+}
+
+# Pistas débiles (frecuentes también en noticias normales): cuentan menos
+CUE_WEIGHTS = {
+    "alerta": 0.5, "urgente": 0.5, "viral": 0.5, "última hora": 0.5, "así fue": 0.5,
+    "humor": 0.5, "ironía": 0.5, "difunden": 0.5, "manipulado": 0.7,
+}
+
+# Resultado completo de las heurísticas de un texto
+HeuristicsResult = namedtuple("HeuristicsResult", ["flags", "classification", "probability"])
+
+
+def load_weights(path):
+    """Sustituye pesos del clasificador con los de un JSON {"bias", "weights", "cue_weights"}."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    unknown = (set(config.get("bias", {})) | set(config.get("weights", {}))) - set(CLASSES)
+    if unknown:
+        raise ValueError(f"Clases desconocidas: {sorted(unknown)}")
+    CLASS_BIAS.update(config.get("bias", {}))
+    for category, weights in config.get("weights", {}).items():
+        CLASS_WEIGHTS[category].update(weights)
+    CUE_WEIGHTS.update(config.get("cue_weights", {}))
 
+
+_weights_path = get_secret("HEURISTICS_WEIGHTS_PATH")
+if _weights_path:
+    try:
+        load_weights(_weights_path)
+    except (OSError, ValueError) as e:
+        logger.warning("No se pudieron cargar los pesos de %s: %s", _weights_path, e)
+
+
+def _probabilities(counts):
+    """Softmax de las puntuaciones de cada clase a partir de las pistas ponderadas por rasgo."""
+    features = {f: math.log1p(counts.get(f, 0.0)) for f in FEATURES}
+    logits = [CLASS_BIAS[c] + sum(w * features[f] for f, w in CLASS_WEIGHTS[c].items()) for c in CLASSES]
+    top = max(logits)
+    exps = [math.exp(z - top) for z in logits]
+    total = sum(exps)
+    return {c: e / total for c, e in zip(CLASSES, exps)}
+
+
+def score_matches(matches):
+    """Probabilidad de cada clase (CLASSES) a partir de las pistas encontradas."""
+    counts = {}
+    for m in matches:
+        counts[m.category] = counts.get(m.category, 0.0) + CUE_WEIGHTS.get(m.cue, 1.0)
+    return _probabilities(counts)
+
+
+def score_article(text: str):
+    """Probabilidad de cada clase (CLASSES) para un texto."""
+    return score_matches(find_cues(text))
+
+
+@instrumented("classification")
 def classify_article(text: str):
     """
-    Clasificación heurística mejorada:
+    Clasificación heurística puntuada:
     - Sátira: palabras clave de humor/parodia.
     - Fake news: patrones comunes de bulos y desinformación.
-    - Informativo: si no se detecta nada anómalo.
+    - Clickbait: titulares sensacionalistas.
+    - Informativo: si ninguna clase puntúa más.
     """
-    t = text.lower()
+    probabilities = score_article(text)
+    return CLASS_LABELS[max(probabilities, key=probabilities.get)]
+
+
+@instrumented("heuristics")
+def analyze_heuristics(text: str):
+    """Red flags, clasificación y su probabilidad a partir de una única pasada sobre el texto."""
+    matches = find_cues(text)
+    probabilities = score_matches(matches)
+    best = max(probabilities, key=probabilities.get)
+    return HeuristicsResult(
+        _flags_from_categories({m.category for m in matches}), CLASS_LABELS[best], probabilities[best],
+    )
+
+
+def run_heuristics(text: str):
+    """Red flags y clasificación a partir de una única pasada sobre el texto."""
+    flags, classification, _ = analyze_heuristics(text)
+    return flags, classification
+
+
+# -----------------------------
+# 5. PUNTUACIÓN DE UN CORPUS (NumPy)
+# -----------------------------
+#
+# Para miles de artículos (CLI por lotes, evaluación):
+#   1. los textos se unen con un separador y el matcher recorre
+#      todo el bloque en una sola pasada
+#   2. cada pista se asigna a su documento por su posición
+#      (searchsorted sobre los desplazamientos) y se acumula en la
+#      matriz documento-término (documentos × pistas)
+#   3. rasgos, puntuaciones y softmax son productos de matrices
+#      sobre todo el corpus a la vez
+# Da las mismas probabilidades que score_article() texto a texto.
+
+# Términos (columnas de la matriz): cada pista original de cada categoría
+TERMS = sorted({entry for entries in _CUE_LITERALS.values() for entry in entries})
+_TERM_INDEX = {term: i for i, term in enumerate(TERMS)}
+
+# Separador entre documentos: no es carácter de palabra ni aparece en ninguna pista
+_DOC_SEPARATOR = "\n\n"
+
+# Caracteres por bloque de textos unidos (acota la memoria)
+CORPUS_BLOCK_CHARS = 8_000_000
+
+# Puntuación de un corpus: probabilidades (documentos × CLASSES) y
+# nº de pistas sin ponderar (documentos × FEATURES)
+CorpusScores = namedtuple("CorpusScores", ["probabilities", "counts"])
+
+
+def _corpus_blocks(texts):
+    start, size = 0, 0
+    for i, text in enumerate(texts):
+        size += len(text)
+        if size >= CORPUS_BLOCK_CHARS:
+            yield start, i + 1
+            start, size = i + 1, 0
+    if start < len(texts):
+        yield start, len(texts)
+
+
+def document_term_matrix(texts):
+    """Matriz (documentos × TERMS) con cuántas veces aparece cada pista en cada texto."""
+    import numpy as np
+
+    matrix = np.zeros((len(texts), len(TERMS)), dtype=np.int32)
+    for start, stop in _corpus_blocks(texts):
+        block = texts[start:stop]
+        offsets = np.cumsum([0] + [len(t) + len(_DOC_SEPARATOR) for t in block[:-1]])
+        matches = find_cues(_DOC_SEPARATOR.join(block))
+        if not matches:
+            continue
+        positions = np.fromiter((m.start for m in matches), dtype=np.int64, count=len(matches))
+        terms = np.fromiter((_TERM_INDEX[m.category, m.cue] for m in matches), dtype=np.int64, count=len(matches))
+        docs = start + np.searchsorted(offsets, positions, side="right") - 1
+        np.add.at(matrix, (docs, terms), 1)
+    return matrix
+
+
+def score_texts(texts):
+    """Puntúa muchos textos a la vez (ver CorpusScores)."""
+    import numpy as np
+
+    matrix = document_term_matrix(list(texts))
+    categories = np.array([FEATURES.index(category) for category, _ in TERMS])
+    cue_weights = np.array([CUE_WEIGHTS.get(cue, 1.0) for _, cue in TERMS])
 
-    if any(w in t for w in SATIRE_CUES):
-        return "Sátira o contenido humorístico"
+    # Términos → rasgos: una columna por categoría (con y sin el peso de cada pista)
+    membership = np.zeros((len(TERMS), len(FEATURES)))
+    membership[np.arange(len(TERMS)), categories] = 1.0
+    counts = matrix @ membership
+    weighted = matrix @ (membership * cue_weights[:, None])
 
-    if any(w in t for w in FAKE_NEWS_CUES):
-        return "Posible fake news o desinformación"
+    weights = np.array([[CLASS_WEIGHTS[c].get(f, 0.0) for f in FEATURES] for c in CLASSES])
+    bias = np.array([CLASS_BIAS[c] for c in CLASSES])
+    logits = np.log1p(weighted) @ weights.T + bias
+    logits -= logits.max(axis=1, keepdims=True)
+    probabilities = np.exp(logits)
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    return CorpusScores(probabilities, counts)
 
-    if any(re.search(pat, t) for pat in CLICKBAIT_PATTERNS):
-        return "Contenido informativo con fuerte clickbait"
 
-    return "Informativo o neutral"
+@instrumented("heuristics_batch")
+def classify_texts(texts):
+    """HeuristicsResult de cada texto, puntuando todo el corpus de una vez."""
+    scores = score_texts(texts)
+    best = scores.probabilities.argmax(axis=1)
+    return [
+        HeuristicsResult(
+            _flags_from_categories({f for f, n in zip(FEATURES, counts) if n}),
+            CLASS_LABELS[CLASSES[b]],
+            float(probabilities[b]),
+        )
+        for b, probabilities, counts in zip(best, scores.probabilities, scores.counts)
+    ]
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+from app.services import workers
+from app.services.chunking import CHUNK_CHARS, analyze_long_text
+from app.services.language import analyze_texts, stage_progress
+from app.services.report import AnalysisResult
+from app.utils.history import history_store
+from app.utils.runtime import cache_resource
+
+# Etapas del análisis, en el orden en que se muestran
+STAGES = ("language", "sentiment", "summary")
+
+
+@dataclass(slots=True)
+class Job:
+    """Estado de un trabajo de análisis en segundo plano."""
+
+    id: str
+    text: str
+    owner: str | None = None        # sesión que lo pidió (su historial, ver history.py)
+    status: str = "queued"          # queued → running → done | error
+    stages: dict = field(default_factory=dict)  # etapa → valor parcial (o None si no hay)
+    result: AnalysisResult | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "error")
+
+
+# --------------------------------------------------------
+# JobQueue
+# Cola de análisis en segundo plano dentro del proceso.
+#
+# El botón de la app ya no espera a Azure (ni al poller del
+# resumen): encola el texto, recibe un id y pinta el progreso
+# consultando get(id) cada segundo. Un pool de `workers` hilos
+# ejecuta los trabajos y va guardando:
+#   - el valor de cada etapa en cuanto termina (idioma,
+#     sentimiento, resumen), vía stage_progress()
+#   - el AnalysisResult final, o el error
+# Las heurísticas se calculan mientras se espera a Azure (en el
+# pool de procesos en el modo multiproceso, ver workers.py).
+# Los errores llegan a la sesión solo por job.error: los hilos
+# del pool no pintan nada en pantalla (ver notify_error()).
+#
+# Solo se conservan los últimos `max_jobs` trabajos terminados,
+# así la memoria no crece con el uso.
+# --------------------------------------------------------
+class JobQueue:
+    def __init__(self, workers=4, max_jobs=1000):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, text, owner=None):
+        """Encola el análisis de un texto (de la sesión `owner`) y devuelve el id del trabajo."""
+        job = Job(id=uuid.uuid4().hex, text=text, owner=owner)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def get(self, job_id):
+        """Copia del estado actual del trabajo, o None si no existe (o ya se descartó)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job, stages=dict(job.stages)) if job else None
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ("queued", "running", "done", "error")}
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def _update(self, job, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+
+    def _run(self, job):
+        self._update(job, status="running")
+
+        def on_stage(stage, values):
+            # Un artículo largo se envía en varios trozos: solo se marca la etapa
+            with self._lock:
+                job.stages[stage] = values[0] if len(values) == 1 else None
+
+        try:
+            # Heurísticas en paralelo con Azure (en el pool de procesos, si está activo)
+            heuristics = workers.heuristics(job.text)
+
+            # Sin st.cache_data (analyze_text): este hilo no tiene el contexto
+            # de ninguna sesión. La caché persistente evita repetir llamadas.
+            with stage_progress(on_stage):
+                if len(job.text) <= CHUNK_CHARS:
+                    result = analyze_texts([job.text])[0]
+                else:
+                    result = analyze_long_text(job.text)
+
+            if "error" in result:
+                self._update(job, status="error", error=str(result["error"]), finished_at=time.time())
+                return
+
+            report = AnalysisResult.build(job.text, result, workers.wait(heuristics))
+            history_store().add(report.history_entry(), job.owner)
+            self._update(job, status="done", result=report, finished_at=time.time())
+
+        except Exception as e:
+            self._update(job, status="error", error=str(e), finished_at=time.time())
+
+
+# --------------------------------------------------------
+# job_queue()
+# Cola única por proceso (compartida por todas las sesiones).
+#   JOB_WORKERS → análisis simultáneos en segundo plano
+# --------------------------------------------------------
+@cache_resource(show_spinner=False)
+def job_queue():
+    return JobQueue(workers=int(os.getenv("JOB_WORKERS", "4")))
@@ -1,32 +1,18 @@
-import streamlit as st
-import os
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.textanalytics import TextAnalyticsClient
-from azure.core.exceptions import HttpResponseError
+import contextvars
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+# El SDK de Azure (~150 ms de import), numpy y el índice de
+# casi-duplicados se importan dentro de las funciones que los usan:
+# la app pinta la primera pantalla sin cargarlos y el backend
+# local nunca carga el SDK.
+from app.services.resilience import CircuitBreaker, CircuitOpenError, PollingPolicy, ResilientClient, SharedTokenBucket, TokenBucket
+from app.utils import metrics
+from app.utils.cache import AnalysisCache, analysis_cache
+from app.utils.runtime import cache_data, cache_resource, get_secret, notify_error
 
-# --------------------------------------------------------
-# get_secret()
-# Obtiene una variable primero desde .streamlit/secrets.toml
-# y si no existe, intenta obtenerla como variable de entorno.
-#
-# Esto permite:
-#   - Usar credenciales en producción (Streamlit Cloud)
-#   - Usar variables locales en desarrollo
-#   - Evitar exponer claves en el código
-# --------------------------------------------------------
-def get_secret(name, default=None):
-    """Obtiene la credencial desde Streamlit Cloud o variable de entorno."""
-    try:
-        # 🔹 Primero intenta leer desde Streamlit Cloud
-        value = st.secrets.get(name)
-        if value:
-            return value
-    except Exception:
-        pass
-
-    # 🔹 Si falla (por ejemplo, en Docker o local), busca en variables del sistema
-    return os.getenv(name, default)
 
 # --------------------------------------------------------
 # Cargamos endpoint y key desde las funciones anteriores
@@ -38,128 +24,626 @@ def get_secret(name, default=None):
 ENDPOINT = get_secret("AZURE_LANGUAGE_ENDPOINT")
 KEY = get_secret("AZURE_LANGUAGE_KEY")
 
-if not ENDPOINT or not KEY:
-    st.error("❌ No se encontraron credenciales válidas. Verifica los secrets o variables de entorno.")
+# Versiones de la API y del modelo. Forman parte de la clave de la
+# caché persistente: si cambian, los resultados antiguos no se reutilizan.
+API_VERSION = get_secret("AZURE_LANGUAGE_API_VERSION", "2023-04-01")
+MODEL_VERSION = get_secret("AZURE_LANGUAGE_MODEL_VERSION", "latest")
+
+# --------------------------------------------------------
+# Backend de análisis (ANALYSIS_BACKEND)
+#   azure     → siempre Azure Language
+#   local     → siempre el backend local (app/services/local.py)
+#   auto      → Azure si hay credenciales; si no, local
+#   prefilter → primero local; solo se envían a Azure los textos
+#               que merecen la pena (idioma reconocido y longitud
+#               mínima). El resto se queda con el resultado local.
+# --------------------------------------------------------
+ANALYSIS_BACKEND = get_secret("ANALYSIS_BACKEND", "auto")
+
+# Longitud mínima para enviar un texto a Azure en modo prefilter
+PREFILTER_MIN_CHARS = int(get_secret("PREFILTER_MIN_CHARS", "200"))
+
+if ANALYSIS_BACKEND in ("azure", "prefilter") and (not ENDPOINT or not KEY):
+    notify_error("❌ No se encontraron credenciales válidas. Verifica los secrets o variables de entorno.")
+
+# --------------------------------------------------------
+# Protección ante carga (ver resilience.py)
+# AZURE_LANGUAGE_RATE_PER_MINUTE → cuota de llamadas del recurso
+#   (nivel S: 1000 peticiones/minuto)
+# AZURE_LANGUAGE_MAX_RETRIES     → reintentos ante 429/5xx
+# AZURE_LANGUAGE_BREAKER_*       → fallos seguidos para abrir el
+#   circuito y segundos que permanece abierto
+# AZURE_RATE_STATE_PATH          → fichero SQLite para que todas las
+#   réplicas de la máquina compartan la cuota (si no, una por proceso)
+# --------------------------------------------------------
+RATE_PER_MINUTE = float(get_secret("AZURE_LANGUAGE_RATE_PER_MINUTE", "1000"))
+MAX_RETRIES = int(get_secret("AZURE_LANGUAGE_MAX_RETRIES", "4"))
+BREAKER_FAILURES = int(get_secret("AZURE_LANGUAGE_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(get_secret("AZURE_LANGUAGE_BREAKER_RESET_SECONDS", "30"))
+RATE_STATE_PATH = get_secret("AZURE_RATE_STATE_PATH")
 
 # --------------------------------------------------------
 # get_client()
-# Crea una instancia del cliente de Azure Language SDK.
+# Crea una instancia del cliente de Azure Language SDK,
+# envuelta en un ResilientClient (límite de ritmo, reintentos
+# que respetan Retry-After y circuit breaker).
 #
-# @st.cache_resource:
+# @cache_resource (st.cache_resource dentro de Streamlit):
 #   - Se ejecuta una sola vez
 #   - Mantiene el cliente cargado para ahorrar tiempo
 #   - show_spinner=False → no mostrar spinner al inicializar
+#
+# El SDK se importa aquí, la primera vez que hace falta un cliente.
 # --------------------------------------------------------
-@st.cache_resource(show_spinner=False)
+_active_client = None  # Último cliente creado, para azure_stats()
+
+
+@cache_resource(show_spinner=False)
 def get_client():
     """Crea y cachea el cliente de Azure Language."""
+    global _active_client
 
     # Si no hay credenciales, se muestra error
     if not (ENDPOINT and KEY):
-        st.error("❌ Faltan credenciales en `.streamlit/secrets.toml`")
+        notify_error("❌ Faltan credenciales en `.streamlit/secrets.toml`")
         return None
 
+    from azure.ai.textanalytics import TextAnalyticsClient
+    from azure.core.credentials import AzureKeyCredential
+
     # Crea el objeto de autenticación de Azure
     credential = AzureKeyCredential(KEY)
 
-    # Devuelve el cliente configurado
-    return TextAnalyticsClient(endpoint=ENDPOINT, credential=credential)
+    # Devuelve el cliente configurado. PollingPolicy somete también las
+    # consultas del poller del resumen al limitador y al circuit breaker
+    polling = PollingPolicy()
+    client = TextAnalyticsClient(
+        endpoint=ENDPOINT, credential=credential, api_version=API_VERSION, per_call_policies=[polling],
+    )
+
+    rate = RATE_PER_MINUTE / 60
+    if RATE_STATE_PATH:
+        bucket = SharedTokenBucket(RATE_STATE_PATH, rate=rate, capacity=max(1, rate))
+    else:
+        bucket = TokenBucket(rate=rate, capacity=max(1, rate))
+    _active_client = ResilientClient(
+        client,
+        bucket=bucket,
+        breaker=CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET_SECONDS),
+        max_retries=MAX_RETRIES,
+    )
+    polling.client = _active_client
+    return _active_client
+
+
+def dedup_stats():
+    """Textos resueltos como casi-duplicados y registros de Azure ahorrados."""
+    from app.services.dedup import dedup_index
+
+    index = dedup_index()
+    return index.stats() if index is not None else None
+
+
+def azure_stats():
+    """Contadores de throttling, reintentos y esperas del cliente de Azure."""
+    # No crea el cliente: hasta el primer análisis no hay nada que contar
+    return _active_client.stats() if _active_client is not None else None
 
 
 # --------------------------------------------------------
-# analyze_text()
-# Realiza:
-#   1️⃣ Detección de idioma
-#   2️⃣ Análisis de sentimiento
-#   3️⃣ Resumen extractivo
+# Límites de la API de Azure Language (versión 2023-04-01)
+# Número máximo de documentos que acepta cada operación en
+# una sola petición. analyze_texts() empaqueta los textos en
+# lotes de este tamaño para hacer el mínimo de llamadas.
 #
-# @st.cache_data(ttl=3600)
-#   - Cachea resultados durante 1 hora
-#   - Evita pagar múltiples llamadas innecesarias a Azure
+# Además del número de documentos, cada petición tiene un
+# tamaño máximo (1 MB; Azure responde 413 si se pasa y el
+# lote entero falla) y el resumen extractivo admite como mucho
+# 125.000 caracteres entre todos sus documentos. Los lotes se
+# cierran en cuanto se alcanza cualquiera de los límites.
 # --------------------------------------------------------
-@st.cache_data(ttl=3600)
-def analyze_text(text: str):
-    """Analiza idioma, sentimiento y resumen con Azure Language SDK."""
+LANGUAGE_BATCH_SIZE = 1000   # detect_language
+SENTIMENT_BATCH_SIZE = 10    # analyze_sentiment
+SUMMARY_BATCH_SIZE = 25      # begin_extract_summary
+
+# Margen para el resto del cuerpo JSON ("documents", parámetros…)
+MAX_REQUEST_BYTES = 1_000_000 - 16_384
+SUMMARY_MAX_CHARS = 125_000
+
+
+def _payload_bytes(doc):
+    """Bytes que ocupa un documento en el cuerpo JSON de la petición."""
+    return len(json.dumps(doc)) + 2  # ", " entre documentos
+
+
+def _batches(items, size, max_bytes=MAX_REQUEST_BYTES, max_chars=None):
+    """Divide una lista de documentos en lotes consecutivos que respetan los límites de Azure.
+
+    Cada lote tiene como máximo `size` documentos, `max_bytes` bytes de
+    JSON y (si se indica) `max_chars` caracteres de texto. Un documento
+    que por sí solo supera un límite va en su propio lote.
+    """
+    batch, batch_bytes, batch_chars = [], 0, 0
+    for item in items:
+        item_bytes, item_chars = _payload_bytes(item), len(item["text"])
+        if batch and (
+            len(batch) >= size
+            or batch_bytes + item_bytes > max_bytes
+            or (max_chars is not None and batch_chars + item_chars > max_chars)
+        ):
+            yield batch
+            batch, batch_bytes, batch_chars = [], 0, 0
+        batch.append(item)
+        batch_bytes += item_bytes
+        batch_chars += item_chars
+    if batch:
+        yield batch
+
+
+def _build_summary(summary_sentences):
+    """Une las 3 frases más relevantes para construir un resumen final."""
+    return (
+        " ".join(summary_sentences[:3])
+        if summary_sentences
+        else "No se pudo generar resumen."
+    )
+
+
+# --------------------------------------------------------
+# Etapas del pipeline
+# Cada etapa recibe los documentos ({"id", "text", ...}) y
+# devuelve dos diccionarios indexados por id:
+#   - resultados correctos
+#   - mensajes de error por documento
+# --------------------------------------------------------
+def _detect_languages(client, docs):
+    """1️⃣ Detección de idioma (hasta 1000 documentos por llamada)."""
+    found, errors = {}, {}
+    for batch in _batches(docs, LANGUAGE_BATCH_SIZE):
+        for doc in client.detect_language(documents=batch, model_version=MODEL_VERSION):
+            if doc.is_error:
+                errors[doc.id] = doc.error.message
+                continue
+            found[doc.id] = (
+                doc.primary_language.name,          # Nombre del idioma ("Spanish")
+                doc.primary_language.iso6391_name,  # Código ISO 639-1 ("es")
+            )
+    return found, errors
+
+
+def _analyze_sentiment_batch(client, batch):
+    """2️⃣ Análisis de sentimiento de un lote (hasta 10 documentos)."""
+    found, errors = {}, {}
+    for doc in client.analyze_sentiment(documents=batch, model_version=MODEL_VERSION):
+        if doc.is_error:
+            errors[doc.id] = doc.error.message
+            continue
+        scores = doc.confidence_scores
+        found[doc.id] = (
+            doc.sentiment,                                     # "positive" / "neutral" / "negative"
+            [(s.text, s.sentiment) for s in doc.sentences],    # (frase, sentimiento)
+            {"positive": scores.positive, "neutral": scores.neutral, "negative": scores.negative},
+        )
+    return found, errors
+
+
+def _extract_summary_batch(client, batch):
+    """3️⃣ Resumen extractivo de un lote (hasta 25 documentos por operación)."""
+    found, errors = {}, {}
+
+    # begin_extract_summary() → operación asíncrona que requiere poller
+    poller = client.begin_extract_summary(documents=batch, model_version=MODEL_VERSION)
+
+    with metrics.timer("azure_poller_wait_seconds"):
+        documents = poller.result()  # Espera al resultado
+
+    for doc in documents:
+        if doc.is_error:
+            errors[doc.id] = doc.error.message
+            continue
+        found[doc.id] = (
+            _build_summary([s.text for s in doc.sentences]),
+            [(s.text, s.rank_score, s.offset) for s in doc.sentences],  # (frase, relevancia, posición)
+        )
+    return found, errors
+
+
+def _run_stage(executor, func, client, batches):
+    """Lanza todos los lotes de una etapa en el pool y mide cuánto tarda."""
+    started = time.perf_counter()
+    futures = [executor.submit(func, client, batch) for batch in batches]
+
+    def collect():
+        found, errors = {}, {}
+        for future in futures:
+            f, e = future.result()
+            found.update(f)
+            errors.update(e)
+        return found, errors, time.perf_counter() - started
+
+    return collect
+
+
+# --------------------------------------------------------
+# Progreso por etapas
+# Quien analiza puede registrar (con stage_progress) una función
+# que recibe (etapa, valores) cada vez que termina una etapa de
+# _analyze_with_azure(): "language", "sentiment" o "summary",
+# con un valor por texto enviado (None si ese texto falló).
+# La usa la cola de trabajos (jobs.py) para mostrar resultados
+# parciales. Al ser un ContextVar, cada hilo tiene la suya.
+# --------------------------------------------------------
+_stage_callback = contextvars.ContextVar("stage_callback", default=None)
+
+
+@contextmanager
+def stage_progress(callback):
+    """Registra `callback(etapa, valores)` durante el bloque with."""
+    token = _stage_callback.set(callback)
+    try:
+        yield
+    finally:
+        _stage_callback.reset(token)
+
+
+def _notify_stage(stage, found, count):
+    callback = _stage_callback.get()
+    if callback is not None:
+        callback(stage, [found.get(str(i)) for i in range(count)])
+
+
+def _count_text_records(operation, texts):
+    """Registros de texto que se van a facturar en esta operación (estimación)."""
+    records = metrics.azure_text_records(texts)
+    metrics.inc("azure_text_records_total", records, operation=operation)
+    metrics.observe("azure_text_records_per_request", records, metrics.SIZE_BUCKETS, operation=operation)
+
+
+# --------------------------------------------------------
+# _analyze_with_azure()
+#
+# Cada documento se envía con un "id" igual a su posición en
+# la lista de entrada, de modo que los resultados (y los
+# errores por documento) se pueden devolver en el mismo orden.
+#
+# El idioma se detecta primero porque las otras dos etapas lo
+# necesitan. Sentimiento y resumen no dependen entre sí, así
+# que se lanzan a la vez en un pool de hilos: la latencia
+# total pasa de ser la suma de las tres etapas a
+# idioma + max(sentimiento, resumen).
+#
+# Cada resultado incluye "timings" con los segundos de cada
+# etapa y el total, para poder comprobar la mejora.
+# --------------------------------------------------------
+PIPELINE_WORKERS = 8
+
+
+def _analyze_with_azure(texts):
+    """Analiza una lista de textos con una llamada a Azure por lote y etapa."""
+    from azure.core.exceptions import HttpResponseError
 
     # Inicializa cliente (desde caché si ya existe)
     client = get_client()
 
-    # Si no se puede crear cliente, devolvemos error
+    # Si no se puede crear cliente, devolvemos error para todos los textos
     if client is None:
-        return {"error": "missing_credentials"}
+        return [{"error": "missing_credentials"} for _ in texts]
+
+    results = [None] * len(texts)
+    started = time.perf_counter()
 
     try:
+        docs = [{"id": str(i), "text": t} for i, t in enumerate(texts)]
+        _count_text_records("language", texts)
+
         # --------------------------------------------------------
         # 1️⃣ DETECCIÓN DE IDIOMA
-        # Azure detecta automáticamente el idioma del texto.
-        # text → documento único dentro de una lista
         # --------------------------------------------------------
-        lang_result = client.detect_language(documents=[text])[0]
-        language = lang_result.primary_language.name  # Nombre del idioma ("Spanish")
-        lang_code = lang_result.primary_language.iso6391_name  # Código ISO 639-1 ("es")
+        languages, errors = _detect_languages(client, docs)
+        language_time = time.perf_counter() - started
+        _notify_stage("language", {k: v[0] for k, v in languages.items()}, len(texts))
+
+        # Documentos que siguen adelante, cada uno con su propio idioma
+        docs = [
+            {"id": d["id"], "text": d["text"], "language": languages[d["id"]][1]}
+            for d in docs
+            if d["id"] in languages
+        ]
 
         # --------------------------------------------------------
-        # 2️⃣ ANÁLISIS DE SENTIMIENTO
-        # Devuelve:
-        #   - sentimiento global del texto
-        #   - sentimiento de cada frase
+        # 2️⃣ SENTIMIENTO + 3️⃣ RESUMEN EN PARALELO
         # --------------------------------------------------------
-        sent_result = client.analyze_sentiment(
-            documents=[text],
-            language=lang_code
-        )[0]
+        _count_text_records("sentiment", [d["text"] for d in docs])
+        _count_text_records("summary", [d["text"] for d in docs])
+        with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as executor:
+            sentiment_stage = _run_stage(
+                executor, _analyze_sentiment_batch, client,
+                _batches(docs, SENTIMENT_BATCH_SIZE),
+            )
+            summary_stage = _run_stage(
+                executor, _extract_summary_batch, client,
+                _batches(docs, SUMMARY_BATCH_SIZE, max_chars=SUMMARY_MAX_CHARS),
+            )
+            sentiments, sentiment_errors, sentiment_time = sentiment_stage()
+            _notify_stage("sentiment", {k: v[:2] for k, v in sentiments.items()}, len(texts))
+            summaries, summary_errors, summary_time = summary_stage()
+            _notify_stage("summary", {k: v[0] for k, v in summaries.items()}, len(texts))
 
-        sentiment = sent_result.sentiment  # "positive" / "neutral" / "negative"
+        errors.update(summary_errors)
+        errors.update(sentiment_errors)
 
-        # Creamos una lista de tuplas: (frase, sentimiento)
-        sentences = [(s.text, s.sentiment) for s in sent_result.sentences]
+        timings = {
+            "language": round(language_time, 3),
+            "sentiment": round(sentiment_time, 3),
+            "summary": round(summary_time, 3),
+            "total": round(time.perf_counter() - started, 3),
+        }
 
         # --------------------------------------------------------
-        # 3️⃣ RESUMEN EXTRACTIVO
-        # Azure selecciona las frases más importantes del texto.
-        # begin_extract_summary() → operación asíncrona que requiere poller
+        # Unimos las tres etapas en un diccionario por documento
         # --------------------------------------------------------
-        poller = client.begin_extract_summary(
-            documents=[text],
-            language=lang_code
-        )
+        for i in range(len(texts)):
+            doc_id = str(i)
+            if doc_id in errors:
+                results[i] = {"error": errors[doc_id]}
+                continue
 
-        summary_result = poller.result()  # Espera al resultado
+            sentiment, sentences, scores = sentiments[doc_id]
+            summary, summary_ranked = summaries[doc_id]
+            results[i] = {
+                "language": languages[doc_id][0],
+                "sentiment": sentiment,
+                "summary": summary,
+                "sentences": sentences,
+                "scores": scores,                   # Confianza global por sentimiento
+                "summary_ranked": summary_ranked,   # Frases del resumen con su relevancia
+                "timings": timings,
+            }
 
-        # Extraemos las frases seleccionadas por Azure
-        summary_sentences = [
-            sentence.text
-            for doc in summary_result
-            for sentence in doc.sentences
-        ]
+        return results
 
-        # Unimos las 3 frases más relevantes para construir un resumen final
-        summary = (
-            " ".join(summary_sentences[:3])
-            if summary_sentences
-            else "No se pudo generar resumen."
-        )
-
-        # --------------------------------------------------------
-        # Devolvemos un diccionario estructurado con todos los resultados
-        # --------------------------------------------------------
-        return {
-            "language": language,
-            "sentiment": sentiment,
-            "summary": summary,
-            "sentences": sentences
-        }
+    # --------------------------------------------------------
+    # Circuito abierto: no es un error nuevo, Azure ya está caído.
+    # _analyze_azure_cached() intentará usar resultados cacheados.
+    # --------------------------------------------------------
+    except CircuitOpenError:
+        return [r or {"error": "circuit_open"} for r in results]
 
     # --------------------------------------------------------
     # Manejo de errores específicos de Azure
     # --------------------------------------------------------
     except HttpResponseError as e:
-        st.error(f"⚠️ Error en Azure Language SDK: {e.message}")
-        return {"error": str(e)}
+        notify_error(f"⚠️ Error en Azure Language SDK: {e.message}")
+        return [r or {"error": str(e)} for r in results]
 
     # --------------------------------------------------------
     # Manejo de errores generales
     # --------------------------------------------------------
     except Exception as e:
-        st.error(f"⚠️ Error inesperado: {e}")
-        return {"error": str(e)}
+        notify_error(f"⚠️ Error inesperado: {e}")
+        return [r or {"error": str(e)} for r in results]
+
+
+# --------------------------------------------------------
+# _near_duplicates()
+# Entre los textos que no están en la caché exacta, busca los
+# que son casi idénticos (MinHash/LSH, ver dedup.py) a:
+#   - un texto ya analizado cuyo resultado sigue en la caché, o
+#   - otro texto del mismo lote que sí se va a enviar
+# Devuelve (índices a enviar, {índice: clave del resultado a reutilizar},
+# {índice enviado: firma}) — las firmas se añaden al índice
+# solo cuando Azure responde bien.
+# --------------------------------------------------------
+def _near_duplicates(index, texts, keys, missing, cache, cached):
+    batch = index.empty_like()
+    to_send, aliases, signatures = [], {}, {}
+
+    for i in missing:
+        signature = index.signature(texts[i])
+        if signature is None:
+            to_send.append(i)
+            continue
+
+        # El más parecido cuyo resultado siga en la caché; las claves caducadas se borran del índice
+        match = None
+        for key, _ in index.query(signature):
+            if key not in cached:
+                cached.update(cache.get_many([key]))
+            if key in cached:
+                match = key
+                break
+            index.discard(key)
+        if match is None:
+            match = next((key for key, _ in batch.query(signature)), None)
+
+        if match:
+            aliases[i] = match
+            index.record_reuse(texts[i])
+        else:
+            batch.add(signature, keys[i])
+            signatures[i] = signature
+            to_send.append(i)
+
+    return to_send, aliases, signatures
+
+
+# --------------------------------------------------------
+# _analyze_azure_cached()
+# Antes de llamar a Azure consulta la caché persistente en
+# disco (compartida entre procesos y reinicios). Solo los
+# textos que no están en caché se envían a Azure, y sus
+# resultados correctos se guardan para la próxima vez.
+#
+# Si el circuito está abierto (Azure caído o saturado), se
+# aceptan también entradas caducadas de la caché antes que
+# devolver un error.
+#
+# Los casi-duplicados de textos ya analizados (misma noticia
+# con otro titular o firma) reutilizan su resultado en lugar
+# de pagar otra llamada (DEDUP_ENABLED, DEDUP_THRESHOLD).
+#
+# Solo los textos enviados a Azure conservan sus "timings": los
+# resultados reutilizados (caché, duplicados) llevan
+# CACHED_TIMINGS, así el informe no muestra latencias de una
+# llamada que no se hizo.
+# --------------------------------------------------------
+CACHED_TIMINGS = {"cache": True}
+
+
+def _analyze_azure_cached(texts):
+    """Analiza textos con Azure reutilizando los resultados de la caché persistente."""
+    cache = analysis_cache()
+    version = f"{API_VERSION}/{MODEL_VERSION}"
+    keys = [AnalysisCache.make_key(t, version) for t in texts]
+
+    cached = cache.get_many(list(set(keys)))
+    missing = [i for i, k in enumerate(keys) if k not in cached]
+
+    # Textos repetidos exactamente dentro del lote: se envían una sola vez
+    first = {}
+    for i in missing:
+        first.setdefault(keys[i], i)
+    aliases = {i: keys[i] for i in missing if first[keys[i]] != i}
+    missing = list(first.values())
+
+    from app.services.dedup import dedup_index
+
+    index = dedup_index()
+    signatures = {}
+    if index is not None and missing:
+        missing, near, signatures = _near_duplicates(index, texts, keys, missing, cache, cached)
+        # Si el primer texto de un repetido resultó ser casi-duplicado,
+        # sus copias apuntan también al resultado reutilizado
+        redirected = {keys[i]: k for i, k in near.items()}
+        aliases = {i: redirected.get(k, k) for i, k in aliases.items()}
+        aliases.update(near)
+
+    fresh = _analyze_with_azure([texts[i] for i in missing]) if missing else []
+    cache.set_many({keys[i]: r for i, r in zip(missing, fresh) if "error" not in r})
+    for i, r in zip(missing, fresh):
+        if i in signatures and "error" not in r:
+            index.add(signatures[i], keys[i])
+
+    rejected = [keys[i] for i, r in zip(missing, fresh) if r.get("error") == "circuit_open"]
+    if rejected:
+        stale = cache.get_many(rejected, allow_stale=True)
+        cached.update(stale)
+        fresh = [
+            None if r.get("error") == "circuit_open" and keys[i] in stale else r
+            for i, r in zip(missing, fresh)
+        ]
+
+    results = [None] * len(texts)
+    for i, r in zip(missing, fresh):
+        results[i] = r
+
+    # Duplicados de un texto de este mismo lote: copian su resultado
+    sent = {keys[i]: r for i, r in zip(missing, fresh) if r is not None}
+    for i, k in aliases.items():
+        if k in sent:
+            results[i] = dict(sent[k])
+            if "error" not in results[i]:
+                results[i]["timings"] = dict(CACHED_TIMINGS)
+        elif k not in cached:
+            results[i] = {"error": "circuit_open"}
+
+    for i, k in enumerate(keys):
+        if results[i] is None:
+            k = aliases.get(i, k)
+            # JSON convierte las tuplas (frase, sentimiento) en listas
+            r = dict(cached[k])
+            r["sentences"] = [tuple(s) for s in r["sentences"]]
+            if "summary_ranked" in r:
+                r["summary_ranked"] = [tuple(s) for s in r["summary_ranked"]]
+            r["timings"] = dict(CACHED_TIMINGS)
+            results[i] = r
+
+    return results
+
+
+# --------------------------------------------------------
+# BACKENDS
+# Registro de backends de análisis. Cada backend es una función
+# que recibe una lista de textos y devuelve un resultado por
+# texto con la misma forma:
+#   {"language", "sentiment", "summary", "sentences", ...}
+# o {"error": ...}. Se pueden registrar más añadiéndolos aquí.
+# --------------------------------------------------------
+def _analyze_local(texts):
+    from app.services.local import analyze_texts_local  # numpy solo con el backend local
+    return analyze_texts_local(texts)
+
+
+BACKENDS = {
+    "azure": _analyze_azure_cached,
+    "local": _analyze_local,
+}
+
+
+def _worth_sending_to_azure(text, local_result):
+    """Filtro previo: solo textos con idioma reconocido y longitud suficiente."""
+    return (
+        "error" not in local_result
+        and local_result["language"] != "(Unknown)"
+        and len(text.strip()) >= PREFILTER_MIN_CHARS
+    )
+
+
+# --------------------------------------------------------
+# _analyze_documents()
+# Núcleo compartido por analyze_text() y analyze_texts().
+# Elige el backend según ANALYSIS_BACKEND.
+# --------------------------------------------------------
+def _analyze_documents(texts):
+    """Analiza textos con el backend configurado."""
+    backend = ANALYSIS_BACKEND
+    if backend == "auto":
+        backend = "azure" if ENDPOINT and KEY else "local"
+
+    if backend != "prefilter":
+        return BACKENDS[backend](texts)
+
+    results = BACKENDS["local"](texts)
+    selected = [i for i, (t, r) in enumerate(zip(texts, results)) if _worth_sending_to_azure(t, r)]
+    if selected:
+        for i, r in zip(selected, BACKENDS["azure"]([texts[i] for i in selected])):
+            results[i] = r
+    return results
+
+
+# --------------------------------------------------------
+# analyze_text()
+# Realiza:
+#   1️⃣ Detección de idioma
+#   2️⃣ Análisis de sentimiento
+#   3️⃣ Resumen extractivo
+#
+# @cache_data(ttl=3600) (st.cache_data dentro de Streamlit)
+#   - Cachea resultados durante 1 hora
+#   - Evita pagar múltiples llamadas innecesarias a Azure
+# --------------------------------------------------------
+@cache_data(ttl=3600)
+@metrics.instrumented("analysis")
+def analyze_text(text: str):
+    """Analiza idioma, sentimiento y resumen (Azure Language SDK o backend local)."""
+    return _analyze_documents([text])[0]
+
+
+# --------------------------------------------------------
+# analyze_texts()
+# Versión por lotes de analyze_text() para feeds con muchos
+# artículos: en lugar de 3 llamadas por texto, hace 3 llamadas
+# por lote (respetando los límites de cada operación).
+#
+# Devuelve una lista con un resultado por texto, en el mismo
+# orden que la entrada. Cada resultado tiene la misma forma que
+# el de analyze_text() o {"error": ...} si ese documento falló.
+#
+# No se cachea en memoria: con lotes grandes (CLI, feeds) eso
+# haría crecer la memoria sin límite. La caché persistente de
+# _analyze_documents() ya evita repetir llamadas a Azure.
+# --------------------------------------------------------
+@metrics.instrumented("analysis_batch")
+def analyze_texts(texts: list[str]):
+    """Analiza varios textos en lote con Azure Language SDK."""
+    return _analyze_documents(list(texts))
@@ -0,0 +1,242 @@
+import re
+import unicodedata
+
+import numpy as np
+
+# --------------------------------------------------------
+# Backend de análisis local (sin red, solo CPU)
+#
+# Alternativa a Azure Language con el mismo formato de salida
+# ("language", "sentiment", "summary", "sentences", ...):
+#   1️⃣ Idioma: recuento de palabras vacías (stopwords) por idioma
+#   2️⃣ Sentimiento por frase: léxico de palabras positivas y
+#      negativas con inversión por negación ("no", "nunca"…)
+#   3️⃣ Resumen extractivo: TextRank sobre la matriz de
+#      similitud coseno entre frases
+#
+# Todo el cálculo numérico va vectorizado con NumPy.
+# Es mucho menos preciso que Azure, pero es instantáneo,
+# gratuito y funciona sin credenciales.
+# --------------------------------------------------------
+
+# Idioma → (nombre como lo devuelve Azure, palabras vacías frecuentes)
+LANGUAGES = {
+    "es": ("Spanish", "el la los las de del que y en un una por con para es se no lo al como más pero sus su le ya o este esta fue ha son muy también"),
+    "en": ("English", "the of and to in is that for it was on with as be by at this are from or have an but not they his her which you we"),
+    "fr": ("French", "le la les des de du et en un une est que qui pour dans par sur pas plus au avec ce il elle sont ont mais nous vous"),
+    "pt": ("Portuguese", "o a os as de do da dos das e em um uma para com não por que se mais como foi ao pelo pela são também já ele ela"),
+    "it": ("Italian", "il lo la i gli le di del della e che in un una per con non sono è da al alla anche come più ma ha questo questa"),
+    "de": ("German", "der die das und in den von zu mit sich des auf für ist im dem nicht ein eine als auch es an werden aus er hat dass sie"),
+    "ca": ("Catalan", "el la els les de del i que en un una per amb no és als com més però seu seva ja o aquest aquesta va ha són molt també"),
+}
+
+# Léxico de polaridad (español e inglés). Las formas se guardan sin tildes.
+POSITIVE_WORDS = """
+bueno buena buenos buenas bien mejor mejores excelente excelentes genial fantastico
+maravilloso positivo positiva positivos exito exitos exitoso exitosa logro logros
+avance avances mejora mejoras mejorar crecimiento crece beneficio beneficios feliz
+felices alegria satisfecho satisfecha acuerdo apoyo ayuda solucion soluciones
+victoria gana ganar gano ganador premio record seguro segura estable recuperacion
+innovador oportunidad oportunidades esperanza celebra celebran aprobado aprueba
+good great better best excellent positive success successful win wins improve
+improvement growth benefit happy support solution hope agreement stable record
+""".split()
+
+NEGATIVE_WORDS = """
+malo mala malos malas mal peor peores terrible horrible negativo negativa negativos
+fracaso fracasos crisis problema problemas grave graves muerte muertos muertas
+herido heridos victimas accidente ataque ataques guerra conflicto violencia
+corrupcion escandalo fraude estafa robo delito delitos caida cae perdida perdidas
+deficit deuda paro desempleo pobreza riesgo riesgos amenaza peligro peligroso
+denuncia denuncian critica criticas polemica protesta protestas despido despidos
+miedo alarma alerta falso falsa bulo mentira dano danos destruccion rechazo
+bad worse worst terrible negative failure crisis problem death dead attack war
+violence fraud loss risk threat danger fear false lie damage decline
+""".split()
+
+NEGATIONS = set("no nunca jamas ni tampoco sin not never no nor without".split())
+
+# Palabras afectadas por una negación que les precede
+NEGATION_WINDOW = 3
+
+# Umbral de puntuación para considerar una frase positiva/negativa
+SENTIMENT_THRESHOLD = 0.3
+
+# Frases del resumen (igual que Azure en analyze_text)
+SUMMARY_SENTENCES = 3
+
+# TextRank usa una matriz n × n: solo se puntúan las primeras frases
+MAX_TEXTRANK_SENTENCES = 2000
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_RE = re.compile(r"[^.!?…\n]+(?:[.!?…]+[\"'»”)]?)?")
+
+
+def _strip_accents(word):
+    return "".join(c for c in unicodedata.normalize("NFD", word) if unicodedata.category(c) != "Mn")
+
+
+def _build_tables():
+    """Vocabulario de idioma (palabra → columna) y léxico (palabra → polaridad)."""
+    codes = list(LANGUAGES)
+    lang_vocab = {}
+    for j, code in enumerate(codes):
+        for word in LANGUAGES[code][1].split():
+            lang_vocab.setdefault(word, []).append(j)
+
+    # Matriz palabra × idioma (una palabra puede ser vacía en varios idiomas)
+    lang_matrix = np.zeros((len(lang_vocab), len(codes)), dtype=np.float32)
+    lang_index = {}
+    for i, (word, columns) in enumerate(lang_vocab.items()):
+        lang_index[word] = i
+        lang_matrix[i, columns] = 1.0
+
+    polarity = {w: 1.0 for w in POSITIVE_WORDS}
+    polarity.update({w: -1.0 for w in NEGATIVE_WORDS})
+    return codes, lang_index, lang_matrix, polarity
+
+
+_CODES, _LANG_INDEX, _LANG_MATRIX, _POLARITY = _build_tables()
+
+
+# --------------------------------------------------------
+# 1️⃣ IDIOMA
+# --------------------------------------------------------
+def detect_language(tokens):
+    """Devuelve (nombre, código ISO 639-1) según las palabras vacías encontradas."""
+    ids = [_LANG_INDEX[t] for t in tokens if t in _LANG_INDEX]
+    if not ids:
+        return "(Unknown)", "(Unknown)"
+
+    counts = np.bincount(ids, minlength=len(_LANG_INDEX)).astype(np.float32)
+    scores = counts @ _LANG_MATRIX
+    code = _CODES[int(np.argmax(scores))]
+    return LANGUAGES[code][0], code
+
+
+# --------------------------------------------------------
+# 2️⃣ SENTIMIENTO POR FRASE
+# Cada palabra tiene polaridad +1 / -1 / 0. Una negación
+# invierte las NEGATION_WINDOW palabras siguientes (se
+# calcula con una convolución sobre el vector de negaciones).
+# La suma por frase se hace con np.bincount.
+# --------------------------------------------------------
+def _sentence_scores(tokens, lengths):
+    plain = [_strip_accents(t) for t in tokens]
+    polarity = np.fromiter((_POLARITY.get(t, 0.0) for t in plain), dtype=np.float32, count=len(plain))
+    negation = np.fromiter((t in NEGATIONS for t in plain), dtype=np.float32, count=len(plain))
+
+    # negated[i] = nº de negaciones en las NEGATION_WINDOW palabras anteriores
+    window = np.ones(NEGATION_WINDOW, dtype=np.float32)
+    negated = np.convolve(negation, window)[:len(plain)]
+    negated = np.concatenate(([0.0], negated[:-1])) if len(plain) else negated
+    polarity = np.where(negated % 2 == 1, -polarity, polarity)
+
+    lengths = np.asarray(lengths)
+    sentence_ids = np.repeat(np.arange(len(lengths)), lengths)
+    sums = np.bincount(sentence_ids, weights=polarity, minlength=len(lengths))
+
+    # Puntuación normalizada por la raíz de la longitud de la frase
+    return sums / np.sqrt(np.maximum(lengths, 1))
+
+
+def _label(score):
+    if score >= SENTIMENT_THRESHOLD:
+        return "positive"
+    if score <= -SENTIMENT_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+def _confidences(scores):
+    """Confianzas positivo/neutro/negativo (softmax) a partir de la puntuación media."""
+    mean = float(np.mean(scores)) if len(scores) else 0.0
+    logits = np.array([mean, SENTIMENT_THRESHOLD - abs(mean), -mean]) * 3
+    probs = np.exp(logits - logits.max())
+    probs /= probs.sum()
+    return {k: round(float(p), 4) for k, p in zip(("positive", "neutral", "negative"), probs)}
+
+
+# --------------------------------------------------------
+# 3️⃣ RESUMEN EXTRACTIVO (TextRank)
+# Matriz frase × palabra con pesos TF-IDF, similitud coseno
+# entre frases y PageRank por iteración de potencias.
+# --------------------------------------------------------
+def _textrank(sentence_tokens, damping=0.85, iterations=50):
+    vocab = {}
+    rows, cols = [], []
+    for i, tokens in enumerate(sentence_tokens):
+        for t in tokens:
+            rows.append(i)
+            cols.append(vocab.setdefault(t, len(vocab)))
+
+    n = len(sentence_tokens)
+    if n == 0 or not vocab:
+        return np.ones(n)
+
+    tf = np.zeros((n, len(vocab)), dtype=np.float32)
+    np.add.at(tf, (rows, cols), 1.0)
+    idf = np.log((1 + n) / (1 + np.count_nonzero(tf, axis=0))) + 1
+    tfidf = tf * idf
+
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    unit = tfidf / np.maximum(norms, 1e-9)
+    similarity = unit @ unit.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # Matriz de transición normalizada por filas (frases aisladas → uniforme)
+    out = similarity.sum(axis=1, keepdims=True)
+    transition = np.where(out > 0, similarity / np.maximum(out, 1e-9), 1.0 / n)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        rank = (1 - damping) / n + damping * (transition.T @ rank)
+    return rank / rank.max()
+
+
+def _split_sentences(text):
+    """Frases con su posición (offset) dentro del texto."""
+    return [(m.group().strip(), m.start()) for m in _SENTENCE_RE.finditer(text) if m.group().strip()]
+
+
+def analyze_document(text):
+    """Analiza un texto en local con el mismo formato que el backend de Azure."""
+    sentences = _split_sentences(text)
+    if not sentences:
+        return {"error": "Documento vacío"}
+
+    sentence_tokens = [[t.lower() for t in _WORD_RE.findall(s)] for s, _ in sentences]
+    tokens = [t for ts in sentence_tokens for t in ts]
+
+    language, _ = detect_language(tokens)
+
+    scores = _sentence_scores(tokens, [len(ts) for ts in sentence_tokens])
+    labels = [_label(s) for s in scores]
+
+    # Mismo criterio que Azure para el sentimiento del documento
+    if "positive" in labels and "negative" in labels:
+        sentiment = "mixed"
+    elif "positive" in labels:
+        sentiment = "positive"
+    elif "negative" in labels:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+
+    ranks = _textrank(sentence_tokens[:MAX_TEXTRANK_SENTENCES])
+    best = sorted(np.argsort(-ranks)[:SUMMARY_SENTENCES])
+
+    return {
+        "language": language,
+        "sentiment": sentiment,
+        "summary": " ".join(sentences[i][0] for i in best),
+        "sentences": [(s, label) for (s, _), label in zip(sentences, labels)],
+        "scores": _confidences(scores),
+        "summary_ranked": [(sentences[i][0], round(float(ranks[i]), 4), sentences[i][1]) for i in best],
+        "backend": "local",
+    }
+
+
+def analyze_texts_local(texts):
+    """Backend local: un resultado por texto, en el mismo orden."""
+    return [analyze_document(t) for t in texts]
@@ -0,0 +1,95 @@
+from collections import Counter
+from dataclasses import dataclass
+
+from app.services.heuristics import analyze_heuristics
+
+# Emoji de cada sentimiento en las evidencias del informe
+SENTIMENT_EMOJI = {"positive": "😊", "neutral": "😐", "negative": "😠"}
+
+
+def sentiment_percentages(counts, total):
+    """% de frases positivas, neutras y negativas a partir de sus recuentos."""
+    if total == 0:
+        return 0.0, 0.0, 0.0
+    return tuple(round(counts[label] / total * 100, 1) for label in ("positive", "neutral", "negative"))
+
+
+# --------------------------------------------------------
+# AnalysisResult
+# Resultado de un análisis listo para mostrar.
+#
+# Se construye UNA vez, al analizar (AnalysisResult.build):
+#   - recuentos y % de frases por sentimiento (una sola pasada)
+#   - heurísticas: red flags, clasificación y su probabilidad
+#   - líneas de evidencias ya formateadas
+# Las vistas (informe, historial) solo leen sus campos, así
+# los reruns de Streamlit no repiten ningún cálculo.
+# --------------------------------------------------------
+@dataclass(slots=True, frozen=True)
+class AnalysisResult:
+    text: str
+    language: str
+    sentiment: str
+    summary: str
+    sentences: tuple
+    classification: str
+    flags: tuple
+    positive_count: int
+    neutral_count: int
+    negative_count: int
+    positive_pct: float
+    neutral_pct: float
+    negative_pct: float
+    evidence: str
+    backend: str = "azure"
+    chunks: int = 1
+    timings: dict | None = None
+    classification_probability: float | None = None
+
+    @classmethod
+    def build(cls, text, result, heuristics=None):
+        """Crea el resultado a partir del dict del análisis y el texto original.
+
+        `heuristics` es (flags, clasificación, probabilidad) si ya se
+        calcularon; si no, se ejecutan aquí.
+        """
+        flags, classification, probability = heuristics or analyze_heuristics(text)
+        sentences = tuple(tuple(s) for s in result.get("sentences", []))
+
+        counts = Counter(label for _, label in sentences)
+        positive_pct, neutral_pct, negative_pct = sentiment_percentages(counts, len(sentences))
+
+        return cls(
+            text=text,
+            language=result.get("language", "Desconocido"),
+            sentiment=result.get("sentiment", "Desconocido"),
+            summary=result.get("summary", ""),
+            sentences=sentences,
+            classification=classification,
+            flags=tuple(flags),
+            positive_count=counts["positive"],
+            neutral_count=counts["neutral"],
+            negative_count=counts["negative"],
+            positive_pct=positive_pct,
+            neutral_pct=neutral_pct,
+            negative_pct=negative_pct,
+            # Una línea por frase, unidas en un solo bloque markdown
+            evidence="  \n".join(f"{SENTIMENT_EMOJI.get(s, '😠')} *{s}*: {sentence}" for sentence, s in sentences),
+            backend=result.get("backend", "azure"),
+            chunks=result.get("chunks", 1),
+            timings=result.get("timings") or None,
+            classification_probability=probability,
+        )
+
+    def history_entry(self):
+        """Resumen para el historial (mismas claves que HistoryStore)."""
+        return {
+            "texto": self.text[:120] + "...",
+            "idioma": self.language,
+            "sentimiento": self.sentiment,
+            "clasificación": self.classification,
+            "flags": ", ".join(self.flags),
+            "positive_pct": self.positive_pct,
+            "neutral_pct": self.neutral_pct,
+            "negative_pct": self.negative_pct,
+        }
@@ -0,0 +1,328 @@
+import os
+import sqlite3
+import threading
+import time
+
+from app.utils import metrics
+
+# Códigos HTTP que se reintentan (throttling o fallo temporal del servicio)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: Azure ha fallado demasiadas veces seguidas."""
+
+
+# --------------------------------------------------------
+# TokenBucket
+# Limitador de ritmo: como mucho `rate` llamadas por segundo,
+# con ráfagas de hasta `capacity`. acquire() bloquea hasta que
+# hay un token disponible, así bajo carga las llamadas esperan
+# (backpressure) en lugar de provocar errores 429 en Azure.
+# --------------------------------------------------------
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Espera a tener un token y devuelve los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+# --------------------------------------------------------
+# SharedTokenBucket
+# El mismo limitador, con el estado (tokens y última recarga) en
+# un fichero SQLite: las réplicas de la app de una máquina (y los
+# procesos del modo multiproceso) reparten UN presupuesto de
+# llamadas a Azure, en vez de tener cada una el suyo y pasarse
+# entre todas del límite de la suscripción.
+# BEGIN IMMEDIATE serializa recarga y consumo entre procesos.
+# --------------------------------------------------------
+class SharedTokenBucket:
+    def __init__(self, path, rate, capacity, name="azure"):
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)", (name, capacity, time.time()))
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no permite compartirlas entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _take(self):
+        """Toma un token si hay; si no, devuelve cuánto falta para el siguiente."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            # Reloj de pared: es el único que comparten los procesos
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            delay = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if tokens >= 1:
+                tokens -= 1
+            conn.execute("UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?", (tokens, now, self.name))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return delay
+
+    def acquire(self):
+        """Espera a tener un token y devuelve los segundos esperados."""
+        waited = 0.0
+        while (delay := self._take()) > 0:
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+
+# --------------------------------------------------------
+# CircuitBreaker
+#   - cerrado: las llamadas pasan normalmente
+#   - abierto: tras `failure_threshold` fallos seguidos, las
+#     llamadas fallan al instante (CircuitOpenError) durante
+#     `reset_timeout` segundos, sin castigar más al servicio
+#   - semiabierto: pasado ese tiempo se dejan pasar llamadas
+#     de prueba; si va bien se cierra, si falla se vuelve a abrir
+# --------------------------------------------------------
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        if self.state == "open":
+            raise CircuitOpenError("Azure Language no disponible temporalmente (circuito abierto)")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+
+
+def _retry_after(error):
+    """Segundos indicados por Azure en Retry-After (o retry-after-ms), si vienen.
+
+    Retry-After puede ser un número de segundos o una fecha HTTP
+    ("Wed, 21 Oct 2015 07:28:00 GMT").
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 1000), ("x-ms-retry-after-ms", 1000), ("Retry-After", 1)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) / scale
+            except ValueError:
+                pass
+            if name == "Retry-After":
+                return _retry_after_date(value)
+    return None
+
+
+def _retry_after_date(value):
+    """Segundos que faltan hasta la fecha HTTP de Retry-After (None si no es una fecha)."""
+    from email.utils import parsedate_to_datetime  # Solo cuando Azure manda una fecha
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+# --------------------------------------------------------
+# ResilientClient
+# Envuelve al TextAnalyticsClient. Cada llamada a Azure:
+#   1️⃣ comprueba el circuit breaker (falla rápido si está abierto)
+#   2️⃣ espera un token del limitador de ritmo
+#   3️⃣ si Azure responde 429/5xx o hay error de red, reintenta
+#      respetando Retry-After (o con backoff exponencial)
+#
+# Los reintentos del propio SDK se desactivan en estas llamadas
+# (retry_total=0) para que no se sumen a los nuestros.
+#
+# Las consultas de estado del poller de begin_extract_summary()
+# no pasan por aquí, sino por PollingPolicy (más abajo), que
+# les aplica los mismos pasos.
+#
+# Cualquier otro atributo se delega en el cliente original.
+# --------------------------------------------------------
+class ResilientClient:
+    WRAPPED = ("detect_language", "analyze_sentiment", "begin_extract_summary")
+
+    def __init__(self, client, bucket, breaker, max_retries=4, backoff=1.0):
+        self._client = client
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self.counters = {
+            "calls": 0,
+            "throttled": 0,        # respuestas 429
+            "retries": 0,
+            "failures": 0,         # llamadas que fallan tras agotar los reintentos
+            "circuit_rejected": 0, # llamadas rechazadas con el circuito abierto
+            "wait_seconds": 0.0,   # tiempo esperando al limitador y entre reintentos
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        stats["circuit"] = self.breaker.state
+        return stats
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name not in self.WRAPPED:
+            return attr
+
+        def call(*args, **kwargs):
+            # Duración total de la llamada, con esperas y reintentos
+            with metrics.timer("azure_call_seconds", operation=name):
+                return self._call(attr, *args, **kwargs)
+
+        return call
+
+    def _call(self, method, *args, **kwargs):
+        kwargs.setdefault("retry_total", 0)
+        return self._with_retries(lambda: method(*args, **kwargs))
+
+    def _with_retries(self, send):
+        """Resultado de send() pasando por el circuit breaker, el limitador y los reintentos."""
+        # El SDK ya está cargado (hay un cliente); importarlo arriba
+        # obligaría a cargarlo a todo el que importe este módulo
+        from azure.core.exceptions import HttpResponseError, ServiceRequestError
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count("circuit_rejected")
+                raise
+
+            self._count("wait_seconds", self.bucket.acquire())
+            self._count("calls")
+
+            try:
+                result = send()
+                self.breaker.record_success()
+                return result
+
+            except HttpResponseError as e:
+                if e.status_code == 429:
+                    self._count("throttled")
+                if e.status_code not in RETRY_STATUS:
+                    raise
+                error = e
+
+            except ServiceRequestError as e:
+                error = e
+
+            self.breaker.record_failure()
+            if attempt == self.max_retries:
+                self._count("failures")
+                raise error
+
+            delay = _retry_after(error)
+            if delay is None:
+                delay = self.backoff * (2 ** attempt)
+            self._count("retries")
+            self._count("wait_seconds", delay)
+            time.sleep(delay)
+
+
+# --------------------------------------------------------
+# PollingPolicy
+# begin_extract_summary() solo hace el POST inicial a través de
+# ResilientClient; después el poller del SDK consulta el estado
+# del trabajo (GET) por su cuenta, hasta que termina. Esta
+# política se instala en el pipeline del SDK (per_call_policies)
+# y hace pasar esas consultas por el limitador, el circuit
+# breaker y los reintentos del ResilientClient (`client`), así
+# el resumen no se salta la cuota de Azure.
+#
+# Las peticiones que no son GET ya vienen de ResilientClient y
+# pasan sin más. Es una política de azure-core por interfaz
+# (send() y next), sin heredar de HTTPPolicy: así este módulo no
+# importa el SDK.
+# --------------------------------------------------------
+class PollingPolicy:
+    def __init__(self):
+        self.next = None      # Siguiente política del pipeline (la pone azure-core)
+        self.client = None    # ResilientClient cuyas protecciones se aplican
+
+    def send(self, request):
+        if self.client is None or request.http_request.method != "GET":
+            return self.next.send(request)
+
+        from azure.core.exceptions import HttpResponseError
+
+        def poll():
+            # Sin los reintentos del SDK (van después de esta política y no esperarían al limitador)
+            request.context.options["retry_total"] = 0
+            response = self.next.send(request)
+            if response.http_response.status_code in RETRY_STATUS:
+                raise HttpResponseError(response=response.http_response)
+            return response
+
+        with metrics.timer("azure_call_seconds", operation="poll"):
+            return self.client._with_retries(poll)
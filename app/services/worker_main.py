@@ -0,0 +1,47 @@
+from multiprocessing import spawn
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+# --------------------------------------------------------
+# Punto de entrada de los procesos del pool (workers.py)
+#
+# Con "spawn", cada proceso nuevo vuelve a ejecutar el módulo
+# __main__ del padre para poder deshacer el pickle de lo que se
+# le envía. Bajo `streamlit run`, ese __main__ es app/main.py:
+# cada proceso del pool volvería a pintar la UI entera (sin
+# ScriptRunContext), crearía la cola de trabajos, las métricas y
+# las cachés en disco…
+#
+# Los procesos del pool usan este módulo como __main__ en su
+# lugar: no importa nada de la app. Las tareas (funciones de
+# workers.py) importan después solo lo que usan.
+# --------------------------------------------------------
+PROCESS_PREFIX = "app-worker"
+
+
+class WorkerProcess(SpawnProcess):
+    """Proceso del pool: se reconoce por el prefijo de su nombre."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = f"{PROCESS_PREFIX}-{self.name}"
+
+
+class WorkerContext(SpawnContext):
+    Process = WorkerProcess
+
+
+def _preparation_data(name, _original=spawn.get_preparation_data):
+    """Como spawn.get_preparation_data(), pero los procesos del pool arrancan con este módulo como __main__."""
+    data = _original(name)
+    if name.startswith(PROCESS_PREFIX):
+        data.pop("init_main_from_path", None)
+        data["init_main_from_name"] = __name__
+    return data
+
+
+def worker_context():
+    """Contexto "spawn" cuyos procesos no vuelven a ejecutar el __main__ de la app."""
+    if spawn.get_preparation_data is not _preparation_data:
+        spawn.get_preparation_data = _preparation_data
+    return WorkerContext()
+
@@ -0,0 +1,140 @@
+import logging
+import os
+from concurrent.futures import BrokenExecutor, Future
+
+from app.utils import metrics
+from app.utils.runtime import cache_resource
+
+logger = logging.getLogger("app")
+
+
+# --------------------------------------------------------
+# Modo multiproceso (pool de procesos para el trabajo de CPU)
+#
+# Todas las sesiones de un contenedor de Streamlit comparten un
+# proceso y su GIL. Con varios usuarios a la vez, el parseo del
+# HTML y las heurísticas de cada uno esperan a los del resto.
+# Con WORKER_PROCESSES > 0 ese trabajo se manda a un pool de
+# procesos:
+#   - extract_url():   descarga + extracción de una URL
+#   - fetch_many():    descarga masiva, repartida entre procesos
+#   - heuristics() / classify_many(): red flags y clasificación
+#
+# Cada proceso del pool crea sus propios singletons
+# (http_session, cliente…) la primera vez que los usa. Los
+# resultados se comparten con la app y con otras réplicas a
+# través de las cachés en disco (SQLite en modo WAL):
+# ANALYSIS_CACHE_PATH, PAGE_CACHE_PATH (con
+# PAGE_CACHE_FRESH_SECONDS) y la cuota de Azure
+# (AZURE_RATE_STATE_PATH).
+#
+# Con WORKER_PROCESSES=0 (por defecto) todo se ejecuta en el
+# proceso de la app, como siempre.
+# --------------------------------------------------------
+def pool_size():
+    """Procesos del pool (0 si el modo multiproceso está desactivado)."""
+    return max(0, int(os.getenv("WORKER_PROCESSES", "0")))
+
+
+@cache_resource(show_spinner=False)
+def process_pool():
+    if not pool_size():
+        return None
+    # multiprocessing se importa aquí: sin pool, la app no lo carga
+    from concurrent.futures import ProcessPoolExecutor
+
+    from app.services.worker_main import worker_context
+
+    # spawn: Streamlit ya tiene hilos en marcha y hacer fork con hilos no es seguro.
+    # worker_context(): los procesos no vuelven a ejecutar app/main.py (ver worker_main.py)
+    return ProcessPoolExecutor(max_workers=pool_size(), mp_context=worker_context())
+
+
+def submit(func, *args):
+    """Future de func(*args): en el pool si está activo; si no, se ejecuta ya en este proceso.
+
+    `func` tiene que poder importarse desde el módulo donde se define
+    (se envía por nombre a los procesos del pool).
+    """
+    pool = process_pool()
+    if pool is not None:
+        try:
+            future = pool.submit(func, *args)
+            metrics.inc("worker_tasks_total", task=func.__name__)
+            return future
+        except (BrokenExecutor, RuntimeError) as e:
+            # Un proceso del pool murió (p. ej. por memoria): se recrea la próxima vez
+            logger.warning("Pool de procesos no disponible (%s); se ejecuta en este proceso", e)
+            process_pool.clear()
+
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def wait(future, fallback=lambda: None):
+    """Resultado de un Future de submit(); si el pool se rompió entretanto, el de fallback()."""
+    try:
+        return future.result()
+    except BrokenExecutor as e:
+        logger.warning("Pool de procesos roto (%s); se calcula en este proceso", e)
+        process_pool.clear()
+        return fallback()
+
+
+def run(func, *args):
+    """Resultado de func(*args), calculado en el pool si está activo."""
+    with metrics.timer("worker_task_seconds", task=func.__name__):
+        return wait(submit(func, *args), lambda: func(*args))
+
+
+# --------------------------------------------------------
+# Tareas que se ejecutan en el pool. Los imports van dentro:
+# el proceso principal no carga nada nuevo al importar este
+# módulo, y cada proceso del pool solo lo que use.
+# --------------------------------------------------------
+def _extract_url(url, max_chars):
+    from app.utils.extractor import extract_text_from_url
+    return extract_text_from_url(url, max_chars)
+
+
+def _fetch_shard(urls, max_chars):
+    from app.utils.fetcher import fetch_urls
+    return list(fetch_urls(urls, max_chars=max_chars))
+
+
+def _heuristics(text):
+    from app.services.heuristics import analyze_heuristics
+    return analyze_heuristics(text)
+
+
+def _classify_many(texts):
+    from app.services.heuristics import classify_texts
+    return classify_texts(texts)
+
+
+def extract_url(url, max_chars):
+    """Texto de una URL (o mensaje de error), extraído en el pool si está activo."""
+    return run(_extract_url, url, max_chars)
+
+
+def fetch_many(urls, max_chars):
+    """FetchResult de cada URL; con el pool, repartidas entre sus procesos."""
+    count = max(1, pool_size())
+    shards = [urls[i::count] for i in range(count) if urls[i::count]]
+    futures = [submit(_fetch_shard, shard, max_chars) for shard in shards]
+    return [result for future, shard in zip(futures, shards)
+            for result in wait(future, lambda: _fetch_shard(shard, max_chars))]
+
+
+def heuristics(text):
+    """Future con el HeuristicsResult de un texto (se espera con wait() mientras se analiza)."""
+    return submit(_heuristics, text)
+
+
+def classify_many(texts):
+    """HeuristicsResult de cada texto, puntuados de una vez (en el pool si está activo)."""
+    return run(_classify_many, texts)
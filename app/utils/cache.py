@@ -1,11 +1,21 @@
-import streamlit as st
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import namedtuple
+
+from app.utils.runtime import cache_resource
 
 
 # --------------------------------------------------------
 # http_session()
 # Esta función crea y devuelve una sesión HTTP persistente.
 #
-# Se usa @st.cache_resource para:
+# Se usa @cache_resource (st.cache_resource dentro de Streamlit) para:
 #   - Crear la sesión UNA sola vez
 #   - Reutilizar la misma conexión en lugar de crear nuevas
 #   - Mejorar la eficiencia de la app
@@ -13,7 +23,7 @@ import streamlit as st
 #
 # show_spinner=False → No mostrar un spinner cuando se carga la sesión.
 # --------------------------------------------------------
-@st.cache_resource(show_spinner=False)
+@cache_resource(show_spinner=False)
 def http_session():
     # Importamos aquí requests para que solo se cargue cuando se llame la función
     import requests
@@ -36,5 +46,384 @@ def http_session():
     # --------------------------------------------------------
     s.headers.update({"User-Agent": "analizador-noticias/1.0"})
 
+    # --------------------------------------------------------
+    # Ampliamos el pool de conexiones (por defecto 10 por host)
+    # para que la descarga masiva en paralelo (fetcher.py) pueda
+    # reutilizar conexiones desde muchos hilos a la vez.
+    # --------------------------------------------------------
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+
     # Devuelve la sesión lista para usarse en otras funciones
     return s
+
+
+# --------------------------------------------------------
+# AnalysisCache
+# Caché persistente en disco (SQLite) para los resultados de
+# Azure Language. A diferencia de @st.cache_data, sobrevive a
+# reinicios y se comparte entre varios procesos o réplicas que
+# monten el mismo fichero.
+#
+#   - Clave: hash SHA-256 del texto normalizado + versión de
+#     API/modelo (si cambia la versión, no se reutiliza nada).
+#   - TTL por entrada (expires_at).
+#   - Expulsión LRU cuando se supera max_entries.
+#   - Contadores de aciertos/fallos guardados en la propia base
+#     de datos, así se suman los de todos los procesos.
+#
+# SQLite en modo WAL permite lectores concurrentes y un
+# escritor a la vez; timeout=30 hace que los procesos esperen
+# el bloqueo en lugar de fallar.
+# --------------------------------------------------------
+class AnalysisCache:
+    """Caché persistente LRU con TTL para resultados de análisis."""
+
+    # Cada cuántas escrituras se comprueba si hay que expulsar entradas
+    EVICT_EVERY = 100
+
+    def __init__(self, path, max_entries=50_000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0)")
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no permite compartirlas entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(text, version):
+        """Hash del texto normalizado (espacios y forma Unicode) + versión."""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{version}:{digest}"
+
+    def get_many(self, keys, allow_stale=False):
+        """Devuelve {clave: valor} para las claves presentes y no caducadas.
+
+        Con allow_stale=True también devuelve entradas caducadas que aún no
+        se han expulsado (se usa como respaldo cuando Azure no responde).
+        """
+        if not keys:
+            return {}
+
+        conn = self._conn()
+        now = time.time()
+        min_expiry = float("-inf") if allow_stale else now
+        found = {}
+
+        # SQLite limita el número de parámetros por consulta
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM entries WHERE key IN ({marks}) AND expires_at > ?",
+                (*chunk, min_expiry),
+            ).fetchall()
+            found.update((k, json.loads(v)) for k, v in rows)
+
+            if rows:
+                conn.execute(
+                    f"UPDATE entries SET accessed_at = ? WHERE key IN ({','.join('?' * len(rows))})",
+                    (now, *(k for k, _ in rows)),
+                )
+
+        hits = len(found)
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = 'hits'", (hits,))
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = 'misses'", (len(keys) - hits,))
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items, ttl=None):
+        """Guarda varias entradas {clave: valor} con el TTL indicado."""
+        if not items:
+            return
+
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False), expires_at, now) for k, v in items.items()],
+        )
+
+        self._writes += len(items)
+        if self._writes >= self.EVICT_EVERY:
+            self._writes = 0
+            self.evict()
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def evict(self):
+        """Borra las entradas caducadas y, si sobran, las menos usadas (LRU)."""
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        excess = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self):
+        """Aciertos, fallos y número de entradas (acumulados entre procesos)."""
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        counters["entries"] = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return counters
+
+
+# --------------------------------------------------------
+# analysis_cache()
+# Instancia única por proceso de AnalysisCache.
+# Se configura con variables de entorno:
+#   ANALYSIS_CACHE_PATH        → fichero SQLite (compartido entre procesos)
+#   ANALYSIS_CACHE_MAX_ENTRIES → máximo de entradas antes de expulsar (LRU)
+#   ANALYSIS_CACHE_TTL         → segundos de vida de cada entrada
+# --------------------------------------------------------
+@cache_resource(show_spinner=False)
+def analysis_cache():
+    return AnalysisCache(
+        path=os.getenv("ANALYSIS_CACHE_PATH", os.path.join(".cache", "analysis.sqlite3")),
+        max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50000")),
+        ttl=int(os.getenv("ANALYSIS_CACHE_TTL", str(7 * 24 * 3600))),
+    )
+
+
+# --------------------------------------------------------
+# PageCache
+# Caché en disco (SQLite) de las páginas descargadas, para
+# revalidarlas en lugar de volver a descargarlas y parsearlas
+# cuando caduca la caché de Streamlit (extract_text_from_url)
+# o se repite una URL en el CLI por lotes.
+#
+#   - Por URL se guardan los validadores HTTP (ETag y
+#     Last-Modified), el texto ya extraído para cada max_chars
+#     y, si se leyó entera, la página comprimida con zlib.
+#   - La siguiente descarga es condicional (If-None-Match /
+#     If-Modified-Since). Con un 304 no se descarga nada y el
+#     texto sale de aquí sin parsear (o parseando la página
+#     guardada, si se pide otro max_chars).
+#   - Las páginas sin ETag ni Last-Modified no se guardan.
+#   - Ventana de frescura opcional (fresh_for): si la página se
+#     descargó o revalidó hace menos, su texto se usa sin
+#     preguntar al servidor. Así los procesos del pool y las
+#     réplicas que comparten el fichero reutilizan la extracción
+#     de los demás.
+#   - TTL por entrada y expulsión LRU por tamaño en disco.
+#   - Contadores (revalidaciones, bytes ahorrados…) guardados
+#     en la propia base de datos, sumados entre procesos.
+# --------------------------------------------------------
+PageEntry = namedtuple("PageEntry", ["etag", "last_modified", "encoding", "size", "body", "texts"])
+
+
+class PageCache:
+    """Caché persistente de páginas HTTP con revalidación."""
+
+    EVICT_EVERY = 100
+
+    COUNTERS = (
+        "requests",          # Descargas con la caché activa
+        "revalidated",       # 304: la página guardada sigue valiendo
+        "modified",          # Petición condicional que devolvió la página nueva
+        "misses",            # Sin entrada en caché (o sin el texto pedido)
+        "uncacheable",       # Respuestas sin ETag ni Last-Modified
+        "parses_skipped",    # 304 con el texto ya extraído
+        "fresh",             # Texto servido sin preguntar al servidor (dentro de fresh_for)
+        "bytes_downloaded",
+        "bytes_saved",       # Bytes leídos al guardar cada página que un 304 ya no descarga
+    )
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, ttl=7 * 24 * 3600, fresh_for=0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.fresh_for = fresh_for
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " encoding TEXT,"
+            " size INTEGER NOT NULL,"
+            " body BLOB,"
+            " texts BLOB NOT NULL,"
+            " stored_bytes INTEGER NOT NULL,"
+            " validated_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.executemany("INSERT OR IGNORE INTO stats VALUES (?, 0)", [(name,) for name in self.COUNTERS])
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no permite compartirlas entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, url):
+        """PageEntry de la URL (texts: {max_chars: texto}, body: HTML comprimido o None)."""
+        row = self._conn().execute(
+            "SELECT etag, last_modified, encoding, size, body, texts FROM pages WHERE url = ? AND expires_at > ?",
+            (url, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, encoding, size, body, texts = row
+        texts = {int(k): v for k, v in json.loads(zlib.decompress(texts)).items()}
+        return PageEntry(etag, last_modified, encoding, size, body, texts)
+
+    def fresh_text(self, url, max_chars):
+        """Texto de la URL si se descargó o revalidó hace menos de fresh_for segundos (si no, None)."""
+        if self.fresh_for <= 0:
+            return None
+        row = self._conn().execute(
+            "SELECT texts FROM pages WHERE url = ? AND validated_at > ? AND expires_at > ?",
+            (url, time.time() - self.fresh_for, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0])).get(str(max_chars))
+
+    @staticmethod
+    def validators(entry):
+        """Cabeceras de la petición condicional para una entrada."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    @staticmethod
+    def page_body(entry):
+        """HTML guardado de una entrada (None si no se leyó entera)."""
+        return zlib.decompress(entry.body) if entry.body is not None else None
+
+    def store(self, url, etag, last_modified, encoding, size, texts, body=None):
+        """Guarda (o sustituye) la página de una URL. `body` son los bytes de la página completa."""
+        now = time.time()
+        packed_texts = zlib.compress(json.dumps(texts, ensure_ascii=False).encode("utf-8"))
+        packed_body = zlib.compress(body) if body is not None else None
+        stored_bytes = len(packed_texts) + len(packed_body or b"")
+        self._conn().execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, encoding, size, packed_body, packed_texts,
+             stored_bytes, now, now + self.ttl, now),
+        )
+
+        self._writes += 1
+        if self._writes >= self.EVICT_EVERY:
+            self._writes = 0
+            self.evict()
+
+    def revalidated(self, url, entry, etag=None, last_modified=None, texts=None):
+        """Renueva una entrada tras un 304 (con los validadores y textos nuevos, si los hay)."""
+        now = time.time()
+        packed_texts = zlib.compress(json.dumps(texts or entry.texts, ensure_ascii=False).encode("utf-8"))
+        self._conn().execute(
+            "UPDATE pages SET etag = ?, last_modified = ?, texts = ?,"
+            " stored_bytes = ? + COALESCE(LENGTH(body), 0), validated_at = ?, expires_at = ?, accessed_at = ?"
+            " WHERE url = ?",
+            (etag or entry.etag, last_modified or entry.last_modified, packed_texts,
+             len(packed_texts), now, now + self.ttl, now, url),
+        )
+
+    def count(self, **counters):
+        """Suma a los contadores persistentes (count(revalidated=1, bytes_saved=n))."""
+        self._conn().executemany(
+            "UPDATE stats SET value = value + ? WHERE name = ?",
+            [(value, name) for name, value in counters.items() if value],
+        )
+
+    def evict(self):
+        """Borra las entradas caducadas y, si se pasa de max_bytes, las menos usadas (LRU)."""
+        conn = self._conn()
+        conn.execute("DELETE FROM pages WHERE expires_at <= ?", (time.time(),))
+        excess = (conn.execute("SELECT SUM(stored_bytes) FROM pages").fetchone()[0] or 0) - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for url, stored_bytes in conn.execute("SELECT url, stored_bytes FROM pages ORDER BY accessed_at"):
+            victims.append((url,))
+            excess -= stored_bytes
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM pages WHERE url = ?", victims)
+
+    def stats(self):
+        """Contadores, tasa de revalidación, entradas y bytes en disco (acumulados entre procesos)."""
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        conditional = counters["revalidated"] + counters["modified"]
+        counters["revalidation_rate"] = round(counters["revalidated"] / conditional, 4) if conditional else 0.0
+        counters["entries"], counters["stored_bytes"] = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0) FROM pages"
+        ).fetchone()
+        return counters
+
+
+# --------------------------------------------------------
+# page_cache()
+# Instancia única por proceso de PageCache (None si está
+# desactivada). Se configura con variables de entorno:
+#   PAGE_CACHE_ENABLED → "0" para desactivarla
+#   PAGE_CACHE_PATH    → fichero SQLite (compartido entre procesos)
+#   PAGE_CACHE_MAX_MB  → tamaño máximo en disco antes de expulsar (LRU)
+#   PAGE_CACHE_TTL     → segundos que se conserva cada página
+#   PAGE_CACHE_FRESH_SECONDS → segundos en los que una página se da por
+#     buena sin revalidarla (0 = siempre se revalida)
+# --------------------------------------------------------
+@cache_resource(show_spinner=False)
+def page_cache():
+    if os.getenv("PAGE_CACHE_ENABLED", "1") == "0":
+        return None
+    return PageCache(
+        path=os.getenv("PAGE_CACHE_PATH", os.path.join(".cache", "pages.sqlite3")),
+        max_bytes=int(float(os.getenv("PAGE_CACHE_MAX_MB", "256")) * 1024 * 1024),
+        ttl=int(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600))),
+        fresh_for=float(os.getenv("PAGE_CACHE_FRESH_SECONDS", "0")),
+    )
@@ -1,6 +1,465 @@
-import streamlit as st
-import requests
-from bs4 import BeautifulSoup
+import codecs
+import importlib.util
+import itertools
+import re
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from app.utils import metrics
+from app.utils.cache import http_session, page_cache
+from app.utils.metrics import instrumented, timer
+from app.utils.profiles import GENERIC, compiled_profile, match
+from app.utils.runtime import cache_data
+
+# Máximo de caracteres que se devuelven por artículo
+MAX_CHARS = 5000
+
+# Límite al pedir el artículo completo (se analiza por trozos, ver chunking.py)
+FULL_ARTICLE_CHARS = 200_000
+
+# Tamaño de cada trozo leído de la respuesta HTTP en modo streaming
+CHUNK_SIZE = 16 * 1024
+
+
+# --------------------------------------------------------
+# extract_text_from_html()
+# Parte común de la extracción: recibe el HTML ya descargado
+# y devuelve el texto de sus párrafos. La usan tanto
+# extract_text_from_url() como la descarga masiva (fetcher.py).
+# --------------------------------------------------------
+def extract_text_from_html(html: str, max_chars: int = MAX_CHARS) -> str:
+    # --------------------------------------------------------
+    # Analiza el HTML usando BeautifulSoup
+    # "html.parser" → parser estándar incluido en Python
+    #
+    # bs4 se importa aquí: la extracción normal va en streaming
+    # (más abajo) y no lo necesita.
+    # --------------------------------------------------------
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    # --------------------------------------------------------
+    # Extrae todos los párrafos <p> y obtiene su contenido de texto
+    # Cada elemento p.get_text() devuelve el texto plano sin etiquetas
+    # --------------------------------------------------------
+    paragraphs = [p.get_text() for p in soup.find_all("p")]
+
+    # --------------------------------------------------------
+    # Une todos los párrafos en un solo string
+    # strip() quita espacios extremos
+    # [:max_chars] limita el tamaño para evitar textos enormes
+    # --------------------------------------------------------
+    return " ".join(paragraphs).strip()[:max_chars]
+
+
+# --------------------------------------------------------
+# Extracción en streaming
+#
+# extract_text_from_html() necesita el HTML completo y construye
+# el árbol entero antes de recortar a MAX_CHARS. En páginas de
+# noticias pesadas casi todo ese trabajo se tira.
+#
+# Aquí el HTML se procesa por trozos a medida que llega de la
+# red: se van guardando los textos de los <p> y, en cuanto hay
+# MAX_CHARS caracteres, se deja de leer (y de descargar).
+#
+# Hay dos parsers incrementales:
+#   - "html.parser": HTMLParser de la librería estándar
+#   - "lxml": HTMLPullParser de lxml (más rápido, opcional)
+# "auto" usa lxml si está instalado.
+# --------------------------------------------------------
+
+# Elementos sin contenido ni etiqueta de cierre
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+})
+
+# --------------------------------------------------------
+# Relleno que nunca es parte de la noticia (en cualquier web):
+# menús, cabeceras, pies, formularios… y bloques cuya clase o id
+# empieza por alguna de estas palabras (avisos de cookies,
+# comentarios, noticias relacionadas, newsletter, compartir…).
+# En html/body/main/article no se mira la clase: un
+# <body class="sidebar-open"> no puede vaciar la página.
+# --------------------------------------------------------
+BOILERPLATE_TAGS = frozenset({
+    "nav", "header", "footer", "aside", "form", "figcaption", "noscript", "template", "button", "dialog",
+})
+BOILERPLATE_RE = re.compile(
+    r"(?:^|\s)(?:cookie|consent|gdpr|coment|comment|relacionad|related|recomend|newsletter|suscri|subscri|"
+    r"share|compart|social|promo|banner|sidebar|advert|publicidad|outbrain|taboola|mas-leid|most-read|paywall)",
+    re.IGNORECASE,
+)
+PAGE_TAGS = frozenset({"html", "body", "main", "article"})
+
+# Elementos de bloque que, como en el navegador, cierran un <p> abierto
+CLOSES_P = frozenset({
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figure", "footer", "form",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "main", "nav", "ol", "p", "pre", "section", "table", "ul",
+})
+
+# --------------------------------------------------------
+# Heurística de densidad (dominios sin perfil)
+# Al estilo de Readability: cada <p> de al menos
+# MIN_PARAGRAPH_CHARS caracteres suma su texto (sin el de sus
+# enlaces) a su contenedor y la mitad a su abuelo. Se devuelve
+# el contenedor con más puntos, así los teasers y listados
+# sueltos pierden frente al cuerpo de la noticia.
+#
+# Para no perder el corte temprano se deja de leer cuando un
+# contenedor ya tiene max_chars puntos o cuando se llevan
+# DENSITY_LOOKAHEAD * max_chars caracteres de candidatos.
+# --------------------------------------------------------
+MIN_PARAGRAPH_CHARS = 25
+DENSITY_LOOKAHEAD = 3
+
+
+class _ArticleExtractor(ABC):
+    """Estado común a los dos parsers: pila de elementos, perfil del dominio y párrafos candidatos."""
+
+    def __init__(self, max_chars, profile=GENERIC):
+        self.max_chars = max_chars
+        self.profile = profile
+        self.paragraphs = []       # (texto, ids de sus antepasados, dentro del cuerpo del perfil)
+        self.body_length = 0       # Longitud de " ".join() de los párrafos del cuerpo
+        self.candidate_length = 0
+        self.scores = {}           # id de contenedor → puntos de densidad
+        self.best = 0.0
+        self.done = False
+        self.in_paragraph = False
+        self._stack = []           # (tag, id, es cuerpo, es relleno)
+        self._path = []            # (tag, attrs) de cada elemento abierto, para los selectores
+        self._body_depth = 0
+        self._skip_depth = 0
+        self._link_depth = 0
+        self._ids = itertools.count(1)
+
+    @property
+    def method(self):
+        return "profile" if self.profile.body and any(in_body for *_, in_body in self.paragraphs) else "density"
+
+    def _open(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        names = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+        is_body = any(match(s, tag, attrs, self._path) for s in self.profile.body)
+        is_skip = not is_body and (
+            tag in BOILERPLATE_TAGS
+            or (tag not in PAGE_TAGS and BOILERPLATE_RE.search(names) is not None)
+            or any(match(s, tag, attrs, self._path) for s in self.profile.exclude)
+        )
+        self._stack.append((tag, next(self._ids), is_body, is_skip))
+        self._path.append((tag, attrs))
+        self._body_depth += is_body
+        self._skip_depth += is_skip
+        if tag == "a":
+            self._link_depth += 1
+        elif tag == "p":
+            self.in_paragraph = True
+
+    def _close(self, tag):
+        """Cierra `tag` y todo lo que siga abierto dentro (HTML mal formado)."""
+        if tag in VOID_TAGS:
+            return
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                break
+        else:
+            return  # Cierre sin apertura: se ignora
+        while len(self._stack) > i:
+            self._pop()
+
+    def _close_all(self):
+        while self._stack:
+            self._pop()
+
+    def _pop(self):
+        tag, _, is_body, is_skip = self._stack[-1]
+        if tag == "p":
+            self._end_paragraph()
+            self.in_paragraph = False
+        elif tag == "a":
+            self._link_depth -= 1
+        self._stack.pop()
+        self._path.pop()
+        self._body_depth -= is_body
+        self._skip_depth -= is_skip
+
+    @abstractmethod
+    def _end_paragraph(self):
+        """Pasa a _add_paragraph() el texto (y los caracteres de enlaces) del <p> que se cierra."""
+
+    def _add_paragraph(self, text, link_chars):
+        if self._skip_depth:
+            return
+        ancestors = tuple(entry[1] for entry in self._stack[:-1]) or (0,)
+        in_body = self._body_depth > 0
+        self.paragraphs.append((text, ancestors, in_body))
+        self.candidate_length += len(text)
+        if in_body:
+            self.body_length += len(text) + (1 if self.body_length else 0)
+
+        chars = len(text.strip())
+        if chars >= MIN_PARAGRAPH_CHARS:
+            score = chars - link_chars
+            for node, weight in zip(reversed(ancestors), (1, 0.5)):
+                self.scores[node] = self.scores.get(node, 0) + score * weight
+                self.best = max(self.best, self.scores[node])
+
+        self._check_budget()
+
+    def _check_budget(self):
+        # Comprobación barata primero; la exacta solo cuando ya estamos cerca
+        if self.body_length:
+            if self.body_length > self.max_chars:
+                self.done = len(self.text()) >= self.max_chars
+        elif self.candidate_length >= DENSITY_LOOKAHEAD * self.max_chars:
+            self.done = True  # Cota: el resto de la página no se lee
+        elif not self.profile.body and self.best >= self.max_chars:
+            self.done = len(self.text()) >= self.max_chars
+
+    def text(self):
+        paragraphs = [text for text, _, in_body in self.paragraphs if in_body]
+        if not paragraphs and self.scores:
+            best = max(self.scores, key=self.scores.get)
+            paragraphs = [text for text, ancestors, _ in self.paragraphs if best in ancestors]
+        elif not paragraphs:
+            paragraphs = [text for text, _, _ in self.paragraphs]
+        return " ".join(paragraphs).strip()[:self.max_chars]
+
+
+class _ParagraphCollector(_ArticleExtractor, HTMLParser):
+    """Parser incremental (HTMLParser) que acumula el texto de los <p> hasta un límite."""
+
+    def __init__(self, max_chars, profile=GENERIC):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        _ArticleExtractor.__init__(self, max_chars, profile)
+        self._text = []       # Trozos del <p> abierto
+        self._link_chars = 0
+        self._pending = []    # Trozos del nodo de texto actual
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        # Un <p> (o un <div>, <ul>…) dentro de otro cierra el anterior, como hace el navegador
+        if tag in CLOSES_P and self.in_paragraph:
+            self._close("p")
+        self._open(tag, {name: value or "" for name, value in attrs})
+        if tag == "p":
+            self._text, self._link_chars = [], 0
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        self._close(tag)
+
+    def handle_data(self, data):
+        if self.in_paragraph:
+            self._pending.append(data)
+
+    def _flush_data(self):
+        # Igual que BeautifulSoup: un nodo de texto formado solo por
+        # espacios se reduce a un único "\n" (si lo contiene) o " "
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending = []
+        if not data.strip():
+            data = "\n" if "\n" in data else " "
+        self._text.append(data)
+        if self._link_depth:
+            self._link_chars += len(data)
+
+    def _end_paragraph(self):
+        self._add_paragraph("".join(self._text), self._link_chars)
+
+    def close(self):
+        super().close()
+        self._flush_data()
+        self._close_all()
+
+
+class _LxmlParagraphCollector(_ArticleExtractor):
+    """Misma interfaz que _ParagraphCollector usando lxml.etree.HTMLPullParser."""
+
+    def __init__(self, max_chars, profile=GENERIC):
+        from lxml import etree
+
+        super().__init__(max_chars, profile)
+        self._parser = etree.HTMLPullParser(events=("start", "end"))
+        self._paragraph = None
+
+    def feed(self, data):
+        self._parser.feed(data)
+        for event, element in self._parser.read_events():
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue  # Comentarios e instrucciones de proceso
+            if event == "start":
+                self._open(tag, element.attrib)
+                continue
+
+            self._paragraph = element
+            self._close(tag)
+            if not self.in_paragraph:
+                # Liberamos lo ya procesado para no ir acumulando el árbol
+                element.clear(keep_tail=True)
+            if self.done:
+                return
+
+    def _end_paragraph(self):
+        element = self._paragraph
+        links = sum(len("".join(a.itertext())) for a in element.iter("a"))
+        self._add_paragraph("".join(element.itertext()), links)
+
+    def close(self):
+        if not self.done:
+            self.feed("")
+            self._parser.close()
+            self.feed("")
+
+
+# lxml es opcional: "auto" lo usa si está instalado (sin importarlo hasta que haga falta)
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+
+def _make_collector(parser, max_chars, profile=GENERIC):
+    if parser == "auto":
+        parser = "lxml" if HAS_LXML else "html.parser"
+
+    if parser == "lxml":
+        return _LxmlParagraphCollector(max_chars, profile)
+    if parser == "html.parser":
+        return _ParagraphCollector(max_chars, profile)
+    raise ValueError(f"Parser desconocido: {parser}")
+
+
+def extract_text_from_chunks(chunks, max_chars: int = MAX_CHARS, parser: str = "auto", url: str = None) -> str:
+    """Extrae el texto del artículo a partir de trozos de HTML, parando al llegar a max_chars.
+
+    Con `url` se aplica el perfil de su dominio (profiles.py), si lo hay.
+    """
+    profile = compiled_profile(urlsplit(url).hostname) if url else GENERIC
+    collector = _make_collector(parser, max_chars, profile)
+
+    for chunk in chunks:
+        collector.feed(chunk)
+        if collector.done:
+            break
+    else:
+        collector.close()
+
+    metrics.inc("extraction_total", method=collector.method)
+    return collector.text()
+
+
+# --------------------------------------------------------
+# Descarga con revalidación (caché de páginas, ver PageCache)
+#
+# conditional_get() hace el GET en streaming. Si la URL está en
+# la caché y lo guardado basta para el max_chars pedido (el texto
+# ya extraído o la página entera), la petición lleva
+# If-None-Match / If-Modified-Since. La respuesta recuerda su
+# entrada (response.page_cache) y extract_text_from_response():
+#   - con un 304 devuelve el texto guardado: ni se descarga ni se
+#     parsea la página otra vez
+#   - con un 200 guarda los validadores, el texto y, si se leyó
+#     entera, la página
+# --------------------------------------------------------
+def fresh_text(url, max_chars: int = MAX_CHARS):
+    """Texto de la caché de páginas si aún está fresco (PAGE_CACHE_FRESH_SECONDS); si no, None."""
+    cache = page_cache()
+    text = cache.fresh_text(url, max_chars) if cache is not None else None
+    if text is not None:
+        cache.count(requests=1, fresh=1)
+        metrics.inc("page_cache_total", result="fresh")
+    return text
+
+
+def conditional_get(session, url, max_chars: int = MAX_CHARS, timeout=10):
+    """GET en streaming; condicional si la página está en la caché de páginas."""
+    cache = page_cache()
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and max_chars not in entry.texts and entry.body is None:
+        entry = None  # Lo guardado no llega para este max_chars: descarga normal
+    headers = cache.validators(entry) if entry is not None else None
+
+    response = session.get(url, timeout=timeout, stream=True, headers=headers)
+    if cache is not None:
+        response.page_cache = (cache, url, entry)
+    return response
+
+
+def extract_text_from_response(response, max_chars: int = MAX_CHARS, parser: str = "auto") -> str:
+    """Extrae el texto de una respuesta de requests pedida con stream=True (o con conditional_get())."""
+    cache, url, entry = getattr(response, "page_cache", (None, None, None))
+    if entry is not None and response.status_code == 304:
+        response.close()
+        return _revalidated_text(cache, url, entry, response, max_chars, parser)
+    return _parse_response(response, max_chars, parser, cache, url, entry)
+
+
+@instrumented("parse")
+def _parse_response(response, max_chars, parser, cache=None, url=None, entry=None):
+    # Misma codificación que usaría response.text (cabecera o ISO-8859-1 por defecto)
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    body = []
+    complete = False
+
+    def chunks():
+        nonlocal complete
+        for raw in response.iter_content(chunk_size=CHUNK_SIZE):
+            if cache is not None:
+                body.append(raw)
+            yield decoder.decode(raw)
+        complete = True
+        yield decoder.decode(b"", final=True)
+
+    try:
+        # response.url es la URL final (tras redirecciones): de ella sale el perfil
+        text = extract_text_from_chunks(chunks(), max_chars, parser, getattr(response, "url", None))
+    finally:
+        # Si hemos parado antes de tiempo, cerramos la conexión sin leer el resto
+        response.close()
+
+    if cache is not None:
+        _store_page(cache, url, entry, response, max_chars, text, b"".join(body), complete)
+    return text
+
+
+def _store_page(cache, url, entry, response, max_chars, text, body, complete):
+    """Guarda una página recién descargada (si trae ETag o Last-Modified)."""
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    # Lo que de verdad se leyó (con el corte en max_chars, no la página entera):
+    # es lo que cada 304 se ahorra de descargar
+    size = len(body)
+
+    if response.status_code != 200 or not (etag or last_modified):
+        result = "uncacheable"
+    else:
+        result = "modified" if entry is not None else "misses"
+        cache.store(url, etag, last_modified, response.encoding, size, {max_chars: text}, body if complete else None)
+
+    cache.count(requests=1, bytes_downloaded=len(body), **{result: 1})
+    metrics.inc("page_cache_total", result=result)
+
+
+def _revalidated_text(cache, url, entry, response, max_chars, parser):
+    """Texto de una página que el servidor confirma sin cambios (304)."""
+    text = entry.texts.get(max_chars)
+    texts = None
+    if text is None:
+        # Solo estaba la página entera: se parsea, pero sin descargarla
+        with timer(stage="parse"):
+            html = cache.page_body(entry).decode(entry.encoding or "utf-8", errors="replace")
+            text = extract_text_from_chunks([html], max_chars, parser, getattr(response, "url", None) or url)
+        texts = {**entry.texts, max_chars: text}
+
+    cache.revalidated(url, entry, response.headers.get("ETag"), response.headers.get("Last-Modified"), texts)
+    cache.count(requests=1, revalidated=1, bytes_saved=entry.size, parses_skipped=int(texts is None))
+    metrics.inc("page_cache_total", result="revalidated")
+    metrics.inc("page_cache_bytes_saved_total", entry.size)
+    return text
 
 
 # --------------------------------------------------------
@@ -9,34 +468,29 @@ from bs4 import BeautifulSoup
 #  - evitar repetir descargas en la misma sesión
 #  - acelerar la app
 #  - reducir llamadas al servidor
-# ttl=1800 → la caché dura 30 minutos
+# ttl=1800 → la caché dura 30 minutos; después la página se
+# revalida con la caché de páginas (conditional_get)
 # --------------------------------------------------------
-@st.cache_data(ttl=1800, show_spinner=False)
-def extract_text_from_url(url: str) -> str:
+@cache_data(ttl=1800, show_spinner=False)
+@instrumented("url_extraction")
+def extract_text_from_url(url: str, max_chars: int = MAX_CHARS) -> str:
     try:
-        # --------------------------------------------------------
-        # Descarga el HTML de la página con un timeout de 10s
-        # --------------------------------------------------------
-        html = requests.get(url, timeout=10).text
+        # Extraída hace poco por este u otro proceso (caché de páginas compartida)
+        text = fresh_text(url, max_chars)
+        if text is not None:
+            return text
 
         # --------------------------------------------------------
-        # Analiza el HTML usando BeautifulSoup
-        # "html.parser" → parser estándar incluido en Python
-        # --------------------------------------------------------
-        soup = BeautifulSoup(html, "html.parser")
-
-        # --------------------------------------------------------
-        # Extrae todos los párrafos <p> y obtiene su contenido de texto
-        # Cada elemento p.get_text() devuelve el texto plano sin etiquetas
+        # Descarga el HTML de la página con un timeout de 10s
+        # usando la sesión HTTP compartida (reutiliza conexiones).
+        # stream=True → el cuerpo se lee por trozos y se deja de
+        # descargar en cuanto tenemos max_chars caracteres.
+        # Si ya la teníamos, la petición es condicional (304).
         # --------------------------------------------------------
-        paragraphs = [p.get_text() for p in soup.find_all("p")]
+        with timer(stage="fetch"):
+            response = conditional_get(http_session(), url, max_chars, timeout=10)
 
-        # --------------------------------------------------------
-        # Une todos los párrafos en un solo string
-        # strip() quita espacios extremos
-        # [:5000] limita a 5000 caracteres para evitar textos enormes
-        # --------------------------------------------------------
-        return " ".join(paragraphs).strip()[:5000]
+        return extract_text_from_response(response, max_chars)
 
     except Exception as e:
         # --------------------------------------------------------
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from app.utils.cache import http_session
+from app.utils.extractor import MAX_CHARS, conditional_get, extract_text_from_response, fresh_text
+from app.utils.metrics import timer
+
+
+# Resultado de cada URL: texto extraído o mensaje de error (uno de los dos es None)
+FetchResult = namedtuple("FetchResult", ["url", "text", "error"])
+
+# Códigos HTTP que merece la pena reintentar (saturación o fallo temporal)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Espera máxima que se acepta de un Retry-After. Si el servidor
+# pide más (p. ej. "Retry-After: 3600") no se bloquea un hilo del
+# pool todo ese tiempo: la URL se da por fallida.
+FETCH_MAX_RETRY_AFTER = float(os.getenv("FETCH_MAX_RETRY_AFTER", "5"))
+
+
+# --------------------------------------------------------
+# HostLimiter
+# Limita cuántas descargas simultáneas se hacen contra un mismo
+# dominio, para no saturar (ni ser bloqueados por) un periódico
+# aunque el pool global tenga muchos hilos.
+# --------------------------------------------------------
+class HostLimiter:
+    """Un semáforo por host, creado bajo demanda."""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+def _retry_delay(response, attempt, backoff, max_retry_after=FETCH_MAX_RETRY_AFTER):
+    """Espera antes del siguiente intento: Retry-After si viene, si no backoff exponencial.
+
+    Devuelve None si Retry-After pide esperar más de `max_retry_after` segundos.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = float(retry_after)
+        return delay if delay <= max_retry_after else None
+    return min(backoff * (2 ** attempt), max_retry_after)
+
+
+# --------------------------------------------------------
+# fetch_url()
+# Descarga y extrae el texto de una URL con reintentos.
+#   - Reintenta errores de red, timeouts y códigos 429/5xx.
+#   - Otros códigos (404, 403…) fallan directamente.
+#   - Un Retry-After mayor que max_retry_after tampoco se
+#     espera: la URL falla en ese momento.
+#   - Si la página ya estaba en la caché de páginas, la
+#     petición es condicional y un 304 no descarga nada (o ni
+#     se pregunta, si aún está fresca).
+# --------------------------------------------------------
+def fetch_url(url, session, limiter, timeout=10, retries=3, backoff=0.5, max_chars=MAX_CHARS,
+              max_retry_after=FETCH_MAX_RETRY_AFTER):
+    """Descarga una URL respetando el límite por host y devuelve un FetchResult."""
+    import requests  # Ya cargado por http_session(); aquí solo por sus excepciones
+
+    text = fresh_text(url, max_chars)
+    if text is not None:
+        return FetchResult(url, text, None)
+
+    error = None
+
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            # El cuerpo se lee en streaming dentro del límite por host
+            # y se deja de descargar al llegar a max_chars caracteres
+            with limiter(url):
+                with timer(stage="fetch"):
+                    response = conditional_get(session, url, max_chars, timeout)
+
+                if response.status_code not in RETRY_STATUS:
+                    if not response.ok:
+                        response.close()
+                    response.raise_for_status()
+                    return FetchResult(url, extract_text_from_response(response, max_chars), None)
+
+                response.close()
+
+            error = f"HTTP {response.status_code}"
+
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = str(e)
+
+        except Exception as e:
+            return FetchResult(url, None, f"Error extrayendo texto: {e}")
+
+        if attempt < retries:
+            delay = _retry_delay(response, attempt, backoff, max_retry_after)
+            if delay is None:
+                error += f" (Retry-After {response.headers['Retry-After']} s)"
+                break
+            time.sleep(delay)
+
+    return FetchResult(url, None, f"Error extrayendo texto: {error}")
+
+
+# --------------------------------------------------------
+# fetch_urls()
+# Descarga masiva de URLs en paralelo.
+#
+# - Un pool de hilos acotado comparte la misma sesión HTTP
+#   (y por tanto su pool de conexiones keep-alive).
+# - Como mucho `max_workers * 2` descargas pendientes a la vez,
+#   así miles de URLs no llenan la memoria de futures.
+# - Es un generador: devuelve cada FetchResult en cuanto termina
+#   (no en el orden de entrada), para poder encadenarlo con el
+#   análisis sin esperar a que acabe toda la lista.
+#
+# `session` se puede inyectar (por ejemplo, para pruebas contra
+# un servidor HTTP local); por defecto se usa http_session().
+# --------------------------------------------------------
+def fetch_urls(urls, max_workers=16, per_host=4, timeout=10, retries=3, backoff=0.5,
+               max_chars=MAX_CHARS, session=None, max_retry_after=FETCH_MAX_RETRY_AFTER):
+    """Descarga muchas URLs en paralelo y va devolviendo FetchResult según terminan."""
+    session = session or http_session()
+    limiter = HostLimiter(per_host)
+    max_pending = max_workers * 2
+    urls = iter(urls)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+
+        def submit_next():
+            url = next(urls, None)
+            if url is None:
+                return False
+            pending.add(executor.submit(
+                fetch_url, url, session, limiter, timeout, retries, backoff, max_chars, max_retry_after
+            ))
+            return True
+
+        while len(pending) < max_pending and submit_next():
+            pass
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                submit_next()
@@ -0,0 +1,203 @@
+import os
+import sqlite3
+import threading
+import time
+
+from app.utils.runtime import cache_resource
+
+
+# --------------------------------------------------------
+# HistoryStore
+# Historial de análisis en SQLite, en lugar de una lista en
+# st.session_state que crece sin límite y se repinta entera en
+# cada rerun.
+#
+#   - Índices por fecha y por (idioma | sentimiento |
+#     clasificación, fecha): filtrar y paginar solo lee las
+#     filas de la página pedida, aunque haya 100k+ entradas.
+#   - Acotado: si se superan max_entries se borran las más
+#     antiguas, y también las de más de max_age_days días (se
+#     comprueba cada PRUNE_EVERY altas).
+#   - Una conexión por hilo, modo WAL (igual que AnalysisCache).
+#   - Privado: cada entrada guarda su "owner" y las consultas
+#     solo devuelven las de ese owner. La app usa el usuario de
+#     Streamlit (st.user) o, sin login, un token en la URL
+#     (?historial=…) que sobrevive a las recargas. Las entradas
+#     de enlaces que nadie vuelve a abrir caducan por antigüedad.
+#     Con shared=True (HISTORY_SHARED=1) todos ven el historial
+#     de todos.
+#
+# Las entradas usan las mismas claves que el antiguo historial
+# en memoria: texto, idioma, sentimiento, clasificación, flags,
+# positive_pct, neutral_pct, negative_pct (+ fecha).
+# --------------------------------------------------------
+class HistoryStore:
+    """Historial persistente, filtrable y paginado de análisis."""
+
+    PRUNE_EVERY = 100
+
+    # Filtros admitidos → columna de la tabla
+    FILTERS = {"idioma": "idioma", "sentimiento": "sentimiento", "clasificación": "clasificacion"}
+
+    def __init__(self, path, max_entries=500_000, shared=False, max_age_days=30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.shared = shared
+        self._local = threading.local()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " created_at REAL NOT NULL,"
+            " texto TEXT NOT NULL,"
+            " idioma TEXT,"
+            " sentimiento TEXT,"
+            " clasificacion TEXT,"
+            " flags TEXT,"
+            " positive_pct REAL,"
+            " neutral_pct REAL,"
+            " negative_pct REAL,"
+            " owner TEXT)"
+        )
+        # Historiales creados antes de la columna owner: sus entradas no son de nadie
+        if "owner" not in {r[1] for r in conn.execute("PRAGMA table_info(history)")}:
+            conn.execute("ALTER TABLE history ADD COLUMN owner TEXT")
+
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_history_time ON history(created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_history_owner ON history(owner, created_at)")
+        for column in self.FILTERS.values():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_history_{column} ON history({column}, created_at)")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_history_owner_{column} ON history(owner, {column}, created_at)"
+            )
+        # Al arrancar también se borra lo caducado, aunque nadie analice nada
+        self.prune()
+
+    def _conn(self):
+        """Una conexión por hilo (sqlite3 no permite compartirlas entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def add_many(self, entries, owner=None):
+        """Guarda varias entradas del historial (dicts con las claves de siempre) de `owner`."""
+        if not entries:
+            return
+
+        now = time.time()
+        conn = self._conn()
+        # Una sola transacción para todo el lote (en autocommit, cada fila haría un commit)
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO history (created_at, texto, idioma, sentimiento, clasificacion, flags,"
+                " positive_pct, neutral_pct, negative_pct, owner) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        e.get("fecha", now), e["texto"], e["idioma"], e["sentimiento"], e["clasificación"],
+                        e["flags"], e["positive_pct"], e["neutral_pct"], e["negative_pct"], owner,
+                    )
+                    for e in entries
+                ],
+            )
+
+        self._writes += len(entries)
+        if self._writes >= self.PRUNE_EVERY:
+            self._writes = 0
+            self.prune()
+
+    def add(self, entry, owner=None):
+        self.add_many([entry], owner)
+
+    def prune(self):
+        """Borra las entradas de más de max_age_days días y las más antiguas si se supera max_entries."""
+        conn = self._conn()
+        if self.max_age_days:
+            conn.execute("DELETE FROM history WHERE created_at < ?", (time.time() - self.max_age_days * 86400,))
+        cutoff = conn.execute(
+            "SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?", (self.max_entries,)
+        ).fetchone()
+        if cutoff:
+            conn.execute("DELETE FROM history WHERE id <= ?", (cutoff[0],))
+
+    def _where(self, filters, owner):
+        """Cláusula WHERE para el owner y los filtros no vacíos ({"idioma": "Spanish", ...}).
+
+        Sin historial compartido solo se ven las entradas de `owner`
+        (ninguna si owner es None).
+        """
+        clauses, params = [], []
+        if not self.shared:
+            clauses.append("owner = ?")
+            params.append(owner)
+        for name, value in (filters or {}).items():
+            if value:
+                clauses.append(f"{self.FILTERS[name]} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, filters=None, owner=None):
+        where, params = self._where(filters, owner)
+        return self._conn().execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def page(self, page=1, page_size=20, filters=None, owner=None):
+        """Entradas de una página (la 1 es la más reciente), ya filtradas."""
+        where, params = self._where(filters, owner)
+        rows = self._conn().execute(
+            f"SELECT * FROM history{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, page_size, (page - 1) * page_size),
+        ).fetchall()
+        return [
+            {
+                "fecha": r["created_at"],
+                "texto": r["texto"],
+                "idioma": r["idioma"],
+                "sentimiento": r["sentimiento"],
+                "clasificación": r["clasificacion"],
+                "flags": r["flags"],
+                "positive_pct": r["positive_pct"],
+                "neutral_pct": r["neutral_pct"],
+                "negative_pct": r["negative_pct"],
+            }
+            for r in rows
+        ]
+
+    def distinct(self, name, owner=None):
+        """Valores distintos de un campo filtrable (se leen del índice)."""
+        column = self.FILTERS[name]
+        where, params = self._where(None, owner)
+        where = f"{where} AND" if where else " WHERE"
+        rows = self._conn().execute(
+            f"SELECT DISTINCT {column} FROM history{where} {column} IS NOT NULL ORDER BY {column}", params
+        ).fetchall()
+        return [r[0] for r in rows]
+
+
+# --------------------------------------------------------
+# history_store()
+# Instancia única por proceso de HistoryStore.
+#   HISTORY_PATH        → fichero SQLite del historial
+#   HISTORY_MAX_ENTRIES → máximo de entradas guardadas
+#   HISTORY_SHARED      → 1 para que todas las sesiones vean el
+#                         historial de todas (por defecto, cada
+#                         sesión solo ve el suyo)
+#   HISTORY_MAX_AGE_DAYS → días que se guarda cada entrada (0 = sin límite)
+# --------------------------------------------------------
+@cache_resource(show_spinner=False)
+def history_store():
+    return HistoryStore(
+        path=os.getenv("HISTORY_PATH", os.path.join(".cache", "history.sqlite3")),
+        max_entries=int(os.getenv("HISTORY_MAX_ENTRIES", "500000")),
+        shared=os.getenv("HISTORY_SHARED", "0") == "1",
+        max_age_days=float(os.getenv("HISTORY_MAX_AGE_DAYS", "30")),
+    )
@@ -0,0 +1,284 @@
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("app")
+
+# --------------------------------------------------------
+# Métricas internas (latencias, contadores y coste de Azure)
+#
+# Registro en memoria, por proceso y seguro entre hilos, con
+# dos tipos de métrica al estilo de Prometheus:
+#   - contadores: solo suben (llamadas, fallos de caché,
+#     registros de texto enviados a Azure…)
+#   - histogramas: observaciones agrupadas en buckets
+#     (segundos de cada etapa, esperas del poller…)
+#
+# Se exportan en formato de texto de Prometheus:
+#   - METRICS_PORT → servidor HTTP en /metrics (en METRICS_HOST,
+#     por defecto 127.0.0.1)
+#   - METRICS_FILE → fichero (lo escribe el CLI por lotes al
+#     terminar, y la pestaña Admin bajo demanda)
+#
+# No depende de Streamlit ni de prometheus_client.
+# --------------------------------------------------------
+
+# Buckets (segundos) de los histogramas de latencia
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Buckets de tamaño (registros de texto de Azure por petición)
+SIZE_BUCKETS = (1, 3, 10, 30, 100, 300, 1000, 3000)
+
+PREFIX = "newsapp_"
+
+HELP = {
+    "stage_seconds": "Duración de cada etapa (descarga, extracción, heurísticas, análisis…)",
+    "stage_errors_total": "Etapas que terminaron con excepción",
+    "cache_calls_total": "Llamadas a funciones con @cache_data / @cache_resource",
+    "cache_misses_total": "Llamadas que no estaban en caché y se calcularon",
+    "azure_call_seconds": "Duración de cada llamada al SDK de Azure Language (incluye esperas y reintentos)",
+    "azure_poller_wait_seconds": "Espera al poller de begin_extract_summary",
+    "azure_text_records_total": "Registros de texto estimados (1 por documento y cada 1000 caracteres) por operación",
+    "azure_text_records_per_request": "Registros de texto estimados por análisis enviado a Azure",
+    "extraction_total": "Páginas extraídas con el perfil de su dominio o con la heurística de densidad",
+    "page_cache_total": "Descargas según la caché de páginas (fresh, revalidated = 304, modified, misses, uncacheable)",
+    "page_cache_bytes_saved_total": "Bytes de páginas que no hizo falta descargar gracias a un 304",
+    "worker_tasks_total": "Tareas enviadas al pool de procesos (modo multiproceso)",
+    "worker_task_seconds": "Duración de cada tarea del pool vista desde la app (incluye la espera en cola)",
+}
+
+
+class Histogram:
+    """Histograma acumulado con buckets fijos."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "min", "max")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # El último es +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimación del cuantil q (interpolando dentro del bucket y acotada a [min, max])."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen, lower = 0, self.min
+        for upper, n in zip((*self.buckets, float("inf")), self.counts):
+            if n and seen + n >= target:
+                upper = min(upper, self.max)
+                lower = max(min(lower, upper), self.min)
+                return lower + (upper - lower) * (target - seen) / n
+            seen += n
+            lower = upper
+        return self.max
+
+    def copy(self):
+        h = Histogram(self.buckets)
+        h.counts, h.sum, h.count = list(self.counts), self.sum, self.count
+        h.min, h.max = self.min, self.max
+        return h
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    items = [*labels, *extra]
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self):
+        """Copia de (contadores, histogramas) indexados por (nombre, etiquetas)."""
+        with self._lock:
+            return dict(self._counters), {k: h.copy() for k, h in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """Todas las métricas en formato de texto de Prometheus."""
+        counters, histograms = self.snapshot()
+        lines = []
+
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+
+        for name in sorted({n for n, _ in histograms}):
+            lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for (n, labels), h in sorted(histograms.items(), key=lambda item: item[0]):
+                if n != name:
+                    continue
+                cumulative = 0
+                for upper, count in zip((*h.buckets, "+Inf"), h.counts):
+                    cumulative += count
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', upper)])} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {round(h.sum, 6)}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {h.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def inc(name, value=1, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    REGISTRY.observe(name, value, buckets, **labels)
+
+
+@contextmanager
+def timer(name="stage_seconds", **labels):
+    """Mide la duración del bloque with en el histograma `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - started, **labels)
+
+
+def instrumented(stage):
+    """Decorador: duración de cada llamada y excepciones, con la etiqueta stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                REGISTRY.inc("stage_errors_total", stage=stage)
+                raise
+            finally:
+                REGISTRY.observe("stage_seconds", time.perf_counter() - started, stage=stage)
+        return wrapper
+    return decorator
+
+
+def histogram_summary(name):
+    """Por cada combinación de etiquetas: (etiquetas, n, media, p50, p95, p99)."""
+    _, histograms = REGISTRY.snapshot()
+    return [
+        (dict(labels), h.count, h.sum / h.count, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+        for (n, labels), h in sorted(histograms.items(), key=lambda item: item[0])
+        if n == name and h.count
+    ]
+
+
+def counter_values(name):
+    """Por cada combinación de etiquetas: (etiquetas, valor)."""
+    counters, _ = REGISTRY.snapshot()
+    return [(dict(labels), value) for (n, labels), value in sorted(counters.items()) if n == name]
+
+
+def azure_text_records(texts):
+    """Registros de texto que Azure factura por operación: 1 por cada 1000 caracteres."""
+    return sum(max(1, -(-len(t) // 1000)) for t in texts)
+
+
+# --------------------------------------------------------
+# Exportación
+# --------------------------------------------------------
+def write_metrics(path=None):
+    """Escribe las métricas en `path` (o METRICS_FILE). Devuelve la ruta, o None."""
+    path = path or os.getenv("METRICS_FILE")
+    if not path:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp, path)  # Quien lo lea nunca ve un fichero a medias
+    return path
+
+
+def _metrics_handler():
+    # http.server solo se importa si se abre el endpoint
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # Sin una línea de log por cada scrape
+
+    return MetricsHandler
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None):
+    """Arranca (una vez por proceso) el endpoint /metrics si hay METRICS_PORT."""
+    global _server
+    port = port or os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            from http.server import ThreadingHTTPServer
+
+            try:
+                host = os.getenv("METRICS_HOST", "127.0.0.1")
+                _server = ThreadingHTTPServer((host, int(port)), _metrics_handler())
+            except OSError as e:
+                logger.warning("No se pudo abrir el puerto de métricas %s: %s", port, e)
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True, name="metrics").start()
+        return _server
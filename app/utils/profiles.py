@@ -0,0 +1,179 @@
+import functools
+import json
+import logging
+import re
+from collections import namedtuple
+from dataclasses import dataclass
+
+from app.utils.runtime import get_secret
+
+logger = logging.getLogger("app")
+
+# --------------------------------------------------------
+# Perfiles de extracción por dominio
+#
+# Cada perfil dice dónde está el cuerpo de la noticia en las
+# páginas de ese periódico y qué bloques de dentro hay que
+# descartar (teasers de "Lee también", cajas de newsletter…).
+# Se escriben con un subconjunto de selectores CSS:
+#   tag   .clase   #id   [attr]   [attr=v]  [attr*=v]  [attr^=v]  [attr~=v]
+# combinados ("div.cuerpo[data-x=1]") y con descendiente ("article .cuerpo").
+#
+# Los dominios sin perfil (o cuyo selector ya no encuentra nada,
+# porque el periódico cambió su HTML) usan la heurística de
+# densidad de texto de extractor.py.
+#
+# Se pueden añadir o sustituir perfiles sin tocar el código con un
+# JSON en EXTRACTION_PROFILES_PATH:
+#   {"midiario.es": {"body": [".texto-noticia"], "exclude": [".lee-tambien"]}}
+# --------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class ExtractionProfile:
+    """Reglas de extracción de un dominio."""
+    body: tuple = ()      # Contenedores del cuerpo del artículo
+    exclude: tuple = ()   # Bloques a descartar dentro del cuerpo
+
+
+PROFILES = {
+    "elpais.com": ExtractionProfile(
+        body=("[data-dtm-region=articulo_cuerpo]", "article .a_c"),
+        exclude=(".a_ei", "[data-dtm-region=articulo_apoyos]"),
+    ),
+    "elmundo.es": ExtractionProfile(
+        body=(".ue-c-article__body",),
+        exclude=(".ue-c-article__related", ".ue-c-article__premium"),
+    ),
+    "20minutos.es": ExtractionProfile(
+        body=(".article-text",),
+        exclude=(".article-related", ".content-related"),
+    ),
+    "rtve.es": ExtractionProfile(
+        body=(".artBody",),
+        exclude=(".relacionados", ".mediaBox"),
+    ),
+    "lavanguardia.com": ExtractionProfile(
+        body=(".article-modules",),
+        exclude=(".related-content", ".newsletter-box"),
+    ),
+}
+
+
+# --------------------------------------------------------
+# Selectores compilados
+# Un selector se compila a una tupla de Compound (del más externo
+# al más interno). match() comprueba el elemento con el último y
+# sus antepasados con los anteriores.
+# --------------------------------------------------------
+Compound = namedtuple("Compound", ["tag", "id", "classes", "attrs"])
+
+_COMPOUND_RE = re.compile(r"(?P<tag>\*|[a-zA-Z][\w-]*)?(?P<rest>(?:[.#][\w-]+|\[[^\]]+\])*)$")
+_PART_RE = re.compile(r"([.#])([\w-]+)|\[\s*([\w:-]+)\s*(?:([*^~]?=)\s*[\"']?([^\"'\]]*)[\"']?\s*)?\]")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_selector(selector):
+    """Compila "article .cuerpo" a una tupla de Compound (ValueError si no se admite)."""
+    compounds = []
+    for token in selector.split():
+        m = _COMPOUND_RE.match(token)
+        if not m or not (m["tag"] or m["rest"]):
+            raise ValueError(f"Selector no admitido: {selector!r}")
+        tag = m["tag"].lower() if m["tag"] and m["tag"] != "*" else None
+        element_id, classes, attrs = None, set(), []
+        for prefix, name, attr, op, value in _PART_RE.findall(m["rest"]):
+            if prefix == "#":
+                element_id = name
+            elif prefix == ".":
+                classes.add(name)
+            else:
+                attrs.append((attr.lower(), op or None, value))
+        compounds.append(Compound(tag, element_id, frozenset(classes), tuple(attrs)))
+    if not compounds:
+        raise ValueError("Selector vacío")
+    return tuple(compounds)
+
+
+def _match_compound(compound, tag, attrs):
+    if compound.tag and compound.tag != tag:
+        return False
+    if compound.id and attrs.get("id") != compound.id:
+        return False
+    if compound.classes and not compound.classes <= set((attrs.get("class") or "").split()):
+        return False
+    for name, op, value in compound.attrs:
+        actual = attrs.get(name)
+        if actual is None:
+            return False
+        if op == "=" and actual != value:
+            return False
+        if op == "*=" and value not in actual:
+            return False
+        if op == "^=" and not actual.startswith(value):
+            return False
+        if op == "~=" and value not in actual.split():
+            return False
+    return True
+
+
+def match(selector, tag, attrs, ancestors):
+    """¿Casa el elemento (tag, attrs) con el selector compilado? ancestors: [(tag, attrs)] de fuera a dentro."""
+    if not _match_compound(selector[-1], tag, attrs):
+        return False
+    remaining = len(selector) - 2
+    for ancestor_tag, ancestor_attrs in reversed(ancestors):
+        if remaining < 0:
+            break
+        if _match_compound(selector[remaining], ancestor_tag, ancestor_attrs):
+            remaining -= 1
+    return remaining < 0
+
+
+# --------------------------------------------------------
+# Perfil compilado por host
+# Se busca el dominio más específico ("www.elpais.com" →
+# "www.elpais.com", "elpais.com", "com") y se guarda con sus
+# selectores ya compilados: cada host se resuelve una sola vez.
+# --------------------------------------------------------
+CompiledProfile = namedtuple("CompiledProfile", ["domain", "body", "exclude"])
+
+GENERIC = CompiledProfile(None, (), ())
+
+
+@functools.lru_cache(maxsize=4096)
+def compiled_profile(host):
+    """Perfil (con los selectores compilados) que se aplica a un host."""
+    parts = (host or "").lower().split(":")[0].split(".")
+    for i in range(len(parts)):
+        domain = ".".join(parts[i:])
+        profile = PROFILES.get(domain)
+        if profile is not None:
+            return CompiledProfile(
+                domain,
+                tuple(compile_selector(s) for s in profile.body),
+                tuple(compile_selector(s) for s in profile.exclude),
+            )
+    return GENERIC
+
+
+def register_profile(domain, body=(), exclude=()):
+    """Añade o sustituye el perfil de un dominio."""
+    profile = ExtractionProfile(tuple(body), tuple(exclude))
+    for selector in (*profile.body, *profile.exclude):
+        compile_selector(selector)  # Falla ya si algún selector no se admite
+    PROFILES[domain.lower()] = profile
+    compiled_profile.cache_clear()
+
+
+def load_profiles(path):
+    """Registra los perfiles de un fichero JSON {dominio: {"body": [...], "exclude": [...]}}."""
+    with open(path, encoding="utf-8") as f:
+        for domain, rules in json.load(f).items():
+            register_profile(domain, rules.get("body", ()), rules.get("exclude", ()))
+
+
+_profiles_path = get_secret("EXTRACTION_PROFILES_PATH")
+if _profiles_path:
+    try:
+        load_profiles(_profiles_path)
+    except (OSError, ValueError) as e:
+        logger.warning("No se pudieron cargar los perfiles de %s: %s", _profiles_path, e)
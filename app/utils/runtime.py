@@ -0,0 +1,159 @@
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+
+from app.utils import metrics
+
+logger = logging.getLogger("app")
+
+
+# --------------------------------------------------------
+# streamlit_active()
+# Indica si el código se está ejecutando dentro de una app de
+# Streamlit (streamlit run …).
+#
+# Solo miramos sys.modules: si Streamlit no se ha importado ya,
+# NO lo importamos. Así los workers y la CLI por lotes
+# (python -m app.batch) arrancan sin cargar Streamlit.
+# --------------------------------------------------------
+def streamlit_active():
+    if "streamlit" not in sys.modules:
+        return False
+    from streamlit import runtime
+    return runtime.exists()
+
+
+def _script_thread():
+    """True si el hilo actual ejecuta el script de una sesión de Streamlit."""
+    if not streamlit_active():
+        return False
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+# --------------------------------------------------------
+# get_secret()
+# Obtiene una variable primero desde .streamlit/secrets.toml
+# y si no existe, intenta obtenerla como variable de entorno.
+#
+# Esto permite:
+#   - Usar credenciales en producción (Streamlit Cloud)
+#   - Usar variables locales en desarrollo
+#   - Evitar exponer claves en el código
+# --------------------------------------------------------
+def get_secret(name, default=None):
+    """Obtiene la credencial desde Streamlit Cloud o variable de entorno."""
+    if streamlit_active():
+        try:
+            # 🔹 Primero intenta leer desde Streamlit Cloud
+            import streamlit as st
+            value = st.secrets.get(name)
+            if value:
+                return value
+        except Exception:
+            pass
+
+    # 🔹 Si falla (por ejemplo, en Docker, local o sin Streamlit), busca en variables del sistema
+    return os.getenv(name, default)
+
+
+# --------------------------------------------------------
+# notify_error()
+# Dentro de Streamlit muestra el error en pantalla (st.error);
+# fuera de Streamlit lo envía al log.
+#
+# Los hilos en segundo plano (JobQueue, pools de ThreadPoolExecutor)
+# no tienen ScriptRunContext: un st.error ahí no se ve en ninguna
+# sesión, así que también van al log.
+# --------------------------------------------------------
+def notify_error(message):
+    if _script_thread():
+        import streamlit as st
+        st.error(message)
+    else:
+        logger.error(message)
+
+
+# --------------------------------------------------------
+# cache_data() / cache_resource()
+# Equivalentes a @st.cache_data y @st.cache_resource.
+#
+# Con Streamlit activo se usan los decoradores originales.
+# Sin Streamlit se usa una caché en memoria sencilla:
+#   - cache_data: memoiza por argumentos, con TTL y tamaño máximo
+#     (LRU, 256 entradas si no se indica max_entries)
+#   - cache_resource: una única instancia por argumentos y proceso
+#
+# En ambos casos se cuentan las llamadas y los fallos (cuando
+# la función se ejecuta de verdad) en metrics.py, así se ve la
+# tasa de aciertos de cada función cacheada.
+# --------------------------------------------------------
+def _count_cache(kind, make_cached):
+    """Envuelve la función para contar llamadas (fuera) y fallos (dentro de la caché)."""
+    def decorator(func):
+        labels = {"cache": kind, "function": func.__qualname__}
+
+        @functools.wraps(func)
+        def compute(*args, **kw):
+            metrics.inc("cache_misses_total", **labels)
+            return func(*args, **kw)
+
+        cached = make_cached(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kw):
+            metrics.inc("cache_calls_total", **labels)
+            return cached(*args, **kw)
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator
+
+
+def cache_data(ttl=None, max_entries=None, **kwargs):
+    if streamlit_active():
+        import streamlit as st
+        return _count_cache("data", st.cache_data(ttl=ttl, max_entries=max_entries, **kwargs))
+
+    def decorator(func):
+        entries = {}  # clave → (instante de caducidad, valor); el orden de inserción hace de LRU
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kw):
+            key = (args, tuple(sorted(kw.items())))
+            now = time.monotonic()
+            with lock:
+                hit = entries.pop(key, None)
+                if hit is not None and hit[0] > now:
+                    entries[key] = hit
+                    return hit[1]
+
+            value = func(*args, **kw)
+            with lock:
+                entries[key] = (now + ttl if ttl else float("inf"), value)
+                while len(entries) > (max_entries or 256):
+                    entries.pop(next(iter(entries)))
+            return value
+
+        wrapper.clear = entries.clear
+        return wrapper
+
+    return _count_cache("data", decorator)
+
+
+def cache_resource(**kwargs):
+    if streamlit_active():
+        import streamlit as st
+        return _count_cache("resource", st.cache_resource(**kwargs))
+
+    def decorator(func):
+        wrapper = functools.lru_cache(maxsize=None)(func)
+        wrapper.clear = wrapper.cache_clear
+        return wrapper
+
+    return _count_cache("resource", decorator)
@@ -0,0 +1,102 @@
+"""
+Benchmark de la extracción de texto HTML.
+
+Compara, sobre una página de noticias sintética "pesada" (scripts,
+estilos, menús, comentarios y un artículo largo):
+  - bs4:          descarga completa + BeautifulSoup(html.parser) + recorte
+  - stream-html:  lectura por trozos + HTMLParser incremental con corte temprano
+  - stream-lxml:  lectura por trozos + lxml.HTMLPullParser (si está instalado)
+
+Para cada modo informa del tiempo por página, el pico de memoria
+(tracemalloc) y cuántos KB de HTML llegó a leer.
+
+Uso:
+    python -m benchmarks.bench_extractor
+    python -m benchmarks.bench_extractor --page-kb 4000 --max-chars 5000
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from app.utils.extractor import CHUNK_SIZE, HAS_LXML, extract_text_from_chunks, extract_text_from_html
+
+PARAGRAPH = (
+    "<p>El Ayuntamiento aprobó ayer en pleno el nuevo plan de movilidad, que "
+    "según el equipo de gobierno reducirá el tráfico en el centro un <b>20%</b> "
+    "antes de 2027 &amp; ampliará la red de carriles bici.</p>\n"
+)
+
+
+def make_page(page_kb):
+    """Página con el artículo arriba y mucho HTML "de relleno" detrás."""
+    head = "<html><head><style>" + ".c{color:red}" * 2000 + "</style>"
+    head += "<script>" + "var x = '<p>no</p>';" * 2000 + "</script></head><body>"
+    nav = "<nav>" + "".join(f"<a href='/s{i}'>Sección {i}</a>" for i in range(200)) + "</nav>"
+    article = "<article>" + PARAGRAPH * 60 + "</article>"
+    page = head + nav + article
+    filler = "<div class='comment'><p>Comentario de un lector sobre la noticia.</p></div>\n"
+    while len(page) < page_kb * 1024:
+        page += filler * 200
+    return page + "</body></html>"
+
+
+def chunks_of(data, counter):
+    for i in range(0, len(data), CHUNK_SIZE):
+        chunk = data[i:i + CHUNK_SIZE]
+        counter[0] += len(chunk)
+        yield chunk.decode("utf-8")
+
+
+def run_bs4(data, max_chars):
+    counter = [len(data)]  # Descarga completa
+    return extract_text_from_html(data.decode("utf-8"), max_chars), counter[0]
+
+
+def run_stream(parser):
+    def run(data, max_chars):
+        counter = [0]
+        return extract_text_from_chunks(chunks_of(data, counter), max_chars, parser), counter[0]
+    return run
+
+
+def measure(func, data, max_chars, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text, read = func(data, max_chars)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(data, max_chars)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, statistics.median(times), peak, read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-kb", type=int, default=1500, help="tamaño de la página sintética")
+    parser.add_argument("--max-chars", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = make_page(args.page_kb).encode("utf-8")
+    modes = {"bs4": run_bs4, "stream-html": run_stream("html.parser")}
+    if HAS_LXML:
+        modes["stream-lxml"] = run_stream("lxml")
+    else:
+        print("(lxml no instalado: se omite stream-lxml)")
+
+    print(f"Página: {len(data) / 1024:.0f} KB, límite: {args.max_chars} caracteres\n")
+    print(f"{'modo':<14}{'ms/página':>11}{'pico KB':>10}{'KB leídos':>11}  ¿igual a bs4?")
+
+    reference = None
+    for name, func in modes.items():
+        text, seconds, peak, read = measure(func, data, args.max_chars, args.repeat)
+        reference = text if reference is None else reference
+        print(f"{name:<14}{seconds * 1000:>11.1f}{peak / 1024:>10.0f}{read / 1024:>11.0f}  {text == reference}")
+
+
+if __name__ == "__main__":
+    main()
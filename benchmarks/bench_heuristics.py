@@ -0,0 +1,107 @@
+"""
+Microbenchmark del motor de heurísticas.
+
+Compara el matcher compilado de una sola pasada (find_cues) con la
+implementación anterior (un re.search por patrón y lista) sobre:
+  - artículos largos (throughput en MB/s)
+  - un corpus grande de artículos cortos (artículos/s)
+
+Uso:
+    python -m benchmarks.bench_heuristics
+    python -m benchmarks.bench_heuristics --docs 20000 --long-chars 500000
+"""
+import argparse
+import random
+import re
+import time
+
+from app.services.heuristics import (
+    BIAS_WORDS, CLICKBAIT_PATTERNS, FAKE_NEWS_CUES, SATIRE_CUES, run_heuristics,
+)
+
+FILLER = (
+    "el gobierno anunció hoy una nueva medida para la economía del país según "
+    "fuentes oficiales que confirmaron los datos del último trimestre en una rueda "
+    "de prensa celebrada en la capital ante representantes de varios sectores"
+).split()
+
+CUES = ["increíble", "escándalo", "falso", "parodia", "última hora", "propaganda", "bulo"]
+
+
+# -----------------------------
+# Implementación anterior (referencia)
+# -----------------------------
+def legacy_heuristics(text):
+    flags = []
+    for pat in CLICKBAIT_PATTERNS:
+        if re.search(pat, text, re.IGNORECASE):
+            flags.append("Posible clickbait")
+            break
+    for word in BIAS_WORDS:
+        if re.search(rf"\b{word}\b", text, re.IGNORECASE):
+            flags.append("Lenguaje sesgado o emocional")
+            break
+    flags = flags or ["Sin señales de manipulación detectadas"]
+
+    t = text.lower()
+    if any(w in t for w in SATIRE_CUES):
+        classification = "Sátira o contenido humorístico"
+    elif any(w in t for w in FAKE_NEWS_CUES):
+        classification = "Posible fake news o desinformación"
+    elif any(re.search(pat, t) for pat in CLICKBAIT_PATTERNS):
+        classification = "Contenido informativo con fuerte clickbait"
+    else:
+        classification = "Informativo o neutral"
+    return flags, classification
+
+
+def make_article(rng, n_words, cue_rate=0.002):
+    words = [rng.choice(CUES) if rng.random() < cue_rate else rng.choice(FILLER)
+             for _ in range(n_words)]
+    return " ".join(words)
+
+
+def timeit(func, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            func(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000, help="artículos del corpus")
+    parser.add_argument("--doc-words", type=int, default=400, help="palabras por artículo del corpus")
+    parser.add_argument("--long-chars", type=int, default=200_000, help="caracteres del artículo largo")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = [make_article(rng, args.doc_words) for _ in range(args.docs)]
+    long_article = make_article(rng, args.long_chars // 7)[:args.long_chars]
+
+    # Los dos matchers deben dar las mismas red flags (la clasificación
+    # ahora es puntuada, no por prioridad: ver eval_classifier.py)
+    for doc in corpus[:500] + [long_article]:
+        assert run_heuristics(doc)[0] == legacy_heuristics(doc)[0]
+
+    clean_article = make_article(rng, args.long_chars // 7, cue_rate=0)[:args.long_chars]
+
+    print(f"{'caso':<28}{'MB/s antes':>12}{'MB/s ahora':>12}{'art/s antes':>13}{'art/s ahora':>13}{'mejora':>9}")
+
+    for name, docs in [
+        ("artículo largo", [long_article]),
+        ("artículo largo sin pistas", [clean_article]),
+        (f"corpus ({len(corpus)} art.)", corpus),
+    ]:
+        chars = sum(map(len, docs)) / 1e6
+        old = timeit(legacy_heuristics, docs, args.repeat)
+        new = timeit(run_heuristics, docs, args.repeat)
+        print(f"{name:<28}{chars / old:>12.1f}{chars / new:>12.1f}"
+              f"{len(docs) / old:>13.1f}{len(docs) / new:>13.1f}{old / new:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
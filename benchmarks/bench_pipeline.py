@@ -0,0 +1,289 @@
+"""
+Benchmark de extremo a extremo sin red: descarga → extracción →
+heurísticas → Azure Language (simulado).
+
+Arranca en procesos aparte:
+  - el mock de Azure Language (benchmarks/mock_azure.py), con
+    latencia, throttling y fallos configurables
+  - el servidor de páginas HTML del corpus sintético
+    (benchmarks/corpus.py)
+y mide tres modos de uso:
+  - single:  un artículo cada vez, como el botón de la app
+  - batched: bloques de --batch-size URLs (fetch_urls + analyze_long_texts)
+  - bulk:    el CLI por lotes (app.batch.process_records) sobre todo el corpus
+
+Para cada modo informa de artículos/s, latencia por artículo
+(p50/p95/p99), pico de memoria residente y errores. Cada modo usa
+artículos distintos, así ninguna caché esconde el trabajo real.
+
+Con --json se guardan los resultados; con --compare se comparan
+con los de otro commit:
+
+    python -m benchmarks.bench_pipeline --json base.json
+    git checkout otra-rama
+    python -m benchmarks.bench_pipeline --compare base.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+
+from benchmarks import corpus, mock_azure
+
+MODES = ("single", "batched", "bulk")
+
+
+# -----------------------------
+# Servidores auxiliares
+# -----------------------------
+def _run_server(kind, options, queue):
+    if kind == "azure":
+        mock_azure.serve(mock_azure.build_parser().parse_args(options), ready=queue.put)
+    else:
+        corpus.serve(**options, ready=queue.put)
+
+
+def start_server(kind, options):
+    """Lanza un servidor en otro proceso y devuelve (proceso, puerto)."""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_server, args=(kind, options, queue), daemon=True)
+    process.start()
+    return process, queue.get(timeout=30)
+
+
+def mock_stats(base):
+    with urllib.request.urlopen(f"{base}/stats") as response:
+        return json.loads(response.read())
+
+
+# -----------------------------
+# Medidas
+# -----------------------------
+class RssSampler:
+    """Pico de memoria residente del proceso mientras dura el bloque with."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    @staticmethod
+    def rss():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            # Sin /proc (macOS…): máximo histórico del proceso
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = self.rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))] if values else 0.0
+
+
+# -----------------------------
+# Modos
+# -----------------------------
+def run_single(urls, args):
+    from app.services.chunking import CHUNK_CHARS, analyze_long_text
+    from app.services.heuristics import run_heuristics
+    from app.services.language import analyze_text
+    from app.utils.extractor import FULL_ARTICLE_CHARS, extract_text_from_url
+
+    latencies, errors = [], 0
+    for url in urls:
+        started = time.perf_counter()
+        text = extract_text_from_url(url, FULL_ARTICLE_CHARS)
+        run_heuristics(text)
+        result = analyze_text(text) if len(text) <= CHUNK_CHARS else analyze_long_text(text)
+        errors += "error" in result
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def run_batched(urls, args):
+    from app.services.chunking import analyze_long_texts
+    from app.services.heuristics import run_heuristics
+    from app.utils.extractor import FULL_ARTICLE_CHARS
+    from app.utils.fetcher import fetch_urls
+
+    latencies, errors = [], 0
+    for i in range(0, len(urls), args.batch_size):
+        started = time.perf_counter()
+        fetched = list(fetch_urls(urls[i:i + args.batch_size], max_workers=args.workers, max_chars=FULL_ARTICLE_CHARS))
+        texts = [f.text for f in fetched if f.text]
+        errors += len(fetched) - len(texts)
+        for text in texts:
+            run_heuristics(text)
+        errors += sum("error" in r for r in analyze_long_texts(texts))
+        # Cada artículo del bloque espera a que termine el bloque entero
+        latencies += [time.perf_counter() - started] * len(fetched)
+    return latencies, errors
+
+
+def run_bulk(urls, args):
+    from app.batch import process_records
+    from app.utils.extractor import FULL_ARTICLE_CHARS
+
+    records = ({"id": i, "url": url} for i, url in enumerate(urls))
+    latencies, errors = [], 0
+    block_started = time.perf_counter()
+    for n, out in enumerate(process_records(records, args.bulk_batch_size,
+                                            max_workers=args.workers, max_chars=FULL_ARTICLE_CHARS), 1):
+        errors += bool(out.get("error"))
+        latencies.append(time.perf_counter() - block_started)
+        if n % args.bulk_batch_size == 0:
+            block_started = time.perf_counter()
+    return latencies, errors
+
+
+RUNNERS = {"single": run_single, "batched": run_batched, "bulk": run_bulk}
+
+
+# -----------------------------
+# Informe
+# -----------------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    print(f"{'modo':<9}{'artículos':>10}{'art/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'RSS MB':>9}{'errores':>9}{'429':>6}{'500':>6}")
+    for mode, r in results.items():
+        print(f"{mode:<9}{r['articles']:>10}{r['articles_per_sec']:>9.1f}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}"
+              f"{r['p99_ms']:>10.0f}{r['peak_rss_mb']:>9.0f}{r['errors']:>9}{r['throttled']:>6}{r['failed']:>6}")
+
+
+def print_comparison(results, baseline):
+    print(f"\nComparación con {baseline.get('commit') or 'la referencia'}:")
+    for mode, r in results.items():
+        old = baseline["modes"].get(mode)
+        if not old:
+            continue
+        speed = r["articles_per_sec"] / old["articles_per_sec"] - 1 if old["articles_per_sec"] else 0
+        p95 = r["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0
+        print(f"  {mode:<9} art/s {speed:+.1%}   p95 {p95:+.1%}   RSS {r['peak_rss_mb'] - old['peak_rss_mb']:+.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES), help="modos separados por comas")
+    parser.add_argument("--articles", type=int, default=200, help="artículos en los modos batched y bulk")
+    parser.add_argument("--single-articles", type=int, default=20, help="artículos en el modo single")
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--bulk-batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=16, help="descargas simultáneas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fixture-latency-ms", type=float, default=20)
+    parser.add_argument("--boilerplate-kb", type=int, default=40)
+    parser.add_argument("--azure-latency-ms", type=float, default=80)
+    parser.add_argument("--per-doc-ms", type=float, default=2)
+    parser.add_argument("--summary-ms", type=float, default=300)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0)
+    parser.add_argument("--json", help="guarda los resultados en este fichero")
+    parser.add_argument("--compare", help="compara con resultados guardados con --json")
+    args = parser.parse_args(argv)
+
+    azure, azure_port = start_server("azure", [
+        "--port", "0", "--seed", str(args.seed),
+        "--latency-ms", str(args.azure_latency_ms), "--per-doc-ms", str(args.per_doc_ms),
+        "--summary-ms", str(args.summary_ms), "--throttle-rate", str(args.throttle_rate),
+        "--failure-rate", str(args.failure_rate), "--max-rps", str(args.max_rps),
+    ])
+    fixtures, fixtures_port = start_server("fixtures", {
+        "port": 0, "latency_ms": args.fixture_latency_ms, "seed": args.seed, "boilerplate_kb": args.boilerplate_kb,
+    })
+    azure_base = f"http://127.0.0.1:{azure_port}"
+
+    # La configuración de la app se lee al importarla: se fija antes
+    tmp = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ.update({
+        "AZURE_LANGUAGE_ENDPOINT": azure_base,
+        "AZURE_LANGUAGE_KEY": "benchmark",
+        "ANALYSIS_BACKEND": "azure",
+        "ANALYSIS_CACHE_PATH": os.path.join(tmp, "analysis.sqlite3"),
+        "DEDUP_INDEX_PATH": os.path.join(tmp, "dedup.sqlite3"),
+        "HISTORY_PATH": os.path.join(tmp, "history.sqlite3"),
+        "PAGE_CACHE_PATH": os.path.join(tmp, "pages.sqlite3"),
+    })
+    os.environ.setdefault("AZURE_LANGUAGE_RATE_PER_MINUTE", "100000")
+    # El corpus sale de plantillas: con la deduplicación activa casi
+    # nada llegaría a Azure (se puede activar con DEDUP_ENABLED=1)
+    os.environ.setdefault("DEDUP_ENABLED", "0")
+
+    results = {}
+    offset = 0
+    try:
+        for mode in args.modes.split(","):
+            count = args.single_articles if mode == "single" else args.articles
+            urls = [f"http://127.0.0.1:{fixtures_port}/articles/{n}.html" for n in range(offset, offset + count)]
+            offset += count
+
+            before = mock_stats(azure_base)
+            with RssSampler() as rss:
+                started = time.perf_counter()
+                latencies, errors = RUNNERS[mode](urls, args)
+                elapsed = time.perf_counter() - started
+            after = mock_stats(azure_base)
+
+            results[mode] = {
+                "articles": count,
+                "seconds": round(elapsed, 3),
+                "articles_per_sec": round(count / elapsed, 2),
+                "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "peak_rss_mb": round(rss.peak / 2**20, 1),
+                "errors": errors,
+                "azure_requests": after["requests"] - before["requests"],
+                "throttled": after["throttled"] - before["throttled"],
+                "failed": after["failed"] - before["failed"],
+            }
+    finally:
+        azure.terminate()
+        fixtures.terminate()
+
+    print_report(results)
+
+    report = {"commit": git_commit(), "config": vars(args), "modes": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
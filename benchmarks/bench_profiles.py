@@ -0,0 +1,106 @@
+"""
+Benchmark de precisión y tamaño de la extracción de texto.
+
+Sobre páginas del corpus sintético (benchmarks/corpus.py), cuyo
+texto real se conoce, compara:
+  - todos-p:   todos los <p> de la página (la extracción anterior)
+  - densidad:  heurística de densidad, sin perfil de dominio
+  - perfil:    perfil del dominio (selectores del cuerpo y exclusiones)
+
+con dos maquetas: "diario" (clases con significado, con perfil
+registrado) y "generico" (clases opacas: solo densidad).
+
+Para cada combinación informa de los caracteres extraídos por
+artículo, precisión y exhaustividad por palabras frente al texto
+real, registros de texto de Azure (3 operaciones por artículo) y
+milisegundos por página.
+
+Uso:
+    python -m benchmarks.bench_profiles
+    python -m benchmarks.bench_profiles --articles 500 --max-chars 5000
+"""
+import argparse
+import re
+import statistics
+import time
+from collections import Counter
+
+from app.utils.extractor import CHUNK_SIZE, FULL_ARTICLE_CHARS, extract_text_from_chunks, extract_text_from_html
+from app.utils.metrics import azure_text_records
+from app.utils.profiles import register_profile
+from benchmarks.corpus import article_html, make_corpus
+
+_WORD_RE = re.compile(r"\w+")
+
+# Perfil del periódico de la maqueta "diario"
+PROFILE_DOMAIN = "diario.example"
+
+
+def words(text):
+    return Counter(_WORD_RE.findall(text.lower()))
+
+
+def accuracy(extracted, truth):
+    """(precisión, exhaustividad) por palabras."""
+    got, expected = words(extracted), words(truth)
+    common = sum((got & expected).values())
+    return common / max(1, sum(got.values())), common / max(1, sum(expected.values()))
+
+
+def chunks_of(html):
+    return (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+
+
+def run_all_p(html, max_chars, parser):
+    return extract_text_from_html(html, max_chars)
+
+
+def run_density(html, max_chars, parser):
+    return extract_text_from_chunks(chunks_of(html), max_chars, parser, "https://sin-perfil.example/n/1")
+
+
+def run_profile(html, max_chars, parser):
+    return extract_text_from_chunks(chunks_of(html), max_chars, parser, f"https://www.{PROFILE_DOMAIN}/n/1")
+
+
+MODES = {"todos-p": run_all_p, "densidad": run_density, "perfil": run_profile}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--max-chars", type=int, default=FULL_ARTICLE_CHARS)
+    parser.add_argument("--boilerplate-kb", type=int, default=40)
+    parser.add_argument("--parser", default="auto", choices=("auto", "html.parser", "lxml"))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    register_profile(PROFILE_DOMAIN, body=[".cuerpo-noticia"], exclude=[".lee-tambien"])
+    corpus = make_corpus(args.articles, args.seed)
+
+    print(f"{args.articles} artículos, límite {args.max_chars} caracteres, parser {args.parser}\n")
+    print(f"{'maqueta':<10}{'modo':<10}{'car./art.':>11}{'precisión':>11}{'exhaust.':>10}"
+          f"{'registros':>11}{'ms/pág.':>9}")
+
+    for layout in ("diario", "generico"):
+        pages = [(article_html(a, args.boilerplate_kb, layout), a["text"].replace("\n", " ")) for a in corpus]
+        for mode, run in MODES.items():
+            if mode == "perfil" and layout != "diario":
+                continue  # La maqueta genérica no tiene perfil
+            lengths, precisions, recalls, records, times = [], [], [], 0, []
+            for html, truth in pages:
+                started = time.perf_counter()
+                text = run(html, args.max_chars, args.parser)
+                times.append(time.perf_counter() - started)
+                precision, recall = accuracy(text, truth[:args.max_chars])
+                lengths.append(len(text))
+                precisions.append(precision)
+                recalls.append(recall)
+                records += 3 * azure_text_records([text])
+            print(f"{layout:<10}{mode:<10}{statistics.mean(lengths):>11.0f}{statistics.mean(precisions):>11.1%}"
+                  f"{statistics.mean(recalls):>10.1%}{records / len(pages):>11.1f}"
+                  f"{statistics.median(times) * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
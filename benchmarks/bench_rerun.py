@@ -0,0 +1,82 @@
+"""
+Benchmark del coste de cada rerun de la app de Streamlit.
+
+Streamlit vuelve a ejecutar main.py entero con cada interacción
+(cambiar de pestaña, mover un widget...). Este script analiza una
+noticia sintética con el motor local (sin Azure) y después mide
+cuánto tarda cada rerun posterior, que solo debería pintar el
+informe ya calculado.
+
+Se usa streamlit.testing (AppTest), que ejecuta el script sin
+navegador: los tiempos incluyen la ejecución de main.py y la
+construcción de los elementos, no el renderizado en el cliente.
+
+Uso:
+    python -m benchmarks.bench_rerun
+    python -m benchmarks.bench_rerun --sentences 2000 --reruns 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+SENTENCE = (
+    "El Gobierno aprobó ayer un nuevo plan de vivienda que, según los expertos, "
+    "supone un avance importante aunque la oposición denuncia graves problemas."
+)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=500, help="frases del artículo analizado")
+    parser.add_argument("--reruns", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    # Motor local y ficheros temporales: el benchmark no toca Azure ni la caché real
+    tmp = tempfile.mkdtemp(prefix="bench_rerun_")
+    os.environ["ANALYSIS_BACKEND"] = "local"
+    os.environ.setdefault("HISTORY_PATH", os.path.join(tmp, "history.sqlite3"))
+    os.environ.setdefault("ANALYSIS_CACHE_PATH", os.path.join(tmp, "analysis.sqlite3"))
+    os.environ.setdefault("DEDUP_ENABLED", "0")
+
+    from streamlit.testing.v1 import AppTest
+
+    script = os.path.join(os.path.dirname(__file__), "..", "app", "main.py")
+    at = AppTest.from_file(script, default_timeout=120)
+    at.run()
+
+    text = " ".join([SENTENCE] * args.sentences)
+    at.text_area[0].set_value(text)
+    start = time.perf_counter()
+    at.button[0].click().run()
+
+    # El análisis corre en segundo plano (jobs.py): esperamos a que termine
+    while "analysis" not in at.session_state and not at.exception and not at.error:
+        if time.perf_counter() - start > 120:
+            raise SystemExit("El análisis no terminó en 120 s")
+        time.sleep(0.05)
+        at.run()
+    analysis = time.perf_counter() - start
+    if at.exception or at.error:
+        raise SystemExit((at.exception or at.error)[0].value if at.error else at.exception[0].message)
+
+    times = []
+    for _ in range(args.reruns):
+        start = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - start) * 1000)
+
+    print(f"Artículo de {args.sentences} frases ({len(text)} caracteres)")
+    print(f"Análisis inicial: {analysis * 1000:.0f} ms")
+    print(f"Rerun ({args.reruns}x): media {statistics.mean(times):.1f} ms | "
+          f"p50 {percentile(times, 50):.1f} ms | p95 {percentile(times, 95):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
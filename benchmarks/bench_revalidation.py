@@ -0,0 +1,102 @@
+"""
+Benchmark de la caché de páginas (revalidación HTTP).
+
+Descarga varias veces las mismas URLs del servidor de fixtures
+(benchmarks/corpus.py, con ETag y Last-Modified) con fetch_urls():
+
+  1. frío: la caché está vacía, todo se descarga y se parsea
+  2. revalidación: tras publicar una edición nueva (cambia
+     --change-rate de las páginas), las peticiones son
+     condicionales; las páginas sin cambios responden 304 y su
+     texto sale de la caché sin descargar ni parsear nada
+  3. otro max_chars: 304 otra vez, pero se pide otro tamaño de
+     texto y se parsea la página guardada (sin descargarla)
+
+Por pasada: artículos/s, bytes descargados y ahorrados, 304,
+parseos evitados y tiempo de parseo. Comprueba además que el
+texto de las páginas sin cambios es idéntico al de la descarga
+en frío.
+
+Uso:
+    python -m benchmarks.bench_revalidation
+    python -m benchmarks.bench_revalidation --articles 1000 --change-rate 0.3 --latency-ms 50
+"""
+import argparse
+import os
+import tempfile
+import time
+import urllib.request
+
+from benchmarks import corpus
+from benchmarks.bench_pipeline import start_server
+
+
+def parse_seconds(metrics):
+    """Segundos acumulados en la etapa parse (histograma stage_seconds)."""
+    return sum(n * mean for labels, n, mean, *_ in metrics.histogram_summary("stage_seconds")
+               if labels.get("stage") == "parse")
+
+
+def run_pass(name, urls, max_chars, args):
+    from app.utils import metrics
+    from app.utils.cache import page_cache
+    from app.utils.fetcher import fetch_urls
+
+    cache = page_cache()
+    before, parse_before = cache.stats(), parse_seconds(metrics)
+    started = time.perf_counter()
+    results = {r.url: r for r in fetch_urls(urls, max_workers=args.workers, max_chars=max_chars)}
+    elapsed = time.perf_counter() - started
+    after = cache.stats()
+
+    delta = {k: after[k] - before[k] for k in cache.COUNTERS}
+    errors = sum(r.error is not None for r in results.values())
+    print(f"{name:<16}{len(urls) / elapsed:>9.0f}{delta['bytes_downloaded'] / 1e6:>12.1f}"
+          f"{delta['bytes_saved'] / 1e6:>11.1f}{delta['revalidated']:>7}{delta['parses_skipped']:>12}"
+          f"{(parse_seconds(metrics) - parse_before) * 1000:>11.0f}{errors:>8}")
+    return {url: r.text for url, r in results.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20, help="latencia de cada respuesta del servidor de fixtures")
+    parser.add_argument("--boilerplate-kb", type=int, default=40)
+    parser.add_argument("--change-rate", type=float, default=0.1, help="fracción de páginas que cambia entre pasadas")
+    args = parser.parse_args(argv)
+
+    # La caché de páginas se configura al crearla: fichero temporal propio
+    os.environ["PAGE_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_revalidation_"), "pages.sqlite3")
+    os.environ["PAGE_CACHE_ENABLED"] = "1"
+
+    from app.utils.extractor import FULL_ARTICLE_CHARS, MAX_CHARS
+
+    process, port = start_server("fixtures", {
+        "port": 0, "latency_ms": args.latency_ms, "boilerplate_kb": args.boilerplate_kb, "change_rate": args.change_rate,
+    })
+    base = f"http://127.0.0.1:{port}"
+    urls = [f"{base}/articles/{n}.html" for n in range(args.articles)]
+
+    try:
+        print(f"{args.articles} artículos, {args.latency_ms:.0f} ms por respuesta, "
+              f"{args.change_rate:.0%} de páginas cambian entre pasadas\n")
+        print(f"{'pasada':<16}{'art/s':>9}{'MB bajados':>12}{'MB ahorro':>11}{'304':>7}{'sin parseo':>12}"
+              f"{'parseo ms':>11}{'errores':>8}")
+
+        cold = run_pass("frío", urls, FULL_ARTICLE_CHARS, args)
+        urllib.request.urlopen(urllib.request.Request(f"{base}/edition", method="POST")).read()
+        warm = run_pass("revalidación", urls, FULL_ARTICLE_CHARS, args)
+        run_pass("otro max_chars", urls, MAX_CHARS, args)
+    finally:
+        process.terminate()
+
+    changed = {url for n, url in enumerate(urls) if corpus.page_revision(n, edition=1, change_rate=args.change_rate)}
+    same = sum(warm[url] == cold[url] for url in urls if url not in changed)
+    updated = sum("Actualización 1" in (warm[url] or "") for url in changed)
+    print(f"\nPáginas sin cambios con el mismo texto: {same}/{len(urls) - len(changed)}")
+    print(f"Páginas cambiadas con el texto nuevo:   {updated}/{len(changed)}")
+
+
+if __name__ == "__main__":
+    main()
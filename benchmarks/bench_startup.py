@@ -0,0 +1,131 @@
+"""
+Benchmark del arranque en frío: lo que paga cada contenedor nuevo
+antes de pintar la primera pantalla.
+
+Cada medida se toma en un proceso de Python nuevo (sin nada en
+sys.modules ni en las cachés de Streamlit):
+
+  - import: perfil de `python -X importtime` de los módulos de la
+    app (los que importa main.py), de streamlit y del CLI por
+    lotes (app.batch), con los módulos más caros de cada grupo
+  - first render: desde que arranca el intérprete hasta que termina
+    la primera ejecución de main.py (streamlit.testing.AppTest),
+    y qué dependencias pesadas quedaron cargadas
+
+Uso:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 10 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Grupos de módulos que se perfilan por separado
+GROUPS = {
+    "app": ["app.services.language", "app.services.chunking", "app.services.jobs", "app.services.report",
+            "app.utils.extractor", "app.utils.fetcher", "app.utils.cache", "app.utils.history", "app.utils.metrics"],
+    "streamlit": ["streamlit"],
+    "batch": ["app.batch"],
+}
+
+# Dependencias que deberían cargarse solo cuando se usan
+HEAVY = ("azure.ai.textanalytics", "azure.core", "numpy", "bs4", "requests")
+
+FIRST_RENDER = """
+import json, os, sys, time
+started = float(sys.argv[1])
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(os.path.join({root!r}, "app", "main.py"), default_timeout=60)
+imported = time.time()
+at.run()
+done = time.time()
+print(json.dumps({{
+    "streamlit_import": imported - started,
+    "first_render": done - started,
+    "script_run": done - imported,
+    "exception": [e.message for e in at.exception],
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _env():
+    # Ficheros temporales: el arranque no toca la caché ni el historial reales
+    tmp = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.setdefault("ANALYSIS_CACHE_PATH", os.path.join(tmp, "analysis.sqlite3"))
+    env.setdefault("HISTORY_PATH", os.path.join(tmp, "history.sqlite3"))
+    env.setdefault("DEDUP_INDEX_PATH", os.path.join(tmp, "dedup.sqlite3"))
+    env.setdefault("PAGE_CACHE_PATH", os.path.join(tmp, "pages.sqlite3"))
+    return env
+
+
+def import_profile(modules, env):
+    """(total en s, {módulo: acumulado en s}) de importar `modules` en un proceso nuevo."""
+    code = "; ".join(f"import {m}" for m in modules) or "pass"
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    cumulative = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        try:
+            value = int(cum) / 1e6
+        except ValueError:
+            continue  # Cabecera
+        cumulative[name.strip()] = value
+        if not name.startswith("  "):
+            total += value  # Módulos de primer nivel: su acumulado incluye a sus hijos
+    return total, cumulative
+
+
+def first_render(env):
+    code = FIRST_RENDER.format(root=ROOT, heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", code, str(time.time())], env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="procesos nuevos por medida (se da la mediana)")
+    parser.add_argument("--top", type=int, default=10, help="módulos más caros que se listan por grupo")
+    args = parser.parse_args(argv)
+    env = _env()
+
+    # Lo que importa el propio intérprete al arrancar (site, encodings…) se descuenta
+    empty = [import_profile([], env) for _ in range(args.repeat)]
+    baseline = statistics.median(t for t, _ in empty)
+
+    print(f"Import (mediana de {args.repeat} procesos, sin los {baseline * 1000:.0f} ms del intérprete)")
+    for group, modules in GROUPS.items():
+        runs = [import_profile(modules, env) for _ in range(args.repeat)]
+        total = statistics.median(t for t, _ in runs) - baseline
+        print(f"\n  {group}: {total * 1000:.0f} ms")
+        modules_ms = {name: statistics.median(r[1].get(name, 0) for r in runs)
+                      for name in runs[0][1] if name not in empty[0][1]}
+        for name, value in sorted(modules_ms.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {value * 1000:8.1f} ms  {name}")
+
+    renders = [first_render(env) for _ in range(args.repeat)]
+    if renders[0]["exception"]:
+        print("\n⚠️ main.py lanzó excepciones:", renders[0]["exception"])
+    print(f"\nPrimera pantalla (mediana de {args.repeat} procesos)")
+    for key, label in (("streamlit_import", "arranque + import de streamlit"),
+                       ("script_run", "primera ejecución de main.py"),
+                       ("first_render", "total hasta la primera pantalla")):
+        print(f"  {label:<34} {statistics.median(r[key] for r in renders) * 1000:7.0f} ms")
+    print(f"  dependencias pesadas cargadas: {', '.join(renders[0]['heavy']) or 'ninguna'}")
+
+
+if __name__ == "__main__":
+    main()
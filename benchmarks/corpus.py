@@ -0,0 +1,303 @@
+"""
+Corpus sintético de noticias en español y servidor HTML de prueba.
+
+make_corpus() genera artículos deterministas (misma semilla →
+mismos textos) con titular, párrafos de frases plantilla,
+vocabulario positivo/negativo y, de vez en cuando, pistas de
+clickbait, sesgo o bulo para las heurísticas. make_labeled() da
+además un conjunto etiquetado para evaluar el clasificador.
+
+article_html() envuelve un artículo en una página "realista":
+estilos y scripts en la cabecera, menú de navegación, el
+artículo en <p> y, alrededor, los bloques con <p> que no son la
+noticia (cookies, teasers, relacionadas, newsletter, comentarios).
+
+El servidor de fixtures sirve /articles/{n}.html generando la
+página n al vuelo (no hace falta guardar nada en disco), con
+ETag y Last-Modified y respuestas 304 a las peticiones
+condicionales. POST /edition publica una nueva edición: la
+fracción --change-rate de las páginas cambia (se les añade una
+actualización) y el resto sigue igual.
+
+    python -m benchmarks.corpus --port 8766 --latency-ms 20
+"""
+import argparse
+import random
+import time
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUBJECTS = [
+    "El Gobierno", "La Comisión Europea", "El Ayuntamiento de Madrid", "La Generalitat",
+    "El Banco de España", "La oposición", "Los sindicatos", "La patronal", "El Ministerio de Sanidad",
+    "Un grupo de investigadores", "La Policía Nacional", "El Tribunal Supremo", "Los vecinos del barrio",
+]
+VERBS = [
+    "anunció", "aprobó", "criticó", "defendió", "presentó", "rechazó", "denunció", "confirmó",
+    "investiga", "celebró", "propuso", "retrasó",
+]
+OBJECTS = [
+    "un nuevo plan de vivienda", "la reforma de las pensiones", "el presupuesto para el próximo año",
+    "las medidas contra la sequía", "un acuerdo con los transportistas", "el informe sobre el paro",
+    "la ampliación del metro", "un programa de ayudas a las familias", "la subida del salario mínimo",
+    "los datos de crecimiento económico", "una investigación por fraude", "el cierre de la fábrica",
+]
+CONTEXTS = [
+    "según fuentes oficiales", "tras una larga reunión", "en una rueda de prensa celebrada ayer",
+    "ante la presión de varios colectivos", "después de meses de negociación", "en un comunicado",
+    "a pesar de las críticas", "con el apoyo de la mayoría",
+]
+POSITIVE = [
+    "supone un avance importante", "ha sido recibido como un éxito", "mejora las previsiones",
+    "ofrece una oportunidad para el sector", "fue celebrado por los afectados",
+]
+NEGATIVE = [
+    "agrava la crisis", "ha provocado una fuerte polémica", "deja graves problemas sin resolver",
+    "aumenta el riesgo de despidos", "fue calificado de fracaso por los expertos",
+]
+NEUTRAL = [
+    "entrará en vigor el próximo mes", "afectará a unas {n} personas", "tendrá un coste de {n} millones",
+    "se debatirá en el pleno", "se aplicará de forma gradual",
+]
+CUES = [
+    "No vas a creer lo que pasó después.", "Es un escándalo absoluto.", "Última hora: todo era un bulo.",
+    "Comparte antes de que lo borren.", "Los medios no quieren que lo sepas.",
+]
+TITLES = [
+    "{subject} {verb} {object}", "Polémica: {subject} {verb} {object}", "{subject} {verb} {object} {context}",
+]
+
+# Conjunto etiquetado para el clasificador de heurísticas (make_labeled)
+LABELS = ("satira", "fake_news", "clickbait", "informativo")
+LABEL_CUES = {
+    "satira": [
+        "Todo es una parodia, claro.", "Una broma que nadie se tomó en serio.",
+        "El chiste corrió por las redacciones.", "Un ejercicio de sarcasmo sobre la actualidad.",
+    ],
+    "fake_news": [
+        "El vídeo es falso y circula un rumor sin base.", "Se trata de un bulo que difunden varias cuentas.",
+        "La cita es una mentira inventada.", "Llegó por una cadena de whatsapp con datos falsos.",
+    ],
+    "clickbait": [
+        "No vas a creer lo que pasó después.", "El resultado te sorprenderá.",
+        "Tienes que ver esto.", "Nadie se esperaba este final impactante.",
+    ],
+}
+# Pistas débiles que también salen en noticias normales
+WEAK_CUES = [
+    "Se activó la alerta por lluvias.", "El pleno urgente se celebró por la tarde.",
+    "El vídeo se hizo viral en pocas horas.",
+]
+# Palabras que contienen una pista sin serlo
+HARD_NEGATIVES = [
+    "La nebulosa apareció en las imágenes del telescopio.", "Cerró la estafeta de correos del pueblo.",
+    "Los insurgentes aceptaron el alto el fuego.", "El mago sacó un conejo de la chistera.",
+    "El tratamiento antiviral llegó a los hospitales.", "Detuvieron al estafador en el aeropuerto.",
+    "El humorista presentó su nuevo libro.",
+]
+
+
+def make_sentence(rng):
+    tone = rng.choice((POSITIVE, NEGATIVE, NEUTRAL))
+    return (
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} "
+        f"{rng.choice(CONTEXTS)}, y {rng.choice(tone).format(n=rng.randint(2, 900))}."
+    )
+
+
+def make_article(n, seed=1, paragraphs=(4, 12), cue_rate=0.1):
+    """Artículo n del corpus: {"id", "title", "text"} (determinista para cada (n, seed))."""
+    rng = random.Random(f"{seed}:{n}")
+    title = rng.choice(TITLES).format(
+        subject=rng.choice(SUBJECTS), verb=rng.choice(VERBS), object=rng.choice(OBJECTS), context=rng.choice(CONTEXTS),
+    )
+    body = []
+    for _ in range(rng.randint(*paragraphs)):
+        sentences = [make_sentence(rng) for _ in range(rng.randint(2, 6))]
+        if rng.random() < cue_rate:
+            sentences.insert(rng.randrange(len(sentences) + 1), rng.choice(CUES))
+        body.append(" ".join(sentences))
+    return {"id": n, "title": title, "text": "\n".join(body)}
+
+
+def make_corpus(count, seed=1, start=0, **kwargs):
+    return [make_article(n, seed, **kwargs) for n in range(start, start + count)]
+
+
+def make_labeled(count, seed=1):
+    """Conjunto etiquetado [(texto, clase)]: artículos sin pistas con frases de su clase y ruido."""
+    rng = random.Random(f"labeled:{seed}")
+    rows = []
+    for n in range(count):
+        label = rng.choices(LABELS, weights=(2, 2, 2, 4))[0]
+        article = make_article(n, seed, cue_rate=0)
+        paragraphs = article["text"].split("\n")
+        extra = rng.sample(LABEL_CUES[label], rng.randint(1, 2)) if label in LABEL_CUES else []
+        if rng.random() < 0.4:
+            extra.append(rng.choice(HARD_NEGATIVES))
+        if rng.random() < 0.2:
+            extra.append(rng.choice(WEAK_CUES))
+        if rng.random() < 0.15:
+            # Una pista suelta de otra clase (una parodia que habla de un bulo…)
+            extra.append(rng.choice(LABEL_CUES[rng.choice([c for c in LABEL_CUES if c != label])]))
+        for sentence in extra:
+            i = rng.randrange(len(paragraphs))
+            paragraphs[i] += " " + sentence
+        rows.append((article["title"] + "\n" + "\n".join(paragraphs), label))
+    return rows
+
+
+LAYOUTS = ("diario", "generico")
+
+
+def article_html(article, boilerplate_kb=40, layout="diario"):
+    """Página HTML con el artículo entre mucho marcado de relleno.
+
+    Además del relleno sin <p> (estilos, scripts, menú) lleva los
+    bloques que estropean la extracción de "todos los <p>": aviso
+    de cookies, teasers de portada, un "Lee también" dentro del
+    cuerpo, noticias relacionadas, caja de newsletter y comentarios.
+
+    layout="diario" usa clases con significado (cuerpo-noticia,
+    lee-tambien…), como un periódico con perfil de extracción;
+    "generico" usa clases opacas, como una web desconocida.
+    """
+    rng = random.Random(f"html:{article['id']}")
+    names = {"body": "cuerpo-noticia", "wrap": "contenido", "inline": "lee-tambien", "teasers": "mod-portada"}
+    if layout == "generico":
+        names = {key: f"c-{zlib.crc32(key.encode()) % 4096:x}" for key in names}
+
+    head = (
+        "<html><head><meta charset='utf-8'><title>" + article["title"] + "</title><style>"
+        + ".c{color:#333}" * (boilerplate_kb * 10) + "</style><script>"
+        + "var tracking = {id: 1};" * (boilerplate_kb * 10) + "</script></head><body>"
+    )
+    nav = "<nav>" + "".join(f"<a href='/s{i}'>Sección {i}</a>" for i in range(60)) + "</nav>"
+    cookies = "<div id='aviso-cookies'><p>Usamos cookies propias y de terceros para mejorar tu experiencia.</p></div>"
+    teasers = f"<div class='{names['teasers']}'>" + "".join(
+        f"<p><a href='/n/{rng.randint(1, 10**6)}'>{make_sentence(rng)}</a></p>" for _ in range(6)
+    ) + "</div>"
+
+    paragraphs = [f"<p>{p}</p>" for p in article["text"].split("\n")]
+    inline = f"<div class='{names['inline']}'><p>Lee también: {make_sentence(rng)}</p></div>"
+    paragraphs.insert(min(2, len(paragraphs)), inline)
+    content = (
+        f"<div class='{names['wrap']}'><h1>{article['title']}</h1>"
+        f"<div class='{names['body']}'>" + "\n".join(paragraphs) + "</div></div>"
+    )
+
+    related = "<section class='noticias-relacionadas'>" + "".join(
+        f"<p>{make_sentence(rng)}</p>" for _ in range(4)
+    ) + "</section>"
+    newsletter = "<div class='caja-newsletter'><p>Recibe cada mañana las noticias más importantes en tu correo.</p></div>"
+    comments = "<div class='comments'>" + "<div><p>Comentario de un lector.</p></div>" * (boilerplate_kb * 5) + "</div>"
+    return head + nav + cookies + teasers + content + related + newsletter + comments + "</body></html>"
+
+
+# Fecha de la edición 0 de todas las páginas (Last-Modified)
+EPOCH = 1_700_000_000
+
+
+def page_revision(n, seed=1, edition=0, change_rate=0.0):
+    """Revisión de la página n en una edición: las que cambian llevan la edición, el resto 0."""
+    if edition and random.Random(f"{seed}:{n}:cambios").random() < change_rate:
+        return edition
+    return 0
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    seed = 1
+    boilerplate_kb = 40
+    change_rate = 0.0
+    edition = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if self.path != "/edition":
+            self.send_error(404)
+            return
+        type(self).edition += 1
+        body = str(self.edition).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag, modified):
+        if "If-None-Match" in self.headers:
+            return etag in [t.strip() for t in self.headers["If-None-Match"].split(",")]
+        since = self.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return modified <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if not (path.startswith("/articles/") and path.endswith(".html")):
+            self.send_error(404)
+            return
+        try:
+            n = int(path[len("/articles/"):-len(".html")])
+        except ValueError:
+            self.send_error(404)
+            return
+
+        time.sleep(self.latency)
+        revision = page_revision(n, self.seed, self.edition, self.change_rate)
+        etag = f'"{self.seed}-{n}-{revision}-{self.boilerplate_kb}"'
+        modified = EPOCH + revision * 3600
+        if self._not_modified(etag, modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        article = make_article(n, self.seed)
+        if revision:
+            update = make_sentence(random.Random(f"{self.seed}:{n}:{revision}"))
+            article["text"] += f"\nActualización {revision}: {update}"
+        body = article_html(article, self.boilerplate_kb).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(modified, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host="127.0.0.1", port=8766, latency_ms=20, seed=1, boilerplate_kb=40, change_rate=0.0, ready=None):
+    """Arranca el servidor de fixtures (bloquea). `ready` recibe el puerto."""
+    handler = type("Handler", (FixtureHandler,), {
+        "latency": latency_ms / 1000, "seed": seed, "boilerplate_kb": boilerplate_kb, "change_rate": change_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    if ready is not None:
+        ready(server.server_address[1])
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--boilerplate-kb", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--change-rate", type=float, default=0.1, help="fracción de páginas que cambia en cada edición")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.latency_ms, args.seed, args.boilerplate_kb, args.change_rate,
+          ready=lambda port: print(f"Fixtures HTML en http://{args.host}:{port}/articles/0.html", flush=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Evaluación del clasificador de heurísticas sobre un conjunto etiquetado.
+
+Compara el clasificador puntuado (heuristics.classify_texts) con
+el anterior (subcadenas con prioridad fija, ver bench_heuristics):
+  - precisión, recall y F1 por clase, exactitud y matriz de confusión
+  - precisión media (AP) por clase al ordenar por probabilidad
+  - throughput texto a texto (analyze_heuristics) frente al corpus
+    entero de una vez (classify_texts), y que ambos den lo mismo
+
+Sin --data se usa un conjunto sintético (corpus.make_labeled) con
+pistas de cada clase, pistas débiles ("alerta por lluvias") y
+palabras que contienen una pista sin serlo ("nebulosa",
+"insurgentes", "chistera").
+
+--data: JSONL o CSV con "text" y "label"; la etiqueta puede ser la
+clase (satira, fake_news, clickbait, informativo) o el texto que
+muestra la app ("Informativo o neutral"…).
+
+Uso:
+    python -m benchmarks.eval_classifier
+    python -m benchmarks.eval_classifier --docs 20000 --repeat 5
+    python -m benchmarks.eval_classifier --data etiquetadas.jsonl
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.batch import read_records
+from app.services.heuristics import CLASS_LABELS, CLASSES, analyze_heuristics, classify_texts, score_texts
+from benchmarks.bench_heuristics import legacy_heuristics
+from benchmarks.corpus import make_labeled
+
+CLASS_BY_LABEL = {label: c for c, label in CLASS_LABELS.items()}
+
+
+def load_labeled(path):
+    """[(texto, clase)] de un JSONL o CSV con columnas "text" y "label"."""
+    fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+    data = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in read_records(f, fmt):
+            label = CLASS_BY_LABEL.get(row["label"], row["label"])
+            if label not in CLASSES:
+                raise SystemExit(f"❌ Etiqueta desconocida en el registro {row['id']}: {row['label']!r}")
+            data.append((row["text"], label))
+    return data
+
+
+def print_metrics(name, truth, predicted):
+    print(f"\n{name}")
+    print(f"  {'clase':<14}{'precisión':>10}{'recall':>8}{'F1':>7}{'soporte':>9}")
+    for c in CLASSES:
+        tp = sum(t == c and p == c for t, p in zip(truth, predicted))
+        predicted_c = sum(p == c for p in predicted)
+        support = sum(t == c for t in truth)
+        precision = tp / predicted_c if predicted_c else 0.0
+        recall = tp / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        print(f"  {c:<14}{precision:>10.3f}{recall:>8.3f}{f1:>7.3f}{support:>9}")
+    accuracy = sum(t == p for t, p in zip(truth, predicted)) / len(truth)
+    print(f"  exactitud: {accuracy:.3f}")
+
+    print("  confusión (filas = real, columnas = predicha)")
+    print("  " + " " * 14 + "".join(f"{c[:11]:>12}" for c in CLASSES))
+    for t in CLASSES:
+        row = [sum(a == t and p == c for a, p in zip(truth, predicted)) for c in CLASSES]
+        print(f"  {t:<14}" + "".join(f"{n:>12}" for n in row))
+
+
+def average_precision(relevant, scores):
+    """AP de ordenar por `scores` (más alto primero) los documentos `relevant`."""
+    order = np.argsort(-scores, kind="stable")
+    hits = relevant[order]
+    if not hits.any():
+        return 0.0
+    precision_at = np.cumsum(hits) / np.arange(1, len(hits) + 1)
+    return float(precision_at[hits].mean())
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="conjunto etiquetado (JSONL o CSV con text y label)")
+    parser.add_argument("--docs", type=int, default=5000, help="documentos del conjunto sintético")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    data = load_labeled(args.data) if args.data else make_labeled(args.docs, args.seed)
+    texts = [text for text, _ in data]
+    truth = [label for _, label in data]
+    print(f"{len(texts)} documentos ({sum(map(len, texts)) / 1e6:.1f} MB) de "
+          f"{args.data or 'corpus.make_labeled()'}")
+
+    legacy = [CLASS_BY_LABEL[legacy_heuristics(t)[1]] for t in texts]
+    scored = [CLASS_BY_LABEL[r.classification] for r in classify_texts(texts)]
+    print_metrics("Anterior (subcadenas, prioridad fija)", truth, legacy)
+    print_metrics("Puntuado (palabras completas, pesos + softmax)", truth, scored)
+
+    # Ordenar por probabilidad: ¿salen primero los de cada clase?
+    probabilities = score_texts(texts).probabilities
+    labels = np.array(truth)
+    print("\n  precisión media (AP) al ordenar por probabilidad")
+    for i, c in enumerate(CLASSES):
+        print(f"  {c:<14}{average_precision(labels == c, probabilities[:, i]):>10.3f}")
+
+    # Texto a texto y corpus entero deben dar las mismas probabilidades
+    one_by_one = [analyze_heuristics(t) for t in texts]
+    batched = classify_texts(texts)
+    mismatches = sum(a.classification != b.classification or a.flags != b.flags for a, b in zip(one_by_one, batched))
+    max_diff = max(abs(a.probability - b.probability) for a, b in zip(one_by_one, batched))
+    print(f"\nTexto a texto vs corpus: {mismatches} diferencias, "
+          f"máx. |Δ probabilidad| = {max_diff:.2e}")
+
+    chars = sum(map(len, texts)) / 1e6
+    print(f"\n{'modo':<34}{'docs/s':>10}{'MB/s':>8}")
+    for name, func in [
+        ("anterior (texto a texto)", lambda: [legacy_heuristics(t) for t in texts]),
+        ("puntuado (texto a texto)", lambda: [analyze_heuristics(t) for t in texts]),
+        ("puntuado (corpus, NumPy)", lambda: classify_texts(texts)),
+    ]:
+        elapsed = best_time(func, args.repeat)
+        print(f"{name:<34}{len(texts) / elapsed:>10.0f}{chars / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
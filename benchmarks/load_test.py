@@ -0,0 +1,194 @@
+"""
+Prueba de carga con usuarios simulados (modo multiproceso).
+
+Cada usuario simulado repite lo que hace alguien en la app:
+  1. extraer el texto de una URL (artículo completo)
+  2. encolar el análisis (jobs.py) y esperar a que termine,
+     consultando su estado como el fragmento de la app
+  3. pensar --think-ms antes de la siguiente noticia
+
+Los usuarios (--users en total) son hilos repartidos entre
+procesos "réplica", como las sesiones de los contenedores de
+Streamlit. Se prueban varias configuraciones réplicas × procesos
+del pool: "2x0" son dos réplicas sin pool y "1x4" una réplica
+con un pool de 4 procesos (WORKER_PROCESSES). Las réplicas de una configuración comparten
+las cachés en disco (análisis y páginas) y la cuota de Azure
+(AZURE_RATE_STATE_PATH). Azure es el mock local (mock_azure.py)
+y las noticias salen del servidor de fixtures (corpus.py): no
+hace falta red ni credenciales.
+
+Por configuración: acciones/s, latencia p50/p95 de cada acción,
+errores y aceleración frente a la primera configuración. Con
+--repeat-rate, parte de las noticias se repiten entre usuarios y
+réplicas: se sirven de las cachés compartidas.
+
+Uso:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --users 16 --duration 30 --configs 1x0,1x4,4x0
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_pipeline import percentile, start_server
+
+# Noticias "populares" entre las que se reparten las repetidas
+HOT_URLS = 20
+
+
+def default_configs():
+    cores = os.cpu_count() or 1
+    configs = ["1x0", f"1x{max(2, cores)}", f"{max(2, cores)}x0"]
+    return ",".join(dict.fromkeys(configs))
+
+
+# -----------------------------
+# Réplica (proceso propio, arranca con spawn)
+# -----------------------------
+def replica(index, users, env, args, fixtures, ready, go, results):
+    os.environ.update(env)
+
+    from app.services import workers
+    from app.services.jobs import job_queue
+    from app.services.language import get_client
+    from app.utils.extractor import FULL_ARTICLE_CHARS
+
+    # Calentamiento fuera de la medida: cliente de Azure y procesos del pool ya arrancados
+    get_client()
+    for future in [workers.heuristics("calentamiento") for _ in range(workers.pool_size() * 2)]:
+        workers.wait(future)
+    ready.put(index)
+    go.wait()
+
+    deadline = time.perf_counter() + args.duration
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(10**9))
+
+    def user(n):
+        rng = random.Random(f"{index}:{n}")
+        while time.perf_counter() < deadline:
+            if rng.random() < args.repeat_rate:
+                page = rng.randrange(HOT_URLS)
+            else:
+                with lock:
+                    page = HOT_URLS + index * 10**6 + next(counter)
+            started = time.perf_counter()
+            text = workers.extract_url(f"{fixtures}/articles/{page}.html", FULL_ARTICLE_CHARS)
+            job_id = job_queue().submit(text)
+            while not (job := job_queue().get(job_id)).finished:
+                time.sleep(args.poll_ms / 1000)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                errors.append(job.status == "error" or text.startswith("Error extrayendo"))
+            time.sleep(args.think_ms / 1000)
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pool = workers.process_pool()
+    if pool is not None:
+        pool.shutdown()
+    results.put((latencies, sum(errors)))
+
+
+def run_config(config, args, azure, fixtures):
+    replicas, pool = (int(n) for n in config.split("x"))
+    tmp = tempfile.mkdtemp(prefix="load_test_")
+    env = {
+        "AZURE_LANGUAGE_ENDPOINT": azure,
+        "AZURE_LANGUAGE_KEY": "load-test",
+        "ANALYSIS_BACKEND": "azure",
+        "AZURE_LANGUAGE_RATE_PER_MINUTE": "1000000",
+        "AZURE_RATE_STATE_PATH": os.path.join(tmp, "rate.sqlite3"),
+        "ANALYSIS_CACHE_PATH": os.path.join(tmp, "analysis.sqlite3"),
+        "PAGE_CACHE_PATH": os.path.join(tmp, "pages.sqlite3"),
+        "PAGE_CACHE_FRESH_SECONDS": "300",
+        "HISTORY_PATH": os.path.join(tmp, "history.sqlite3"),
+        "DEDUP_ENABLED": "0",
+        "WORKER_PROCESSES": str(pool),
+        "JOB_WORKERS": str(args.users),
+    }
+    # Los mismos usuarios en total, repartidos entre las réplicas
+    users = [args.users // replicas + (i < args.users % replicas) for i in range(replicas)]
+
+    # spawn: cada réplica empieza de cero, como un contenedor nuevo (y puede crear su pool)
+    context = multiprocessing.get_context("spawn")
+    ready, results, go = context.Queue(), context.Queue(), context.Event()
+    processes = [
+        context.Process(target=replica, args=(i, users[i], env, args, fixtures, ready, go, results))
+        for i in range(replicas)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get(timeout=120)
+
+    started = time.perf_counter()
+    go.set()
+    latencies, errors = [], 0
+    for _ in processes:
+        replica_latencies, replica_errors = results.get(timeout=args.duration + 300)
+        latencies += replica_latencies
+        errors += replica_errors
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    return {
+        "users": args.users,
+        "actions": len(latencies),
+        "actions_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", default=default_configs(), help="réplicas x procesos del pool, separadas por comas")
+    parser.add_argument("--users", type=int, default=16, help="usuarios simulados en total (repartidos entre réplicas)")
+    parser.add_argument("--duration", type=float, default=20, help="segundos de carga por configuración")
+    parser.add_argument("--think-ms", type=float, default=0, help="pausa de cada usuario entre noticias")
+    parser.add_argument("--poll-ms", type=float, default=50, help="cada cuánto consulta el usuario su análisis")
+    parser.add_argument("--repeat-rate", type=float, default=0.2, help="fracción de noticias repetidas entre usuarios")
+    parser.add_argument("--boilerplate-kb", type=int, default=80, help="relleno HTML de cada página (coste de parseo)")
+    parser.add_argument("--fixture-latency-ms", type=float, default=10)
+    parser.add_argument("--azure-latency-ms", type=float, default=20)
+    parser.add_argument("--summary-ms", type=float, default=50)
+    args = parser.parse_args(argv)
+
+    azure, azure_port = start_server("azure", [
+        "--port", "0", "--latency-ms", str(args.azure_latency_ms), "--summary-ms", str(args.summary_ms),
+        "--poll-ms", "20",
+    ])
+    fixtures, fixtures_port = start_server("fixtures", {
+        "port": 0, "latency_ms": args.fixture_latency_ms, "boilerplate_kb": args.boilerplate_kb,
+    })
+
+    print(f"{os.cpu_count()} núcleos, {args.users} usuarios, {args.duration:.0f} s por configuración, "
+          f"{args.repeat_rate:.0%} de noticias repetidas\n")
+    print(f"{'config':<8}{'usuarios':>9}{'acciones':>10}{'acc/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'errores':>9}{'acelera':>9}")
+    baseline = None
+    try:
+        for config in args.configs.split(","):
+            r = run_config(config, args, f"http://127.0.0.1:{azure_port}", f"http://127.0.0.1:{fixtures_port}")
+            baseline = baseline or r["actions_per_sec"]
+            print(f"{config:<8}{r['users']:>9}{r['actions']:>10}{r['actions_per_sec']:>8.1f}{r['p50_ms']:>9.0f}"
+                  f"{r['p95_ms']:>9.0f}{r['errors']:>9}{r['actions_per_sec'] / baseline:>8.2f}x")
+    finally:
+        azure.terminate()
+        fixtures.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Servidor local que imita la API REST de Azure AI Language
+(Text Analytics, versión 2023-04-01) para benchmarks sin red.
+
+Implementa lo que usa app/services/language.py a través del SDK:
+  POST /language/:analyze-text                 → LanguageDetection, SentimentAnalysis
+  POST /language/analyze-text/jobs             → ExtractiveSummarization (operación larga)
+  GET  /language/analyze-text/jobs/{id}        → estado / resultado del trabajo
+  GET  /stats                                  → peticiones, 429 y 500 servidos
+
+Los resultados son deterministas pero sintéticos (frases por
+signos de puntuación, sentimiento según un hash de la frase).
+
+Inyección de latencia y fallos:
+  --latency-ms       latencia base por petición
+  --per-doc-ms       latencia extra por documento
+  --jitter           desviación relativa (log-normal) de la latencia
+  --summary-ms       tiempo que tarda en completarse un trabajo de resumen
+  --throttle-rate    fracción de peticiones que reciben 429 (con Retry-After)
+  --failure-rate     fracción de peticiones que reciben 500
+  --max-rps          peticiones por segundo admitidas (el resto, 429)
+
+Uso:
+    python -m benchmarks.mock_azure --port 8765 --latency-ms 80 --throttle-rate 0.05
+    AZURE_LANGUAGE_ENDPOINT=http://127.0.0.1:8765 AZURE_LANGUAGE_KEY=x streamlit run app/main.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_VERSION = "2023-04-01-mock"
+
+_SENTENCE_RE = re.compile(r"[^\s.!?…][^.!?…\n]*[.!?…]*")
+_LABELS = ("positive", "neutral", "negative")
+
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _sentences(text):
+    return [(m.group(), m.start()) for m in _SENTENCE_RE.finditer(text) if m.group().strip()]
+
+
+def _scores(label):
+    scores = {k: 0.05 for k in _LABELS}
+    scores[label] = 0.9
+    return scores
+
+
+def _doc_error(doc):
+    return {"id": doc["id"], "error": {"code": "InvalidArgument", "message": "Document text is empty."}}
+
+
+def detect_language(docs):
+    results, errors = [], []
+    for doc in docs:
+        if not doc["text"].strip():
+            errors.append(_doc_error(doc))
+            continue
+        results.append({
+            "id": doc["id"],
+            "detectedLanguage": {"name": "Spanish", "iso6391Name": "es", "confidenceScore": 0.99},
+            "warnings": [],
+        })
+    return {"kind": "LanguageDetectionResults",
+            "results": {"documents": results, "errors": errors, "modelVersion": MODEL_VERSION}}
+
+
+def analyze_sentiment(docs):
+    results, errors = [], []
+    for doc in docs:
+        if not doc["text"].strip():
+            errors.append(_doc_error(doc))
+            continue
+        sentences = []
+        for text, offset in _sentences(doc["text"]):
+            label = _LABELS[zlib.crc32(text.encode("utf-8")) % 3]
+            sentences.append({"text": text, "sentiment": label, "confidenceScores": _scores(label),
+                              "offset": offset, "length": len(text)})
+        labels = {s["sentiment"] for s in sentences}
+        overall = "mixed" if {"positive", "negative"} <= labels else (sentences[0]["sentiment"] if sentences else "neutral")
+        results.append({"id": doc["id"], "sentiment": overall,
+                        "confidenceScores": _scores(overall if overall != "mixed" else "neutral"),
+                        "sentences": sentences, "warnings": []})
+    return {"kind": "SentimentAnalysisResults",
+            "results": {"documents": results, "errors": errors, "modelVersion": MODEL_VERSION}}
+
+
+def extract_summary(docs, count=3):
+    results, errors = [], []
+    for doc in docs:
+        if not doc["text"].strip():
+            errors.append(_doc_error(doc))
+            continue
+        sentences = _sentences(doc["text"])[:count]
+        results.append({"id": doc["id"], "warnings": [], "sentences": [
+            {"text": text, "rankScore": round(1.0 - i * 0.1, 2), "offset": offset, "length": len(text)}
+            for i, (text, offset) in enumerate(sentences)
+        ]})
+    return {"documents": results, "errors": errors, "modelVersion": MODEL_VERSION}
+
+
+class MockState:
+    """Configuración, trabajos de resumen pendientes y contadores del servidor."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.window = []  # instantes de las peticiones del último segundo (para --max-rps)
+        self.stats = {"requests": 0, "throttled": 0, "failed": 0, "documents": 0}
+
+    def inject(self):
+        """Devuelve el código de error a simular (429 / 500) o None."""
+        with self.lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            if self.args.max_rps:
+                self.window = [t for t in self.window if now - t < 1.0]
+                if len(self.window) >= self.args.max_rps:
+                    self.stats["throttled"] += 1
+                    return 429
+                self.window.append(now)
+            roll = self.rng.random()
+            if roll < self.args.throttle_rate:
+                self.stats["throttled"] += 1
+                return 429
+            if roll < self.args.throttle_rate + self.args.failure_rate:
+                self.stats["failed"] += 1
+                return 500
+            return None
+
+    def delay(self, n_docs):
+        with self.lock:
+            self.stats["documents"] += n_docs
+            jitter = self.rng.lognormvariate(0, self.args.jitter) if self.args.jitter else 1.0
+        time.sleep((self.args.latency_ms + self.args.per_doc_ms * n_docs) * jitter / 1000)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("apim-request-id", uuid.uuid4().hex)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status):
+        message = "Rate limit is exceeded." if status == 429 else "Internal server error."
+        headers = {"Retry-After": "1", "retry-after-ms": str(self.state.args.retry_after_ms)} if status == 429 else {}
+        self._send(status, {"error": {"code": "429" if status == 429 else "InternalServerError",
+                                      "message": message}}, headers)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        path = self.path.split("?")[0]
+
+        error = self.state.inject()
+        if error:
+            self._error(error)
+            return
+
+        if path == "/language/:analyze-text":
+            docs = body["analysisInput"]["documents"]
+            self.state.delay(len(docs))
+            handler = {"LanguageDetection": detect_language, "SentimentAnalysis": analyze_sentiment}.get(body["kind"])
+            if handler is None:
+                self._send(400, {"error": {"code": "InvalidRequest", "message": f"kind {body['kind']}"}})
+                return
+            self._send(200, handler(docs))
+            return
+
+        if path == "/language/analyze-text/jobs":
+            docs = body["analysisInput"]["documents"]
+            self.state.delay(len(docs))
+            job_id = str(uuid.uuid4())
+            with self.state.lock:
+                self.state.jobs[job_id] = {
+                    "ready_at": time.monotonic() + self.state.args.summary_ms / 1000,
+                    "created": _now(),
+                    "display_name": body.get("displayName"),
+                    "tasks": body["tasks"],
+                    "docs": docs,
+                }
+            host = self.headers.get("Host")
+            location = f"http://{host}/language/analyze-text/jobs/{job_id}?api-version=2023-04-01"
+            self._send(202, None, {"Operation-Location": location,
+                                   "retry-after-ms": str(self.state.args.poll_ms)})
+            return
+
+        self._send(404, {"error": {"code": "NotFound", "message": path}})
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+
+        if path == "/stats":
+            with self.state.lock:
+                self._send(200, dict(self.state.stats))
+            return
+
+        if path.startswith("/language/analyze-text/jobs/"):
+            # Las consultas de estado también cuentan para la cuota de Azure
+            error = self.state.inject()
+            if error:
+                self._error(error)
+                return
+
+            job_id = path.rsplit("/", 1)[1]
+            with self.state.lock:
+                job = self.state.jobs.get(job_id)
+            if job is None:
+                self._send(404, {"error": {"code": "NotFound", "message": job_id}})
+                return
+
+            done = time.monotonic() >= job["ready_at"]
+            status = "succeeded" if done else "running"
+            items = []
+            if done:
+                for task in job["tasks"]:
+                    count = task.get("parameters", {}).get("sentenceCount", 3)
+                    items.append({"kind": "ExtractiveSummarizationLROResults", "taskName": task.get("taskName", "0"),
+                                  "lastUpdateDateTime": _now(), "status": "succeeded",
+                                  "results": extract_summary(job["docs"], count)})
+                with self.state.lock:
+                    self.state.jobs.pop(job_id, None)
+
+            self._send(200, {
+                "jobId": job_id, "createdDateTime": job["created"], "lastUpdatedDateTime": _now(),
+                "expirationDateTime": _now(), "status": status, "errors": [],
+                "displayName": job["display_name"],
+                "tasks": {"completed": len(items), "failed": 0, "inProgress": 0 if done else len(job["tasks"]),
+                          "total": len(job["tasks"]), "items": items},
+            }, {"retry-after-ms": str(self.state.args.poll_ms)})
+            return
+
+        self._send(404, {"error": {"code": "NotFound", "message": path}})
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--per-doc-ms", type=float, default=2)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--summary-ms", type=float, default=300)
+    parser.add_argument("--poll-ms", type=int, default=50, help="retry-after-ms que se indica al poller")
+    parser.add_argument("--retry-after-ms", type=int, default=200, help="espera indicada en las respuestas 429")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+def serve(args, ready=None):
+    """Arranca el servidor (bloquea). `ready` recibe el puerto cuando ya escucha."""
+    handler = type("Handler", (MockHandler,), {"state": MockState(args)})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    if ready is not None:
+        ready(server.server_address[1])
+    server.serve_forever()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    serve(args, ready=lambda port: print(f"Mock de Azure Language en http://{args.host}:{port}", flush=True))
+
+
+if __name__ == "__main__":
+    main()
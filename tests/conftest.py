@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+# Permite importar el paquete `app` ejecutando pytest desde cualquier carpeta
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def isolated_stores(tmp_path, monkeypatch):
+    """Cachés, historial e índice de casi-duplicados en una carpeta temporal por test."""
+    from app.services.dedup import dedup_index
+    from app.utils.cache import analysis_cache, page_cache
+    from app.utils.history import history_store
+
+    for name, filename in [
+        ("ANALYSIS_CACHE_PATH", "analysis.sqlite3"),
+        ("PAGE_CACHE_PATH", "pages.sqlite3"),
+        ("HISTORY_PATH", "history.sqlite3"),
+        ("DEDUP_INDEX_PATH", "dedup.sqlite3"),
+    ]:
+        monkeypatch.setenv(name, str(tmp_path / "stores" / filename))
+
+    singletons = (analysis_cache, page_cache, history_store, dedup_index)
+    for singleton in singletons:
+        singleton.clear()
+    yield
+    for singleton in singletons:
+        singleton.clear()
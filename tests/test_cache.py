@@ -0,0 +1,75 @@
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils import runtime
+from app.utils.cache import AnalysisCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    monkeypatch.setattr(runtime.time, "monotonic", clock)
+    return clock
+
+
+def test_key_ignores_whitespace_and_unicode_form():
+    assert AnalysisCache.make_key("Año  nuevo\n", "v1") == AnalysisCache.make_key("Año nuevo", "v1")
+    assert AnalysisCache.make_key("texto", "v1") != AnalysisCache.make_key("texto", "v2")
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = AnalysisCache(str(tmp_path / "c.sqlite3"), ttl=60)
+    cache.set("a", {"sentiment": "neutral"})
+    clock.now += 59
+    assert cache.get("a") == {"sentiment": "neutral"}
+
+    clock.now += 1
+    assert cache.get("a") is None
+    # Caducada pero aún no expulsada: sirve de respaldo con el circuito abierto
+    assert cache.get_many(["a"], allow_stale=True) == {"a": {"sentiment": "neutral"}}
+    cache.evict()
+    assert cache.get_many(["a"], allow_stale=True) == {}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = AnalysisCache(str(tmp_path / "c.sqlite3"), max_entries=2)
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        cache.set(key, key)
+    clock.now += 1
+    cache.get("a")  # "b" pasa a ser la menos usada
+
+    cache.evict()
+    assert sorted(cache.get_many(["a", "b", "c"])) == ["a", "c"]
+
+
+def test_fallback_cache_data_ttl_and_lru(clock):
+    calls = []
+
+    @runtime.cache_data(ttl=10, max_entries=2)
+    def double(x):
+        calls.append(x)
+        return 2 * x
+
+    assert [double(1), double(1), double(2)] == [2, 2, 4]
+    assert calls == [1, 2]
+
+    double(1)       # 1 pasa a ser la más reciente
+    double(3)       # expulsa 2
+    double(1)
+    double(2)
+    assert calls == [1, 2, 3, 2]
+
+    clock.now += 10
+    double(1)
+    assert calls == [1, 2, 3, 2, 1]
@@ -0,0 +1,52 @@
+from app.services.chunking import chunk_text, merge_results
+
+
+def chunk_result(sentiment, positive, neutral, negative, text="Frase."):
+    return {
+        "language": "Spanish", "sentiment": sentiment, "summary": text,
+        "sentences": [(text, sentiment)], "summary_ranked": [(text, 0.5, 0)],
+        "scores": {"positive": positive, "neutral": neutral, "negative": negative},
+    }
+
+
+def test_single_chunk_is_returned_unchanged():
+    result = chunk_result("positive", 0.9, 0.1, 0.0)
+    assert merge_results(["a"], [result]) is result
+
+
+def test_errors_win():
+    assert merge_results(["a", "b"], [chunk_result("neutral", 0, 1, 0), {"error": "x"}]) == {"error": "x"}
+
+
+def test_weighted_sentiment_follows_the_longest_chunk():
+    merged = merge_results(["a" * 300, "b" * 100], [
+        chunk_result("neutral", 0.1, 0.8, 0.1),
+        chunk_result("neutral", 0.4, 0.5, 0.1),
+    ])
+    assert merged["sentiment"] == "neutral"
+    assert merged["scores"] == {"positive": 0.175, "neutral": 0.725, "negative": 0.1}
+    assert merged["chunks"] == 2
+
+
+def test_positive_and_negative_chunks_are_mixed():
+    # El trozo negativo es corto: la media ponderada sería "positive"
+    merged = merge_results(["a" * 900, "b" * 100], [
+        chunk_result("positive", 0.9, 0.1, 0.0),
+        chunk_result("negative", 0.0, 0.1, 0.9),
+    ])
+    assert merged["sentiment"] == "mixed"
+
+
+def test_mixed_chunk_or_high_positive_and_negative_scores_are_mixed():
+    neutral = chunk_result("neutral", 0.1, 0.8, 0.1)
+    assert merge_results(["a", "b"], [neutral, chunk_result("mixed", 0.5, 0.0, 0.5)])["sentiment"] == "mixed"
+    assert merge_results(["a", "b"], [
+        chunk_result("positive", 0.5, 0.1, 0.4), chunk_result("neutral", 0.3, 0.4, 0.3),
+    ])["sentiment"] == "mixed"
+
+
+def test_chunk_text_respects_the_limit_and_keeps_the_text():
+    text = " ".join(f"Frase número {i} del artículo." for i in range(200))
+    chunks = chunk_text(text, max_chars=500)
+    assert all(len(c) <= 500 for c in chunks)
+    assert " ".join(chunks) == text
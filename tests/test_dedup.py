@@ -0,0 +1,130 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from app.services.dedup import _PRIME, MinHashIndex, shingles
+
+
+def article(n, words=60):
+    return " ".join(f"palabra{(i * 7 + n) % 97} suceso{n}x{i}" for i in range(words))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MinHashIndex(path=str(tmp_path / "dedup.sqlite3"))
+
+
+def test_signature_is_exact_universal_hash():
+    index = MinHashIndex()
+    text = article(1)
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+
+    expected = [min((int(a) * x + int(b)) % _PRIME for x in hashes) for a, b in zip(index._a, index._b)]
+
+    assert index.signature(text).tolist() == expected
+
+
+def test_short_texts_have_no_signature():
+    assert MinHashIndex(min_words=20).signature("solo unas pocas palabras") is None
+
+
+def test_query_finds_near_duplicate(index):
+    text = article(1)
+    index.add(index.signature(text), "v:original")
+
+    copy = text + " (Agencia EFE)"
+    assert index.query(index.signature(copy))[0][0] == "v:original"
+    assert index.query(index.signature(article(2))) == []
+
+
+def test_long_keys_are_not_truncated(index):
+    key = "2023-04-01/" + "modelo-" * 40 + ":abc"
+    index.add(index.signature(article(1)), key)
+
+    assert index.query(index.signature(article(1))) == [(key, 1.0)]
+
+
+def test_newer_documents_come_first_and_discard_removes(index):
+    signature = index.signature(article(1))
+    index.add(signature, "v:vieja")
+    index.add(signature, "v:nueva")
+
+    assert [k for k, _ in index.query(signature)] == ["v:nueva", "v:vieja"]
+
+    index.discard("v:nueva")
+    assert [k for k, _ in index.query(signature)] == ["v:vieja"]
+
+
+def test_buckets_keep_only_recent_documents(tmp_path):
+    index = MinHashIndex(path=str(tmp_path / "d.sqlite3"), bucket_size=2)
+    signature = index.signature(article(1))
+    for n in range(5):
+        index.add(signature, f"v:{n}")
+
+    assert [k for k, _ in index.query(signature)] == ["v:4", "v:3"]
+
+
+def test_index_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(MinHashIndex, "PRUNE_EVERY", 1)
+    index = MinHashIndex(path=str(tmp_path / "d.sqlite3"), max_entries=3)
+    for n in range(6):
+        index.add(index.signature(article(n)), f"v:{n}")
+
+    assert len(index) == 3
+    assert index.query(index.signature(article(0))) == []
+    assert index.query(index.signature(article(5)))[0][0] == "v:5"
+
+
+def test_index_is_shared_and_persistent(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    first, second = MinHashIndex(path=path), MinHashIndex(path=path)
+    first.add(first.signature(article(1)), "v:1")
+    second.add(second.signature(article(2)), "v:2")
+
+    reopened = MinHashIndex(path=path)
+    assert reopened.query(reopened.signature(article(1)))[0][0] == "v:1"
+    assert reopened.query(reopened.signature(article(2)))[0][0] == "v:2"
+
+
+def test_index_with_other_hash_functions_is_reset(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    index = MinHashIndex(path=path)
+    index.add(index.signature(article(1)), "v:1")
+
+    assert len(MinHashIndex(path=path, seed=2)) == 0
+
+
+def test_empty_like_is_in_memory(index):
+    batch = index.empty_like()
+    batch.add(batch.signature(article(1)), "v:1")
+
+    assert batch.path is None
+    assert len(index) == 0
+    assert np.array_equal(batch._a, index._a)
+
+
+class FakeCache:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get_many(self, keys):
+        return {k: self.entries[k] for k in keys if k in self.entries}
+
+
+def test_expired_representative_is_discarded_and_next_copy_reused(index):
+    from app.services.language import _near_duplicates
+
+    text = article(1)
+    index.add(index.signature(text), "v:caducada")
+    index.add(index.signature(text + " Más información."), "v:vigente")
+    index.add(index.signature(text + " Última hora."), "v:expulsada")
+    copy = text + " (Agencia EFE)"
+
+    cache = FakeCache({"v:vigente": {"language": "Spanish"}})
+    to_send, aliases, _ = _near_duplicates(index, [copy], ["v:copia"], [0], cache, {})
+
+    assert to_send == []
+    assert aliases == {0: "v:vigente"}
+    remaining = {k for k, _ in index.query(index.signature(copy))}
+    assert "v:vigente" in remaining and "v:expulsada" not in remaining
@@ -0,0 +1,123 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.utils.fetcher import fetch_urls
+
+PAGE = ("<html><body><article><p>" + "El ayuntamiento aprobó ayer el nuevo presupuesto municipal. " * 5
+        + "</p></article></body></html>").encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Servidor de pruebas: /ok, /flaky (429 la primera vez), /busy (503), /throttled (Retry-After: 3600)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+            host = self.headers["Host"].split(":")[0]
+            server.active[host] = server.active.get(host, 0) + 1
+            server.peak[host] = max(server.peak.get(host, 0), server.active[host])
+        try:
+            time.sleep(server.delay)
+            if self.path.startswith("/flaky") and hits == 1:
+                self._send(429, b"", {"Retry-After": "1"})
+            elif self.path.startswith("/busy"):
+                self._send(503, b"")
+            elif self.path.startswith("/throttled"):
+                self._send(429, b"", {"Retry-After": "3600"})
+            else:
+                self._send(200, PAGE, {"Content-Type": "text/html; charset=utf-8"})
+        finally:
+            with server.lock:
+                server.active[host] -= 1
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("PAGE_CACHE_ENABLED", "0")
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.hits, httpd.active, httpd.peak = {}, {}, {}
+    httpd.delay = 0.0
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch(urls, **kwargs):
+    with requests.Session() as session:
+        return {r.url: r for r in fetch_urls(urls, session=session, **kwargs)}
+
+
+def test_fetches_and_extracts_text(server):
+    url = f"http://127.0.0.1:{server.server_port}/ok"
+
+    result = fetch([url])[url]
+
+    assert result.error is None
+    assert result.text.startswith("El ayuntamiento aprobó ayer")
+
+
+def test_retries_after_429_respecting_retry_after(server):
+    url = f"http://127.0.0.1:{server.server_port}/flaky"
+
+    started = time.perf_counter()
+    result = fetch([url])[url]
+
+    assert result.error is None and result.text
+    assert server.hits["/flaky"] == 2
+    assert time.perf_counter() - started >= 1.0
+
+
+def test_gives_up_when_retry_after_exceeds_the_cap(server):
+    url = f"http://127.0.0.1:{server.server_port}/throttled"
+
+    started = time.perf_counter()
+    result = fetch([url], max_retry_after=2)[url]
+
+    assert result.text is None
+    assert "Retry-After 3600" in result.error
+    assert server.hits["/throttled"] == 1
+    assert time.perf_counter() - started < 2
+
+
+def test_backoff_is_capped(server):
+    url = f"http://127.0.0.1:{server.server_port}/busy"
+
+    started = time.perf_counter()
+    result = fetch([url], retries=2, backoff=30, max_retry_after=0.05)[url]
+
+    assert result.error.endswith("HTTP 503")
+    assert server.hits["/busy"] == 3
+    assert time.perf_counter() - started < 2
+
+
+def test_per_host_limit(server):
+    server.delay = 0.1
+    port = server.server_port
+    urls = [f"http://{host}:{port}/ok?n={n}" for host in ("127.0.0.1", "localhost") for n in range(8)]
+
+    results = fetch(urls, max_workers=8, per_host=2)
+
+    assert all(r.error is None for r in results.values())
+    assert server.peak == {"127.0.0.1": 2, "localhost": 2}
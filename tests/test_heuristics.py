@@ -0,0 +1,61 @@
+import re
+
+from app.services.heuristics import (
+    CUE_CATEGORIES, PLURAL_SUFFIXES, CueMatch, _expand_pattern, detect_red_flags, find_cues,
+)
+
+
+def reference_cues(text):
+    """Las mismas pistas buscando cada literal por separado (sin trie)."""
+    suffixes = "|".join(PLURAL_SUFFIXES)
+    found = set()
+    for category, (cues, is_regex) in CUE_CATEGORIES.items():
+        for cue in cues:
+            for literal in (_expand_pattern(cue) if is_regex else [cue]):
+                pattern = re.compile(rf"(?<!\w){re.escape(literal)}(?:{suffixes})?(?!\w)", re.IGNORECASE)
+                found.update(CueMatch(category, cue, m.start(), m.end()) for m in pattern.finditer(text))
+    return found
+
+
+def all_literals():
+    return [
+        literal
+        for cues, is_regex in CUE_CATEGORIES.values()
+        for cue in cues
+        for literal in (_expand_pattern(cue) if is_regex else [cue])
+    ]
+
+
+def test_trie_matches_one_regex_per_literal():
+    literals = all_literals()
+    text = " ".join(
+        [f"«{w.upper()}»" for w in literals[::3]]
+        + [f"{w}s," for w in literals[1::3]]
+        + [f"pre{w} {w}x ({w})" for w in literals[2::3]]
+    )
+    assert set(find_cues(text)) == reference_cues(text)
+
+
+def test_whole_words_and_plurals_only():
+    assert find_cues("Una nebulosa de insurgentes") == []
+    assert find_cues("Los bulos virales") == [
+        CueMatch("fake_news", "bulo", 4, 9),
+        CueMatch("clickbait", "viral", 10, 17),
+    ]
+
+
+def test_overlapping_cues_are_all_reported():
+    cues = {(m.cue, m.start, m.end) for m in find_cues("se volvió viral")}
+    assert cues == {("se volvió viral", 0, 15), ("viral", 10, 15)}
+
+
+def test_positions_refer_to_the_original_text_when_lower_changes_length():
+    # "İ".lower() ocupa dos caracteres: se usa la regex con IGNORECASE
+    text = "İstanbul: es un BULO"
+    [match] = find_cues(text)
+    assert text[match.start:match.end] == "BULO"
+
+
+def test_red_flags():
+    assert detect_red_flags("Es un bulo") == ["Sin señales de manipulación detectadas"]
+    assert detect_red_flags("¡Impactante! Un escándalo") == ["Posible clickbait", "Lenguaje sesgado o emocional"]
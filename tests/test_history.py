@@ -0,0 +1,58 @@
+import time
+
+from app.utils.history import HistoryStore
+
+
+def entry(texto, fecha, sentimiento="Neutral"):
+    return {
+        "fecha": fecha, "texto": texto, "idioma": "Spanish", "sentimiento": sentimiento,
+        "clasificación": "✅ Parece confiable", "flags": "", "positive_pct": 0.0,
+        "neutral_pct": 100.0, "negative_pct": 0.0,
+    }
+
+
+def test_entries_are_private_to_their_owner(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.sqlite3"))
+    store.add(entry("mío", time.time()), "a")
+    store.add(entry("tuyo", time.time()), "b")
+
+    assert [h["texto"] for h in store.page(1, 20, owner="a")] == ["mío"]
+    assert store.count(owner=None) == 0
+    assert HistoryStore(str(tmp_path / "h.sqlite3"), shared=True).count() == 2
+
+
+def test_old_entries_expire(tmp_path):
+    path = str(tmp_path / "h.sqlite3")
+    store = HistoryStore(path, max_age_days=30)
+    store.add_many([entry("viejo", time.time() - 31 * 86400), entry("nuevo", time.time())], "a")
+    store.prune()
+    assert [h["texto"] for h in store.page(1, 20, owner="a")] == ["nuevo"]
+
+    # Sin límite de antigüedad no se borra nada (y al abrir el fichero se poda)
+    HistoryStore(path, max_age_days=0).add(entry("viejo", time.time() - 31 * 86400), "a")
+    assert HistoryStore(path, max_age_days=30).count(owner="a") == 1
+
+
+def test_pages_are_newest_first_and_filtered(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.sqlite3"))
+    now = time.time()
+    store.add_many(
+        [entry(f"n{i}", now - i, "Positivo" if i % 2 else "Negativo") for i in range(5)], "a"
+    )
+
+    assert [h["texto"] for h in store.page(1, 2, owner="a")] == ["n0", "n1"]
+    assert [h["texto"] for h in store.page(3, 2, owner="a")] == ["n4"]
+    assert store.page(4, 2, owner="a") == []
+
+    filters = {"sentimiento": "Positivo", "idioma": ""}
+    assert store.count(filters, owner="a") == 2
+    assert [h["texto"] for h in store.page(1, 20, filters, owner="a")] == ["n1", "n3"]
+    assert store.distinct("sentimiento", owner="a") == ["Negativo", "Positivo"]
+    assert store.distinct("sentimiento", owner="b") == []
+
+
+def test_prune_keeps_the_newest_entries(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.sqlite3"), max_entries=3)
+    store.add_many([entry(f"n{i}", time.time()) for i in range(5)], "a")
+    store.prune()
+    assert sorted(h["texto"] for h in store.page(1, 20, owner="a")) == ["n2", "n3", "n4"]
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from app.services import jobs, language
+from app.utils.history import history_store
+
+TEXT = (
+    "El Gobierno aprobó hoy la nueva ley de vivienda. La oposición criticó duramente "
+    "la medida, aunque los inquilinos celebraron la rebaja de los alquileres."
+)
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(language, "ANALYSIS_BACKEND", "local")
+    queue = jobs.JobQueue(workers=1)
+    yield queue
+    queue._executor.shutdown(wait=True)
+
+
+def wait(queue, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.02)
+    raise AssertionError("el trabajo no terminó")
+
+
+def test_job_runs_uncached_core_and_saves_history(queue, monkeypatch):
+    # analyze_text lleva st.cache_data: no debe llamarse desde los hilos de la cola
+    monkeypatch.setattr(language, "analyze_text", None)
+
+    job = wait(queue, queue.submit(TEXT, "sesion"))
+
+    assert job.status == "done" and job.error is None
+    assert job.result.sentiment
+    assert history_store().count(owner="sesion") == 1
+
+
+def test_job_error_is_reported_through_the_job(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "analyze_texts", lambda texts: [{"error": "Azure no responde"}])
+
+    job = wait(queue, queue.submit(TEXT, "sesion"))
+
+    assert job.status == "error"
+    assert job.error == "Azure no responde"
+    assert job.result is None
+    assert history_store().count(owner="sesion") == 0
@@ -0,0 +1,50 @@
+from app.services import language
+
+TIMINGS = {"language": 0.1, "sentiment": 0.2, "summary": 0.3, "total": 0.5}
+
+
+def fake_azure(calls):
+    def analyze(texts):
+        calls.append(list(texts))
+        return [
+            {"language": "Spanish", "sentiment": "neutral", "summary": t, "sentences": [(t, "neutral")],
+             "scores": {"positive": 0.0, "neutral": 1.0, "negative": 0.0}, "timings": dict(TIMINGS)}
+            for t in texts
+        ]
+    return analyze
+
+
+def test_reused_results_do_not_report_azure_timings(monkeypatch):
+    calls = []
+    monkeypatch.setattr(language, "_analyze_with_azure", fake_azure(calls))
+
+    first = language._analyze_azure_cached(["uno", "dos", "uno"])
+    assert calls == [["uno", "dos"]]
+    assert [r["timings"] for r in first] == [TIMINGS, TIMINGS, language.CACHED_TIMINGS]
+
+    again = language._analyze_azure_cached(["dos"])
+    assert calls == [["uno", "dos"]]
+    assert again[0]["timings"] == language.CACHED_TIMINGS
+    assert again[0]["sentences"] == [("dos", "neutral")]
+
+
+def docs(*lengths):
+    return [{"id": str(i), "text": "x" * n} for i, n in enumerate(lengths)]
+
+
+def test_batches_respect_document_count():
+    batches = list(language._batches(docs(*[10] * 7), size=3))
+    assert [[d["id"] for d in b] for b in batches] == [["0", "1", "2"], ["3", "4", "5"], ["6"]]
+
+
+def test_batches_respect_payload_bytes_and_chars():
+    items = docs(400, 400, 400)
+    one = language._payload_bytes(items[0])
+    assert [len(b) for b in language._batches(items, size=25, max_bytes=2 * one)] == [2, 1]
+    assert [len(b) for b in language._batches(items, size=25, max_chars=799)] == [1, 1, 1]
+
+
+def test_oversized_document_goes_alone():
+    batches = list(language._batches(docs(10, 5000, 10), size=25, max_chars=1000))
+    assert [[d["id"] for d in b] for b in batches] == [["0"], ["1"], ["2"]]
+    assert list(language._batches([], size=25)) == []
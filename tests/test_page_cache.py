@@ -0,0 +1,44 @@
+from app.utils.cache import PageCache
+from app.utils.extractor import _parse_response, extract_text_from_response
+
+PARAGRAPH = "<p>" + "La comisión de investigación publicó hoy sus conclusiones finales. " * 4 + "</p>\n"
+PAGE = ("<html><body><article>" + PARAGRAPH * 400 + "</article></body></html>").encode("utf-8")
+
+
+class FakeResponse:
+    """Respuesta de requests (stream=True) con lo que usa el extractor."""
+
+    def __init__(self, status, body=b"", headers=None):
+        self.status_code = status
+        self.body = body
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+        self.url = "https://example.com/noticia"
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+def test_bytes_saved_counts_only_what_was_read(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"))
+    url = "https://example.com/noticia"
+    headers = {"ETag": '"v1"', "Content-Length": str(len(PAGE))}
+
+    # Descarga cortada en max_chars: no se lee la página entera
+    first = FakeResponse(200, PAGE, headers)
+    text = _parse_response(first, 2000, "html.parser", cache, url, None)
+    downloaded = cache.stats()["bytes_downloaded"]
+    assert len(text) == 2000
+    assert downloaded < len(PAGE)
+
+    # 304: se ahorra lo que se leyó, no el Content-Length
+    revalidation = FakeResponse(304, headers={"ETag": '"v1"'})
+    revalidation.page_cache = (cache, url, cache.get(url))
+    assert extract_text_from_response(revalidation, 2000, "html.parser") == text
+    stats = cache.stats()
+    assert stats["revalidated"] == 1
+    assert stats["bytes_saved"] == downloaded
@@ -0,0 +1,81 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import resilience
+from app.services.resilience import CircuitBreaker, CircuitOpenError, _retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # un éxito reinicia la cuenta
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_half_open_probe_closes_or_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half-open"
+    breaker.before_call()
+
+    # La llamada de prueba falla: vuelve a abrirse otros reset_timeout segundos
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 29
+    assert breaker.state == "open"
+    clock.now += 1
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def error_with(headers):
+    return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+
+def test_retry_after_headers():
+    assert _retry_after(error_with({"retry-after-ms": "1500"})) == 1.5
+    assert _retry_after(error_with({"x-ms-retry-after-ms": "250"})) == 0.25
+    assert _retry_after(error_with({"Retry-After": "3"})) == 3.0
+    # Los milisegundos tienen preferencia sobre Retry-After
+    assert _retry_after(error_with({"retry-after-ms": "100", "Retry-After": "9"})) == 0.1
+
+
+def test_retry_after_http_date():
+    delay = _retry_after(error_with({"Retry-After": formatdate(time.time() + 60, usegmt=True)}))
+    assert 55 <= delay <= 60
+    assert _retry_after(error_with({"Retry-After": formatdate(time.time() - 60, usegmt=True)})) == 0.0
+
+
+def test_retry_after_missing_or_invalid():
+    assert _retry_after(Exception("sin respuesta")) is None
+    assert _retry_after(error_with(None)) is None
+    assert _retry_after(error_with({"Retry-After": "pronto"})) is None
+    assert _retry_after(error_with({"retry-after-ms": "x"})) is None
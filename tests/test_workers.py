@@ -0,0 +1,59 @@
+import sys
+import types
+
+import pytest
+
+from app.services import workers
+
+
+def main_module_name():
+    """Tarea del pool: nombre del módulo __main__ del proceso que la ejecuta."""
+    main = sys.modules["__main__"]
+    return getattr(main.__spec__, "name", None), getattr(main, "__file__", None)
+
+
+@pytest.fixture
+def streamlit_main(tmp_path, monkeypatch):
+    """__main__ como el de `streamlit run`: un módulo nuevo con __file__ = el script de la app."""
+    marker = tmp_path / "ui_ran"
+    script = tmp_path / "main.py"
+    script.write_text(f"open({str(marker)!r}, 'w').close()\n")
+
+    main = types.ModuleType("__main__")
+    main.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+    return marker
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("WORKER_PROCESSES", "1")
+    workers.process_pool.clear()
+    yield workers.process_pool()
+    workers.process_pool().shutdown()
+    workers.process_pool.clear()
+
+
+def test_pool_does_not_run_the_app_script(streamlit_main, pool):
+    assert pool is not None
+    name, _ = pool.submit(main_module_name).result(timeout=60)
+
+    assert name == "app.services.worker_main"
+    assert not streamlit_main.exists()
+
+
+def test_pool_runs_tasks(streamlit_main, pool):
+    result = workers.wait(workers.heuristics("Según un bulo que circula por WhatsApp..."))
+
+    assert result.classification
+    assert not streamlit_main.exists()
+
+
+def test_without_pool_runs_inline(monkeypatch):
+    monkeypatch.setenv("WORKER_PROCESSES", "0")
+    workers.process_pool.clear()
+
+    future = workers.submit(sum, [1, 2, 3])
+
+    assert workers.process_pool() is None
+    assert future.result() == 6